@@ -3,7 +3,8 @@ from django.contrib import admin
 from django import forms
 from django.contrib.auth.admin import UserAdmin
 from django.core.exceptions import ValidationError
-from .models import User, Administrator, Employee, Service, Appointment
+from .models import User, Administrator, Employee, Branch, Service, Appointment
+from .queries import visible_appointments
 from django.utils.translation import gettext_lazy as _
 
 class CustomUserAdmin(UserAdmin):
@@ -19,7 +20,7 @@ class CustomUserAdmin(UserAdmin):
             'fields': ('is_active', 'is_staff', 'is_superuser', 'groups', 'user_permissions'),
         }),
         (_('Important dates'), {'fields': ('last_login', 'date_joined')}),
-        (_('Role'), {'fields': ('role',)}),
+        (_('Role'), {'fields': ('role', 'branch')}),
     )
     
     add_fieldsets = (
@@ -94,11 +95,14 @@ class AppointmentAdminForm(forms.ModelForm):
 class AppointmentAdmin(admin.ModelAdmin):
     form = AppointmentAdminForm
     list_display = ('client_name', 'service', 'employee', 'start_time', 'status')
-    list_filter = ('status', 'employee', 'service')
+    list_filter = ('status', 'branch', 'employee', 'service')
     search_fields = ('client_name', 'client_contact')
-    readonly_fields = ('end_time', 'created_at', 'updated_at')
+    readonly_fields = ('end_time', 'branch', 'created_at', 'updated_at')
     ordering = ('-start_time',)
     actions = ['mark_as_completed', 'cancel_appointments']
+
+    def get_queryset(self, request):
+        return visible_appointments(request.user)
     
     def mark_as_completed(self, request, queryset):
         updated = 0
@@ -126,6 +130,12 @@ class AppointmentAdmin(admin.ModelAdmin):
         self.message_user(request, f"{updated} agendamentos cancelados.")
     cancel_appointments.short_description = _("Cancelar agendamentos")
 
+class BranchAdmin(admin.ModelAdmin):
+    list_display = ('name', 'is_active')
+    list_editable = ('is_active',)
+    search_fields = ('name',)
+
+admin.site.register(Branch, BranchAdmin)
 admin.site.register(User, CustomUserAdmin)
 admin.site.register(Administrator, AdministratorAdmin)
 admin.site.register(Employee, EmployeeAdmin)
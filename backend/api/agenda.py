@@ -0,0 +1,103 @@
+# api/agenda
+"""
+Agenda diária de um profissional: agendamentos do dia, intervalos livres
+dentro do horário de funcionamento e totais, montados a partir de uma única
+consulta (agendamentos com o serviço via JOIN).
+
+O resultado fica em cache por profissional e dia. As chaves incluem uma
+versão por profissional, descartada por invalidate_agendas() sempre que um
+agendamento dele muda (sinais de Appointment, varredura e arquivamento).
+"""
+import uuid
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Appointment
+from .serializers import AgendaAppointmentSerializer
+
+VERSION_KEY = 'agenda:version:{employee_id}'
+AGENDA_KEY = 'agenda:{employee_id}:{version}:{day}'
+
+# Ocupam o horário do profissional (cancelados liberam o intervalo)
+BUSY_STATUSES = (Appointment.Status.RESERVED, Appointment.Status.COMPLETED, Appointment.Status.NO_SHOW)
+# Entram na receita prevista do dia
+BILLABLE_STATUSES = (Appointment.Status.RESERVED, Appointment.Status.COMPLETED)
+
+
+def _version(employee_id):
+    key = VERSION_KEY.format(employee_id=employee_id)
+    version = cache.get(key)
+    if version is None:
+        # add() não sobrescreve a versão gravada por outra requisição no meio tempo
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_agendas(employee_ids):
+    """Descarta as agendas em cache (todos os dias) dos profissionais informados"""
+    cache.delete_many([VERSION_KEY.format(employee_id=pk) for pk in set(employee_ids)])
+
+
+def _gaps(day, appointments):
+    opening = timezone.make_aware(datetime.combine(day, time(getattr(settings, 'AGENDA_OPENING_HOUR', 8))))
+    closing = timezone.make_aware(datetime.combine(day, time(getattr(settings, 'AGENDA_CLOSING_HOUR', 20))))
+    gaps = []
+    cursor = opening
+    for appointment in appointments:
+        if appointment.status not in BUSY_STATUSES:
+            continue
+        if appointment.start_time > cursor:
+            gaps.append((cursor, min(appointment.start_time, closing)))
+        cursor = max(cursor, appointment.end_time)
+        if cursor >= closing:
+            break
+    if cursor < closing:
+        gaps.append((cursor, closing))
+    return [
+        {
+            'start_time': timezone.localtime(start).isoformat(),
+            'end_time': timezone.localtime(end).isoformat(),
+            'minutes': int((end - start).total_seconds() // 60),
+        }
+        for start, end in gaps if end > start
+    ]
+
+
+def professional_agenda(professional, day):
+    """Agenda de `professional` no dia local `day` (uma consulta)"""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    appointments = list(
+        Appointment.objects.filter(
+            employee_id=professional.pk,
+            start_time__gte=start,
+            start_time__lt=start + timedelta(days=1)
+        ).select_related('service').order_by('start_time', 'id')
+    )
+
+    busy = [a for a in appointments if a.status in BUSY_STATUSES]
+    revenue = sum((a.service.price for a in appointments if a.status in BILLABLE_STATUSES), Decimal('0.00'))
+    return {
+        'professional': professional.pk,
+        'date': day.isoformat(),
+        'appointments': [dict(row) for row in AgendaAppointmentSerializer(appointments, many=True).data],
+        'gaps': _gaps(day, appointments),
+        'totals': {
+            'appointments': len(busy),
+            'booked_minutes': sum(int((a.end_time - a.start_time).total_seconds() // 60) for a in busy),
+            'expected_revenue': str(revenue.quantize(Decimal('0.01'))),
+        },
+    }
+
+
+def cached_professional_agenda(professional, day):
+    key = AGENDA_KEY.format(employee_id=professional.pk, version=_version(professional.pk), day=day.isoformat())
+    agenda = cache.get(key)
+    if agenda is None:
+        agenda = professional_agenda(professional, day)
+        cache.set(key, agenda, timeout=getattr(settings, 'AGENDA_CACHE_TIMEOUT', 300))
+    return agenda
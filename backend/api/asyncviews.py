@@ -0,0 +1,131 @@
+# api/asyncviews
+"""
+Variantes assíncronas das leituras mais frequentes, para servir sob ASGI
+(config/asgi.py). Enquanto aguardam o banco, as requisições não ocupam uma
+thread do servidor, o que importa com muitas conexões abertas ao mesmo tempo
+(tablets da recepção). Compare com `manage.py benchmark_asgi`.
+
+O DRF não executa views assíncronas, então autenticação JWT, throttling,
+erros e renderização são feitos aqui com as mesmas peças das views
+síncronas. Os throttles são os da view síncrona equivalente, com o mesmo
+escopo e a mesma chave: as duas URLs consomem o mesmo balde. Fica de fora o
+ETag condicional da lista de serviços; respostas e regras de visibilidade
+são as mesmas de /api/me/ e /api/services/. Sob WSGI estas views também
+funcionam, mas sem ganho.
+"""
+from contextlib import nullcontext
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import HttpResponse
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .fastserializers import CompiledSerializer
+from .mixins import etag_matches
+from .models import Service, User
+from .queries import branch_filter
+from .renderers import ORJSONRenderer
+from .routers import is_pinned_to_primary, replica_reads
+from .serializers import ServiceSerializer, UserSerializer
+from .usercache import acached_for_user, user_etag
+from .views import ServiceViewSet, me as sync_me
+
+
+def _render(data, status=200):
+    return HttpResponse(ORJSONRenderer().render(data), status=status, content_type='application/json')
+
+
+async def authenticate(request):
+    """Equivalente assíncrono de JWTAuthentication: valida o token e carrega o usuário"""
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header is not None else None
+    if raw_token is None:
+        raise exceptions.NotAuthenticated()
+
+    # Validação do JWT é só CPU; a única consulta é a do usuário
+    token = authentication.get_validated_token(raw_token)
+    try:
+        user = await User.objects.aget(**{jwt_settings.USER_ID_FIELD: token[jwt_settings.USER_ID_CLAIM]})
+    except User.DoesNotExist:
+        raise exceptions.AuthenticationFailed('Usuário não encontrado')
+    if not user.is_active:
+        raise exceptions.AuthenticationFailed('Usuário inativo')
+    return user
+
+
+@sync_to_async
+def check_throttles(request, user, sync_view):
+    """APIView.check_throttles com os throttles de `sync_view` (o cache pode ser síncrono)"""
+    request = Request(request)
+    request.user = user
+    durations = [
+        throttle.wait() for throttle in sync_view.get_throttles()
+        if not throttle.allow_request(request, sync_view)
+    ]
+    if durations:
+        raise exceptions.Throttled(max((d for d in durations if d is not None), default=None))
+
+
+def async_api_view(view_class, **initkwargs):
+    """
+    GET autenticado por JWT e limitado pelos throttles de view_class(**initkwargs),
+    a view síncrona equivalente; APIException e ValidationError viram respostas JSON
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                if request.method != 'GET':
+                    raise exceptions.MethodNotAllowed(request.method)
+                user = await authenticate(request)
+                await check_throttles(request, user, view_class(**initkwargs))
+                return await view(request, user, *args, **kwargs)
+            except ValidationError as exc:
+                return _render(exc.message_dict, status=400)
+            except exceptions.APIException as exc:
+                data = exc.detail if isinstance(exc.detail, (dict, list)) else {'detail': exc.detail}
+                response = _render(data, status=exc.status_code)
+                if getattr(exc, 'wait', None):
+                    response['Retry-After'] = '%d' % exc.wait
+                return response
+        return wrapper
+    return decorator
+
+
+# sync_me.cls é a APIView criada por @api_view; o nome da classe ('me') entra na chave do balde
+@async_api_view(sync_me.cls)
+async def me(request, user):
+    # Mesmas chaves de cache da view síncrona; o ETag difere só pelo formato
+    etag = user_etag(user, 'me', ORJSONRenderer.format)
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        response = HttpResponse(status=304)
+    else:
+        response = _render(await acached_for_user(user, 'me', lambda: dict(UserSerializer(user).data)))
+    response['ETag'] = etag
+    return response
+
+
+@async_api_view(ServiceViewSet, basename='service', action='list')
+async def service_list(request, user):
+    """Mesma saída de GET /api/services/ (inclusive ?search=, ?fields=, ?omit= e ?branch=)"""
+    serializer = ServiceSerializer(context={'request': Request(request)})
+    compiled = CompiledSerializer(serializer)
+
+    queryset = Service.objects.for_user(user, **branch_filter(request.GET))
+    search = request.GET.get('search')
+    if search:
+        # get_queryset e SearchFilter('^name') de ServiceViewSet
+        queryset = queryset.filter(name__icontains=search)
+        for term in search.replace(',', ' ').split():
+            queryset = queryset.filter(name__istartswith=term)
+    if not user.is_staff:
+        queryset = queryset.filter(is_active=True)
+
+    with nullcontext() if is_pinned_to_primary(user.pk) else replica_reads():
+        data = await compiled.adata(queryset)
+    return _render(data)
@@ -0,0 +1,128 @@
+# api/events
+import asyncio
+import itertools
+import json
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """
+    Fila de eventos de um único assinante, consumida no event loop em que foi
+    criada. put() pode ser chamado de qualquer thread (sinais, on_commit).
+    """
+
+    def __init__(self, broker, maxsize=1000):
+        self._broker = broker
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=maxsize)
+
+    def put(self, event):
+        try:
+            self._loop.call_soon_threadsafe(self._put_nowait, event)
+        except RuntimeError:
+            # Event loop já encerrado: o assinante está saindo
+            pass
+
+    def _put_nowait(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Assinante lento: descarta o evento em vez de bloquear quem publica
+            pass
+
+    async def get(self, timeout=None):
+        """Retorna o próximo evento ou None se o timeout expirar"""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self._broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    Pub/sub em memória, válido apenas dentro do processo atual.
+    Outros brokers (ex.: Redis local) devem expor a mesma interface:
+    publish(event), subscribe() e unsubscribe(subscription). subscribe()
+    é chamado dentro do event loop que vai consumir a assinatura.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+        self._ids = itertools.count(1)
+
+    def publish(self, event):
+        with self._lock:
+            event = {**event, 'id': next(self._ids)}
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.put(event)
+
+    def subscribe(self):
+        subscription = Subscription(self)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    """Instancia o broker configurado em APPOINTMENT_EVENTS_BROKER"""
+    path = getattr(settings, 'APPOINTMENT_EVENTS_BROKER', 'api.events.InProcessBroker')
+    return import_string(path)()
+
+
+def appointment_event(event_type, appointment):
+    """Monta o payload publicado para mudanças em agendamentos"""
+    return {
+        'type': event_type,
+        'appointment': {
+            'id': appointment.pk,
+            'employee_id': appointment.employee_id,
+            'branch_id': appointment.branch_id,
+            'service_id': appointment.service_id,
+            'client_name': appointment.client_name,
+            'start_time': appointment.start_time.isoformat(),
+            'end_time': appointment.end_time.isoformat() if appointment.end_time else None,
+            'status': appointment.status,
+        },
+    }
+
+
+def format_sse(event):
+    data = json.dumps(event['appointment'], ensure_ascii=False)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
+
+
+async def event_stream(matches, heartbeat=15):
+    """
+    Gera (assincronamente) o corpo de uma resposta text/event-stream. Envia um
+    comentário de keepalive a cada `heartbeat` segundos sem eventos para manter
+    proxies abertos.
+
+    A assinatura só é criada quando o corpo começa a ser consumido e é
+    encerrada quando o cliente desconecta (o ASGIHandler cancela o gerador).
+    Servido pelo ASGI (config/asgi.py), nenhuma thread fica presa por conexão.
+    """
+    subscription = get_broker().subscribe()
+    try:
+        yield ': connected\n\n'
+        while True:
+            event = await subscription.get(timeout=heartbeat)
+            if event is None:
+                yield ': keepalive\n\n'
+            elif matches(event):
+                yield format_sse(event)
+    finally:
+        subscription.close()
@@ -0,0 +1,169 @@
+# api/fastserializers
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.fields import ISO_8601
+from rest_framework.settings import api_settings
+
+
+class NotCompilable(Exception):
+    """O serializer usa algo que não pode ser lido de values_list()"""
+
+
+def _datetime_converter(field):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+    tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    enforce_timezone = field.enforce_timezone
+
+    # Mesmo resultado de DateTimeField.to_representation para o formato ISO 8601
+    def convert(value):
+        if tz is not None and value.tzinfo is not None:
+            value = value.astimezone(tz)
+        else:
+            value = enforce_timezone(value)
+        value = value.isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return convert
+
+
+def _date_converter(field):
+    output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+    return lambda value: value.isoformat()
+
+
+def _converter(field):
+    """Função aplicada ao valor não nulo da coluna; None quando o valor sai como está"""
+    if isinstance(field, serializers.DateTimeField):
+        return _datetime_converter(field)
+    if isinstance(field, serializers.DateField):
+        return _date_converter(field)
+    if isinstance(field, serializers.ChoiceField):
+        return field.to_representation
+    if isinstance(field, serializers.CharField):
+        return str
+    if isinstance(field, (serializers.BooleanField, serializers.ReadOnlyField, serializers.PrimaryKeyRelatedField)):
+        return None
+    if isinstance(field, serializers.IntegerField):
+        return int
+    if isinstance(field, (serializers.RelatedField, serializers.ManyRelatedField)):
+        raise NotCompilable(f'campo relacional {field.field_name!r} ({type(field).__name__})')
+    if isinstance(field, serializers.Field):
+        return field.to_representation
+    raise NotCompilable(f'campo {field.field_name!r} ({type(field).__name__})')
+
+
+def _column_path(model, source):
+    """'service.name' -> 'service__name', validando que cada parte é um campo do modelo"""
+    parts = source.split('.')
+    for index, part in enumerate(parts):
+        try:
+            model_field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            raise NotCompilable(f'{source!r} não é uma coluna de {model.__name__}')
+        if model_field.many_to_many or model_field.one_to_many or not model_field.concrete:
+            raise NotCompilable(f'{source!r} não é uma coluna de {model.__name__}')
+        if index < len(parts) - 1:
+            if not model_field.is_relation:
+                raise NotCompilable(f'{source!r} não é uma coluna de {model.__name__}')
+            model = model_field.related_model
+    return '__'.join(parts)
+
+
+class CompiledSerializer:
+    """
+    Versão somente leitura de um serializer, montada a partir das linhas de
+    values_list(). A árvore de campos é percorrida uma única vez e cada campo
+    vira (nome, índice da coluna, conversor), de modo que a geração do JSON
+    não passa pelo get_attribute/to_representation de cada campo do DRF.
+
+    A saída é idêntica à do serializer original (inclusive com ?fields= e
+    ?omit=, pois os campos são lidos de `serializer.fields`). Campos de
+    método só são aceitos se o serializer oferecer `<método>_expression`,
+    que devolve uma expressão anotada na consulta. Qualquer outro campo sem
+    equivalente em coluna lança NotCompilable.
+    """
+
+    def __init__(self, serializer):
+        self.columns = []
+        self.expressions = {}
+        self._indexes = {}
+        self._build = self._compile(serializer, '')
+
+    def _column(self, path):
+        if path not in self._indexes:
+            self._indexes[path] = len(self.columns)
+            self.columns.append(path)
+        return self._indexes[path]
+
+    def _expression(self, hook, prefix):
+        # Campos que compartilham a mesma expressão (ex.: can_edit = can_delete) usam uma só coluna
+        key = (getattr(hook, '__func__', hook), prefix)
+        if key not in self._indexes:
+            alias = f'_fast_{len(self.expressions)}'
+            self.expressions[alias] = hook(prefix)
+            self._indexes[key] = self._column(alias)
+        return self._indexes[key]
+
+    def _compile(self, serializer, prefix):
+        if type(serializer).to_representation is not serializers.Serializer.to_representation:
+            raise NotCompilable(f'{type(serializer).__name__} sobrescreve to_representation')
+
+        model = serializer.Meta.model
+        # Relação nula (FK opcional) vira None, como no serializer aninhado
+        null_index = self._column(prefix + model._meta.pk.name) if prefix else None
+        plan = []
+
+        for field in serializer.fields.values():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.Serializer):
+                path = _column_path(model, field.source)
+                plan.append((field.field_name, None, self._compile(field, prefix + path + '__')))
+            elif isinstance(field, serializers.SerializerMethodField):
+                hook = getattr(serializer, f'{field.method_name}_expression', None)
+                if hook is None:
+                    raise NotCompilable(f'campo de método {field.field_name!r} sem expressão equivalente')
+                plan.append((field.field_name, self._expression(hook, prefix), None))
+            elif field.source == '*' or isinstance(field, serializers.ListSerializer):
+                raise NotCompilable(f'campo {field.field_name!r}')
+            else:
+                path = _column_path(model, field.source)
+                plan.append((field.field_name, self._column(prefix + path), _converter(field)))
+
+        def build(row):
+            if null_index is not None and row[null_index] is None:
+                return None
+            data = {}
+            for name, index, convert in plan:
+                if index is None:
+                    data[name] = convert(row)
+                    continue
+                value = row[index]
+                data[name] = value if value is None or convert is None else convert(value)
+            return data
+        return build
+
+    def _rows(self, queryset):
+        if self.expressions:
+            queryset = queryset.annotate(**self.expressions)
+        return queryset.values_list(*self.columns)
+
+    def data(self, queryset):
+        build = self._build
+        return [build(row) for row in self._rows(queryset)]
+
+    async def adata(self, queryset):
+        """Como data(), com o ORM assíncrono (views ASGI)"""
+        build = self._build
+        return [build(row) async for row in self._rows(queryset)]
+
+    def iter_data(self, queryset, chunk_size=500):
+        """Como data(), mas lendo o banco em blocos via iterator()"""
+        build = self._build
+        for row in self._rows(queryset).iterator(chunk_size=chunk_size):
+            yield build(row)
@@ -0,0 +1,64 @@
+# api/hashers
+"""
+Hashers de senha com custo configurável em PASSWORD_HASHER_COST.
+
+O perfil ativo (PASSWORD_HASHER_PROFILE) define o hasher preferido; os demais
+continuam na lista apenas para verificar hashes antigos. No login, o Django
+refaz o hash com o hasher preferido (e com o custo atual) quando o hash
+guardado usa outro algoritmo ou outro custo, então trocar de perfil não exige
+migração: cada usuário é convertido no próximo login.
+
+Ordem de grandeza do custo por login em um núcleo (meça no hardware de
+produção com `manage.py benchmark_login`):
+
+- pbkdf2 (1.000.000 iterações, padrão do Django 5.2): ~0,5 s, ~2 logins/s
+  por núcleo. Sem dependências, mas barato de atacar com GPU.
+- argon2 (argon2id, time_cost=2, memory_cost=64 MiB): dezenas de ms. Resistente
+  a GPU pela memória, porém cada login simultâneo ocupa memory_cost de RAM;
+  com muitos logins na troca de turno, o limite passa a ser a memória.
+- bcrypt (bcrypt_sha256, rounds=12): ~0,25 s; cada round a mais dobra o custo.
+
+Reduzir o custo aumenta a vazão de logins na mesma proporção em que reduz o
+custo de um ataque de força bruta a um hash vazado.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core import checks
+
+
+def _cost(profile):
+    return getattr(settings, 'PASSWORD_HASHER_COST', {}).get(profile, {})
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    def __init__(self):
+        self.iterations = _cost('pbkdf2').get('iterations', self.iterations)
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    def __init__(self):
+        cost = _cost('argon2')
+        self.time_cost = cost.get('time_cost', self.time_cost)
+        self.memory_cost = cost.get('memory_cost', self.memory_cost)
+        self.parallelism = cost.get('parallelism', self.parallelism)
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    def __init__(self):
+        self.rounds = _cost('bcrypt').get('rounds', self.rounds)
+
+
+@checks.register(checks.Tags.security)
+def check_password_hasher_profile(app_configs, **kwargs):
+    """Avisa quando o perfil pedido não pôde ser usado por falta da biblioteca"""
+    profile = getattr(settings, 'PASSWORD_HASHER_PROFILE', 'pbkdf2')
+    profiles = getattr(settings, 'PASSWORD_HASHER_PROFILES', {})
+    if profile not in profiles:
+        return [checks.Error(f'PASSWORD_HASHER_PROFILE desconhecido: {profile!r}', id='api.E001')]
+    if settings.PASSWORD_HASHERS[:1] != profiles[profile][:1]:
+        return [checks.Warning(
+            f'Perfil de hash {profile!r} indisponível; usando {settings.PASSWORD_HASHERS[0]}.',
+            hint='Instale argon2-cffi (argon2) ou bcrypt (bcrypt).',
+            id='api.W001',
+        )]
+    return []
@@ -0,0 +1,142 @@
+# api/idempotency
+import functools
+import hashlib
+import json
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+DEFAULT_TTL = timedelta(hours=24)
+DEFAULT_LEASE = timedelta(seconds=60)
+
+
+def _request_hash(request):
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+    payload = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _lease():
+    return timezone.now() + getattr(settings, 'IDEMPOTENCY_KEY_LEASE', DEFAULT_LEASE)
+
+
+def _take_over(record):
+    """
+    Assume uma requisição em processamento cujo prazo acabou (o processo que a
+    atendia morreu). O UPDATE condicionado ao prazo antigo garante que só uma
+    repetição concorrente assume. Retorna True se assumiu.
+    """
+    if record.status_code is not None:
+        return False
+    if record.locked_until is not None and record.locked_until > timezone.now():
+        return False
+    locked_until = _lease()
+    taken = IdempotencyKey.objects.filter(
+        pk=record.pk, status_code__isnull=True, locked_until=record.locked_until
+    ).update(locked_until=locked_until)
+    if taken:
+        record.locked_until = locked_until
+    return bool(taken)
+
+
+def _claim(request, key, request_hash):
+    """Reserva a chave; retorna (registro, criado)"""
+    ttl = getattr(settings, 'IDEMPOTENCY_KEY_TTL', DEFAULT_TTL)
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(
+                    key=key,
+                    user=request.user,
+                    method=request.method,
+                    path=request.path,
+                    request_hash=request_hash,
+                    locked_until=_lease(),
+                    expires_at=timezone.now() + ttl
+                ), True
+        except IntegrityError:
+            record = IdempotencyKey.objects.filter(user=request.user, key=key).first()
+            if record is None:
+                continue
+            if record.expires_at > timezone.now():
+                same_request = (record.method, record.path, record.request_hash) == (
+                    request.method, request.path, request_hash)
+                return record, same_request and _take_over(record)
+            # Chave expirada ainda não removida pela limpeza: reutiliza
+            record.delete()
+    raise IntegrityError(f'Não foi possível reservar a chave de idempotência {key!r}')
+
+
+def idempotent(view_method):
+    """
+    Torna uma ação idempotente quando o cliente envia Idempotency-Key.
+
+    A primeira requisição executa a ação e grava status e corpo da resposta;
+    repetições com a mesma chave devolvem a resposta gravada sem executar a
+    ação novamente. Respostas 5xx e exceções liberam a chave para nova tentativa.
+
+    Enquanto a primeira está em processamento, repetições recebem 409 com
+    Retry-After. Se ela não terminar dentro de IDEMPOTENCY_KEY_LEASE (processo
+    reiniciado no meio), a próxima repetição assume a execução; a resposta só
+    é gravada por quem detém o prazo atual.
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+
+        if len(key) > 255:
+            return Response(
+                {'status': 'error', 'message': 'Idempotency-Key deve ter no máximo 255 caracteres.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        request_hash = _request_hash(request)
+        record, created = _claim(request, key, request_hash)
+
+        if not created:
+            if (record.method, record.path, record.request_hash) != (request.method, request.path, request_hash):
+                return Response(
+                    {'status': 'error', 'message': 'Idempotency-Key já utilizada em outra requisição.'},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            if record.status_code is None:
+                # Prazo lido antes de outra repetição assumir pode estar vencido: no mínimo 1s
+                remaining = (record.locked_until - timezone.now()).total_seconds() if record.locked_until else 0
+                retry_after = max(1, math.ceil(remaining))
+                return Response(
+                    {'status': 'error', 'message': 'Requisição com esta Idempotency-Key ainda em processamento.'},
+                    status=status.HTTP_409_CONFLICT,
+                    headers={'Retry-After': str(retry_after)}
+                )
+            return Response(
+                record.response_body,
+                status=record.status_code,
+                headers={'Idempotent-Replayed': 'true'}
+            )
+
+        # Só altera o registro enquanto o prazo for desta execução
+        owned = IdempotencyKey.objects.filter(pk=record.pk, locked_until=record.locked_until)
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            owned.delete()
+            raise
+
+        if response.status_code >= 500:
+            owned.delete()
+        else:
+            owned.update(status_code=response.status_code, response_body=response.data, locked_until=None)
+        return response
+
+    return wrapper
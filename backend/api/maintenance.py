@@ -0,0 +1,127 @@
+# api/maintenance
+from django.db import connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .agenda import invalidate_agendas
+from .events import appointment_event, get_broker
+from .models import Appointment, AppointmentArchive, AppointmentTombstone, Reminder, TableVersion
+
+SWEEP_OUTCOMES = (Appointment.Status.NO_SHOW, Appointment.Status.COMPLETED)
+ARCHIVABLE_STATUSES = (
+    Appointment.Status.CANCELLED,
+    Appointment.Status.COMPLETED,
+    Appointment.Status.NO_SHOW,
+)
+
+
+def sweep_stale_appointments(older_than, outcome, batch_size=1000):
+    """
+    Encerra agendamentos reservados que terminaram há mais de `older_than`,
+    marcando-os com `outcome` (não compareceu ou concluído).
+
+    Cada lote lê até `batch_size` ids e os altera num único UPDATE
+    condicionado ao status reservado, então execuções concorrentes nunca
+    alteram a mesma linha duas vezes. Depois do commit, cada linha alterada vai para o feed
+    de eventos, como uma troca de status feita por save(). Retorna o total
+    de agendamentos alterados.
+    """
+    if outcome not in SWEEP_OUTCOMES:
+        raise ValueError(f'Resultado inválido para a varredura: {outcome}')
+
+    # Mesmo tipo de evento que signals._event_type dá a essa troca de status
+    event_type = outcome if outcome == Appointment.Status.COMPLETED else 'updated'
+    cutoff = timezone.now() - older_than
+    total = 0
+    while True:
+        stale = list(
+            Appointment.objects.filter(status=Appointment.Status.RESERVED, end_time__lt=cutoff)
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not stale:
+            return total
+        # UPDATE em massa não dispara sinais nem passa por save(): a versão de
+        # sincronização (que também invalida os ETags) é tirada aqui, na mesma transação
+        with transaction.atomic():
+            sync_version = TableVersion.next(Appointment)
+            # Condicionado ao status: linhas varridas por outra execução ficam de fora
+            updated = Appointment.objects.filter(
+                pk__in=stale, status=Appointment.Status.RESERVED
+            ).update(
+                status=outcome,
+                version=F('version') + 1,
+                updated_at=timezone.now(),
+                sync_version=sync_version
+            )
+            if not updated:
+                continue
+            # A versão é única por lote: identifica exatamente as linhas deste UPDATE
+            swept = list(Appointment.objects.filter(sync_version=sync_version))
+            transaction.on_commit(lambda swept=swept: _publish_swept(swept, event_type))
+        total += updated
+
+
+def _publish_swept(appointments, event_type):
+    invalidate_agendas({appointment.employee_id for appointment in appointments})
+    broker = get_broker()
+    for appointment in appointments:
+        broker.publish(appointment_event(event_type, appointment))
+
+
+def archive_appointments(before, batch_size=1000):
+    """
+    Move agendamentos encerrados que terminaram antes de `before` para
+    AppointmentArchive, um lote por transação, sem carregar tudo em memória.
+
+    As linhas saem da tabela principal por um DELETE direto, sem os sinais
+    de exclusão (não foram excluídas, apenas mudaram de tabela: nada vai
+    para o feed). A sincronização incremental não as lista mais, então cada
+    uma ganha uma lápide, com versões da mesma sequência de
+    Appointment.sync_version, para o cliente removê-la. Retorna o total
+    arquivado.
+    """
+    fields = [
+        field.attname for field in AppointmentArchive._meta.concrete_fields
+        if field.name != 'archived_at'
+    ]
+    total = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                Appointment.objects.filter(status__in=ARCHIVABLE_STATUSES, end_time__lt=before)
+                .values(*fields)[:batch_size]
+            )
+            if not rows:
+                return total
+            ids = [row['id'] for row in rows]
+            AppointmentArchive.objects.bulk_create(
+                [AppointmentArchive(**row) for row in rows], ignore_conflicts=True
+            )
+            Reminder.objects.filter(appointment_id__in=ids).delete()
+            _delete_rows(Appointment, ids)
+            # Uma versão por lápide: o cursor das lápides é só a versão (api/sync.py)
+            last_version = TableVersion.next(Appointment, count=len(rows))
+            AppointmentTombstone.objects.bulk_create([
+                AppointmentTombstone(
+                    appointment_id=row['id'],
+                    employee_id=row['employee_id'],
+                    branch_id=row['branch_id'],
+                    sync_version=last_version - len(rows) + position
+                )
+                for position, row in enumerate(rows, start=1)
+            ])
+            employee_ids = {row['employee_id'] for row in rows}
+            transaction.on_commit(lambda ids=employee_ids: invalidate_agendas(ids))
+        total += len(rows)
+
+
+def _delete_rows(model, ids):
+    """DELETE por chave primária, sem carregar as linhas nem disparar sinais"""
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote(model._meta.db_table)} WHERE {quote(model._meta.pk.column)} IN ({placeholders})',
+            ids
+        )
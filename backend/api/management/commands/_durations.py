@@ -0,0 +1,18 @@
+import re
+from datetime import timedelta
+
+from django.core.management.base import CommandError
+from django.utils.dateparse import parse_duration
+
+UNITS = {'m': 'minutes', 'h': 'hours', 'd': 'days'}
+
+
+def parse_age(value):
+    """Aceita '90m', '2h', '7d' ou qualquer formato de parse_duration"""
+    match = re.fullmatch(r'(\d+)([mhd])', value.strip())
+    if match:
+        return timedelta(**{UNITS[match.group(2)]: int(match.group(1))})
+    duration = parse_duration(value)
+    if duration is None:
+        raise CommandError(f'Duração inválida: {value}')
+    return duration
@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.maintenance import archive_appointments
+
+from ._durations import parse_age
+
+
+class Command(BaseCommand):
+    help = 'Move agendamentos encerrados antigos para a tabela de histórico'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', default=None,
+                            help="Idade mínima após o término, ex.: '180d' (padrão: APPOINTMENT_ARCHIVE_AFTER)")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        older_than = (
+            parse_age(options['older_than']) if options['older_than']
+            else getattr(settings, 'APPOINTMENT_ARCHIVE_AFTER', timedelta(days=180))
+        )
+        archived = archive_appointments(timezone.now() - older_than, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{archived} agendamentos arquivados.'))
@@ -0,0 +1,195 @@
+import asyncio
+import os
+import shlex
+import socket
+import statistics
+import subprocess
+import time
+from importlib.util import find_spec
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.models import User
+
+# Leituras medidas: a view síncrona (DRF) servida pelo servidor WSGI e a
+# variante assíncrona servida pelo servidor ASGI
+ENDPOINTS = {
+    'me': ('me', 'async-me'),
+    'services': ('service-list', 'async-service-list'),
+}
+
+# Implantação anterior (gunicorn, worker síncrono padrão) e a atual (Dockerfile)
+WSGI_SERVER = 'gunicorn config.wsgi:application --bind 127.0.0.1:{port}'
+ASGI_SERVER = 'uvicorn config.asgi:application --host 127.0.0.1 --port {port} --no-access-log'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def process_threads(pid):
+    """Threads do processo e dos filhos diretos (workers do gunicorn), via /proc; None fora do Linux"""
+    proc = Path('/proc')
+    if not (proc / str(pid)).exists():
+        return None
+    pids = [pid]
+    for stat in proc.glob('[0-9]*/stat'):
+        try:
+            # Campos depois do nome do executável: estado, ppid, ...
+            if int(stat.read_text().rsplit(')', 1)[1].split()[1]) == pid:
+                pids.append(int(stat.parent.name))
+        except (OSError, IndexError, ValueError):
+            continue
+    total = 0
+    for child in pids:
+        try:
+            total += len(os.listdir(proc / str(child) / 'task'))
+        except OSError:
+            pass
+    return total
+
+
+class Command(BaseCommand):
+    help = (
+        'Sobe o servidor WSGI (config/wsgi.py) e o ASGI (config/asgi.py) como na '
+        'implantação e compara, por sockets reais, requisições/s, latência e threads '
+        'com conexões ativas e conexões ociosas abertas'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', choices=ENDPOINTS, default='me')
+        parser.add_argument('--connections', type=int, default=20, help='Conexões fazendo requisições')
+        parser.add_argument('--idle', type=int, default=200, help='Conexões abertas sem tráfego (tablets)')
+        parser.add_argument('--duration', type=float, default=10, help='Segundos de carga por servidor')
+        parser.add_argument('--wsgi-server', default=WSGI_SERVER, help='Comando do servidor WSGI ({port} é substituído)')
+        parser.add_argument('--asgi-server', default=ASGI_SERVER, help='Comando do servidor ASGI ({port} é substituído)')
+
+    def handle(self, *args, **options):
+        if options['connections'] < 1 or options['duration'] <= 0 or options['idle'] < 0:
+            raise CommandError('--connections e --duration devem ser positivos e --idle não negativo')
+        if find_spec('httpx') is None:
+            raise CommandError('O gerador de carga usa httpx: pip install httpx')
+
+        sync_name, async_name = ENDPOINTS[options['endpoint']]
+        # Os servidores usam o mesmo banco: o usuário é gravado de verdade e removido no fim
+        user = User.objects.create_user(username='benchmark.asgi', password='benchmark123')
+        headers = {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'}
+        try:
+            results = [
+                ('wsgi', *self._measure(options['wsgi_server'], reverse(sync_name), headers, options)),
+                ('asgi', *self._measure(options['asgi_server'], reverse(async_name), headers, options)),
+            ]
+        finally:
+            user.delete()
+
+        self.stdout.write(
+            f'{options["endpoint"]}: {options["connections"]} conexões ativas, '
+            f'{options["idle"]} ociosas, {options["duration"]:g}s por servidor'
+        )
+        self.stdout.write(
+            f'{"modo":<6} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"erros":>7} {"threads (pico)":>15}'
+        )
+        for mode, completed, errors, latencies, threads in results:
+            p50 = f'{statistics.median(latencies) * 1000:.1f}' if latencies else '-'
+            p95 = f'{statistics.quantiles(latencies, n=20)[-1] * 1000:.1f}' if len(latencies) > 1 else '-'
+            self.stdout.write(
+                f'{mode:<6} {completed / options["duration"]:>8.0f} {p50:>8} {p95:>8} '
+                f'{errors:>7} {threads if threads is not None else "-":>15}'
+            )
+
+    def _measure(self, command, path, headers, options):
+        port = free_port()
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'),
+            # Sem limites: os dois servidores fazem o mesmo trabalho por requisição
+            'DISABLE_THROTTLING': '1',
+        }
+        argv = shlex.split(command.format(port=port))
+        try:
+            server = subprocess.Popen(
+                argv, cwd=settings.BASE_DIR, env=env,
+                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+            )
+        except FileNotFoundError:
+            raise CommandError(f'Servidor não encontrado: {argv[0]} (veja requirements.txt)')
+        try:
+            self._wait_until_ready(server, port)
+            return asyncio.run(self._load(server.pid, port, path, headers, options))
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    def _wait_until_ready(self, server, port, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'O servidor encerrou ao subir:\n{server.stderr.read().decode(errors="replace")}')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.1)
+        raise CommandError(f'O servidor não abriu a porta {port} em {timeout}s')
+
+    async def _load(self, pid, port, path, headers, options):
+        """Cada conexão ativa faz requisições em sequência até o fim do tempo"""
+        import httpx
+
+        idle = []
+        for _ in range(options['idle']):
+            # Conexão TCP aberta e parada, como um tablet entre duas consultas
+            idle.append(await asyncio.open_connection('127.0.0.1', port))
+
+        peak = process_threads(pid)
+        latencies, errors = [], 0
+        deadline = time.monotonic() + options['duration']
+        limits = httpx.Limits(max_connections=options['connections'])
+
+        async def sample_threads():
+            nonlocal peak
+            while True:
+                threads = process_threads(pid)
+                if threads is not None:
+                    peak = max(peak or 0, threads)
+                await asyncio.sleep(0.05)
+
+        async def connection(client):
+            nonlocal errors
+            while (remaining := deadline - time.monotonic()) > 0:
+                started = time.monotonic()
+                try:
+                    response = await client.get(path, timeout=remaining)
+                except httpx.TimeoutException:
+                    # Resposta que não chegou dentro do tempo da medição
+                    return
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                if response.status_code == 200:
+                    latencies.append(time.monotonic() - started)
+                else:
+                    errors += 1
+
+        sampler = asyncio.create_task(sample_threads())
+        try:
+            async with httpx.AsyncClient(
+                base_url=f'http://127.0.0.1:{port}', headers=headers, limits=limits
+            ) as client:
+                await asyncio.gather(*(connection(client) for _ in range(options['connections'])))
+        finally:
+            sampler.cancel()
+            for _, writer in idle:
+                writer.close()
+        if errors and not latencies:
+            self.stderr.write(f'Nenhuma resposta 200 de {path}; verifique se o banco está migrado')
+        return len(latencies), errors, latencies, peak
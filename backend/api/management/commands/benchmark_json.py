@@ -0,0 +1,62 @@
+import timeit
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.parsers import ORJSONParser
+from api.renderers import ORJSONRenderer, orjson
+
+
+def sample_appointments(rows):
+    """Lista no formato de /api/appointments/, com Decimal e datetimes no fuso local"""
+    start = timezone.localtime(timezone.now()).replace(minute=0, second=0, microsecond=0)
+    return [
+        {
+            'id': i,
+            'client_name': f'Cliente {i} São João',
+            'client_contact': '11999999999',
+            'start_time': start + timedelta(minutes=30 * i),
+            'end_time': start + timedelta(minutes=30 * i + 45),
+            'status': 'reserved',
+            'notes': 'Cliente prefere horário da manhã.' if i % 3 == 0 else None,
+            'version': 1,
+            'service': {'id': 1, 'name': 'Corte de Cabelo', 'duration': 45, 'price': Decimal('50.00'), 'is_active': True},
+            'employee': {'id': 2, 'username': 'ana', 'first_name': 'Ana', 'last_name': 'Souza',
+                         'email': 'ana@example.com', 'phone': '11988887777', 'role': 'EMPLOYEE',
+                         'is_staff': False, 'is_active': True},
+        }
+        for i in range(rows)
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Compara a vazão de JSONRenderer/JSONParser com as versões baseadas em orjson'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson não instalado: ORJSONRenderer usa o json da stdlib.'))
+
+        data = sample_appointments(options['rows'])
+        repeat = options['repeat']
+        body = JSONRenderer().render(data)
+        self.stdout.write(f"{options['rows']} agendamentos, {len(body) / 1024:.0f} KiB por resposta")
+
+        for label, func in (
+            ('render stdlib', lambda: JSONRenderer().render(data)),
+            ('render orjson', lambda: ORJSONRenderer().render(data)),
+            ('parse stdlib', lambda: JSONParser().parse(BytesIO(body))),
+            ('parse orjson', lambda: ORJSONParser().parse(BytesIO(body))),
+        ):
+            seconds = min(timeit.repeat(func, number=repeat, repeat=3)) / repeat
+            self.stdout.write(
+                f'{label:<14} {seconds * 1000:8.2f} ms/resposta  {len(body) / seconds / 2 ** 20:8.1f} MiB/s'
+            )
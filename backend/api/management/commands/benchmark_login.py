@@ -0,0 +1,74 @@
+import time
+from importlib.util import find_spec
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.views import TokenObtainPairView
+
+from api.models import User
+
+LIBRARIES = {'argon2': 'argon2', 'bcrypt': 'bcrypt'}
+
+
+class Command(BaseCommand):
+    help = 'Mede logins/s por núcleo em /api/token/ para cada perfil de hash de senha'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=10)
+        parser.add_argument('--profile', action='append', dest='profiles',
+                            help='Perfil a medir (repetível; padrão: todos os disponíveis)')
+
+    def handle(self, *args, **options):
+        profiles = options['profiles'] or list(settings.PASSWORD_HASHER_PROFILES)
+        unknown = set(profiles) - set(settings.PASSWORD_HASHER_PROFILES)
+        if unknown:
+            raise CommandError(f'Perfis desconhecidos: {", ".join(sorted(unknown))}')
+
+        if options['logins'] < 1:
+            raise CommandError('--logins deve ser positivo')
+
+        # Sem throttle: um 429 seria cronometrado como login
+        view = TokenObtainPairView.as_view(throttle_classes=[])
+        factory = APIRequestFactory()
+        self.stdout.write(f'{"perfil":<8} {"ms/login":>10} {"logins/s/núcleo":>16}  rehash no 1º login')
+
+        for profile in profiles:
+            library = LIBRARIES.get(profile)
+            if library and find_spec(library) is None:
+                self.stdout.write(f'{profile:<8} {"biblioteca ausente: " + library:>28}')
+                continue
+
+            # Tudo é desfeito ao final; o processo usa um único núcleo
+            with transaction.atomic(), override_settings(PASSWORD_HASHERS=settings.PASSWORD_HASHER_PROFILES['pbkdf2']):
+                user = User.objects.create_user(username='benchmark.login', password='benchmark123')
+
+                with override_settings(PASSWORD_HASHERS=settings.PASSWORD_HASHER_PROFILES[profile]):
+                    login = lambda: view(factory.post(
+                        '/api/token/', {'username': 'benchmark.login', 'password': 'benchmark123'}, format='json'
+                    ))
+                    started = time.perf_counter()
+                    response = login()
+                    rehash = time.perf_counter() - started
+                    if response.status_code != 200:
+                        raise CommandError(f'Login falhou no perfil {profile}: {response.data}')
+                    user.refresh_from_db()
+                    algorithm = user.password.split('$', 1)[0]
+
+                    started = time.perf_counter()
+                    for _ in range(options['logins']):
+                        response = login()
+                        if response.status_code != 200:
+                            raise CommandError(
+                                f'Login falhou no perfil {profile} ({response.status_code}): {response.data}'
+                            )
+                    per_login = (time.perf_counter() - started) / options['logins']
+
+                transaction.set_rollback(True)
+
+            self.stdout.write(
+                f'{profile:<8} {per_login * 1000:>10.1f} {1 / per_login:>16.1f}  '
+                f'{rehash * 1000:.0f} ms -> {algorithm}'
+            )
@@ -0,0 +1,59 @@
+import csv
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.serializers import BulkProfessionalSerializer
+
+
+class Command(BaseCommand):
+    help = 'Cadastra profissionais em lote a partir de um arquivo CSV ou JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV com cabeçalho (username, first_name, last_name, email, phone, password) ou lista JSON')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Processos para calcular os hashes de senha (padrão: PASSWORD_HASH_WORKERS ou nº de núcleos)')
+        parser.add_argument('--dry-run', action='store_true', help='Apenas valida o arquivo')
+
+    def handle(self, *args, **options):
+        rows = self._read(Path(options['path']))
+        serializer = BulkProfessionalSerializer(
+            data=rows,
+            many=True,
+            min_length=1,
+            context={'password_hash_workers': options['workers']}
+        )
+        if not serializer.is_valid():
+            self._report(serializer.errors)
+            raise CommandError('Nenhum profissional cadastrado: corrija as linhas acima.')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'{len(rows)} linhas válidas.'))
+            return
+
+        started = time.monotonic()
+        with transaction.atomic():
+            users = serializer.save()
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(users)} profissionais cadastrados em {time.monotonic() - started:.1f}s.'
+        ))
+
+    def _read(self, path):
+        try:
+            with path.open(encoding='utf-8-sig', newline='') as file:
+                if path.suffix.lower() == '.json':
+                    return json.load(file)
+                return [{key: value for key, value in row.items() if value != ''} for row in csv.DictReader(file)]
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Não foi possível ler {path}: {exc}')
+
+    def _report(self, errors):
+        # Erros do lote inteiro vêm num dicionário; os das linhas, numa lista
+        rows = enumerate(errors, start=1) if isinstance(errors, list) else [(None, errors)]
+        for line, row_errors in rows:
+            for field, messages in row_errors.items():
+                prefix = f'Linha {line}: ' if line else ''
+                self.stderr.write(f'{prefix}{field}: {" ".join(str(m) for m in messages)}')
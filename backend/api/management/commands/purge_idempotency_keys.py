@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = 'Remove as chaves de idempotência expiradas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        removed = IdempotencyKey.purge_expired(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{removed} chaves expiradas removidas.'))
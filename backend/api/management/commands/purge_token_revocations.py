@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.models import TokenRevocation
+
+
+class Command(BaseCommand):
+    help = 'Remove as revogações de token que já não afetam nenhum token válido'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        removed = TokenRevocation.purge_expired(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{removed} revogações expiradas removidas.'))
@@ -0,0 +1,54 @@
+import os
+import signal
+import socket
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.models import IdempotencyKey
+from api.taskqueue import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Consome a fila de tarefas em segundo plano'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--sleep', type=float, default=1.0,
+                            help='Espera em segundos quando a fila está vazia')
+        parser.add_argument('--housekeeping-interval', type=float, default=300.0,
+                            help='Intervalo em segundos entre limpezas de registros expirados')
+        parser.add_argument('--once', action='store_true',
+                            help='Processa as tarefas vencidas e encerra')
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        next_housekeeping = 0
+        while not self._stopping:
+            if time.monotonic() >= next_housekeeping:
+                self._housekeeping(backend)
+                next_housekeeping = time.monotonic() + options['housekeeping_interval']
+
+            batch = backend.claim(worker_id, batch_size=options['batch_size'])
+            for task_row in batch:
+                backend.execute(task_row)
+
+            if options['once'] and not batch:
+                break
+            if not batch:
+                time.sleep(options['sleep'])
+
+    def _housekeeping(self, backend):
+        IdempotencyKey.purge_expired()
+        backend.purge_finished(getattr(settings, 'TASK_RETENTION', timedelta(days=7)))
+
+    def _stop(self, signum, frame):
+        self.stdout.write('Encerrando worker após o lote atual...')
+        self._stopping = True
@@ -0,0 +1,31 @@
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.reminders import dispatch_due
+
+
+class Command(BaseCommand):
+    help = 'Envia os lembretes de agendamento vencidos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--loop', action='store_true',
+                            help='Continua aguardando novos lembretes em vez de encerrar')
+        parser.add_argument('--sleep', type=float, default=5.0,
+                            help='Espera em segundos quando não há lembretes vencidos')
+
+    def handle(self, *args, **options):
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        total = 0
+        while True:
+            processed = dispatch_due(worker_id, batch_size=options['batch_size'])
+            total += processed
+            if processed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f'{total} lembretes processados.'))
@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.maintenance import SWEEP_OUTCOMES, sweep_stale_appointments
+
+from ._durations import parse_age
+
+
+class Command(BaseCommand):
+    help = 'Encerra agendamentos reservados que já passaram (não compareceu ou concluído)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', default=None,
+                            help="Idade mínima após o término, ex.: '2h', '1d' (padrão: APPOINTMENT_SWEEP_AFTER)")
+        parser.add_argument('--policy', choices=SWEEP_OUTCOMES, default=None,
+                            help='Resultado registrado (padrão: APPOINTMENT_SWEEP_POLICY)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        older_than = (
+            parse_age(options['older_than']) if options['older_than']
+            else getattr(settings, 'APPOINTMENT_SWEEP_AFTER', timedelta(hours=2))
+        )
+        policy = options['policy'] or getattr(settings, 'APPOINTMENT_SWEEP_POLICY', 'no_show')
+
+        swept = sweep_stale_appointments(older_than, policy, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{swept} agendamentos marcados como "{policy}".'))
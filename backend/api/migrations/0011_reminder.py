@@ -0,0 +1,52 @@
+# Generated by Django 5.2.2 on 2026-10-19 17:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+from datetime import timedelta
+
+
+def schedule_existing_reminders(apps, schema_editor):
+    """Cria lembretes para os agendamentos reservados que ainda vão acontecer"""
+    Appointment = apps.get_model('api', 'Appointment')
+    Reminder = apps.get_model('api', 'Reminder')
+    now = timezone.now()
+    lead_time = getattr(settings, 'REMINDER_LEAD_TIME', timedelta(hours=24))
+    upcoming = Appointment.objects.filter(status='reserved', start_time__gt=now)
+    Reminder.objects.bulk_create(
+        [
+            Reminder(appointment_id=pk, due_at=max(start_time - lead_time, now))
+            for pk, start_time in upcoming.values_list('pk', 'start_time').iterator()
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_task'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Reminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_at', models.DateTimeField(verbose_name='Enviar em')),
+                ('status', models.CharField(choices=[('pending', 'Pendente'), ('sending', 'Enviando'), ('sent', 'Enviado'), ('cancelled', 'Cancelado')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('claimed_by', models.CharField(blank=True, max_length=64)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('appointment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='reminder', to='api.appointment')),
+            ],
+            options={
+                'verbose_name': 'Lembrete',
+                'verbose_name_plural': 'Lembretes',
+                'indexes': [models.Index(fields=['status', 'due_at'], name='reminder_due_idx')],
+            },
+        ),
+        migrations.RunPython(schedule_existing_reminders, migrations.RunPython.noop),
+    ]
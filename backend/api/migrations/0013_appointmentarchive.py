@@ -0,0 +1,38 @@
+# Generated by Django 5.2.2 on 2026-10-19 17:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_appointment_no_show_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppointmentArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('start_time', models.DateTimeField(verbose_name='Data/Hora de Início')),
+                ('end_time', models.DateTimeField(verbose_name='Data/Hora de Término')),
+                ('client_name', models.CharField(max_length=100, verbose_name='Nome do Cliente')),
+                ('client_contact', models.CharField(max_length=100, verbose_name='Contato do Cliente')),
+                ('status', models.CharField(choices=[('reserved', 'Reservado'), ('cancelled', 'Cancelado'), ('completed', 'Concluído'), ('no_show', 'Não compareceu')], max_length=10, verbose_name='Status')),
+                ('notes', models.TextField(blank=True, null=True, verbose_name='Observações')),
+                ('version', models.PositiveIntegerField(verbose_name='Versão')),
+                ('created_at', models.DateTimeField(verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(verbose_name='Atualizado em')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Arquivado em')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_appointments', to=settings.AUTH_USER_MODEL, verbose_name='Funcionário')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_appointments', to='api.service', verbose_name='Serviço')),
+            ],
+            options={
+                'verbose_name': 'Agendamento arquivado',
+                'verbose_name_plural': 'Agendamentos arquivados',
+                'indexes': [models.Index(fields=['start_time', 'id'], name='archive_start_idx'), models.Index(fields=['employee', 'start_time'], name='archive_employee_start_idx')],
+            },
+        ),
+    ]
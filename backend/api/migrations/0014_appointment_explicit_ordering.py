@@ -0,0 +1,25 @@
+# Generated by Django 5.2.2 on 2026-10-19 17:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_appointmentarchive'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='appointment',
+            options={'verbose_name': 'Agendamento', 'verbose_name_plural': 'Agendamentos'},
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['start_time', 'id'], name='appointment_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['employee', 'status', 'start_time'], name='appointment_conflict_idx'),
+        ),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.2 on 2026-10-19 17:49
+
+import api.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def assign_default_branch(apps, schema_editor):
+    """
+    Instalações existentes viram uma única filial: serviços, equipe e
+    agendamentos passam a pertencer a ela; administradores continuam sem
+    filial (acesso a todas).
+    """
+    Branch = apps.get_model('api', 'Branch')
+    User = apps.get_model('api', 'User')
+    models_ = [apps.get_model('api', name) for name in ('Service', 'Appointment', 'AppointmentArchive')]
+    staff = User.objects.exclude(role='ADMIN').filter(is_superuser=False)
+    if not staff.exists() and not any(model.objects.exists() for model in models_):
+        return
+    branch = Branch.objects.create(name='Principal')
+    staff.update(branch=branch)
+    for model in models_:
+        model.objects.update(branch=branch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_user_username_lower_uniq'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Branch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Nome')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Ativa')),
+            ],
+            options={
+                'verbose_name': 'Filial',
+                'verbose_name_plural': 'Filiais',
+            },
+        ),
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', api.models.UserManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='appointmenttombstone',
+            name='branch_id',
+            field=models.BigIntegerField(null=True, verbose_name='Filial'),
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='branch',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='appointments', to='api.branch', verbose_name='Filial'),
+        ),
+        migrations.AddField(
+            model_name='appointmentarchive',
+            name='branch',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='archived_appointments', to='api.branch', verbose_name='Filial'),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='branch',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='services', to='api.branch', verbose_name='Filial'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='branch',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='users', to='api.branch', verbose_name='Filial'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['branch', 'start_time', 'id'], name='appointment_branch_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['branch', 'updated_at', 'id'], name='appointment_branch_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointmentarchive',
+            index=models.Index(fields=['branch', 'start_time', 'id'], name='archive_branch_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['branch', 'name'], name='service_branch_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['branch', 'role'], name='user_branch_role_idx'),
+        ),
+        migrations.RunPython(assign_default_branch, migrations.RunPython.noop),
+    ]
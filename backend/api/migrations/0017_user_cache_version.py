@@ -0,0 +1,19 @@
+# Generated by Django 5.2.2 on 2026-10-19 18:04
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_branch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='cache_version',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, verbose_name='Versão do cache'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.2 on 2026-10-19 18:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_user_cache_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['employee', 'start_time'], name='appointment_employee_start_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.2 on 2026-10-19 18:39
+
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def backfill_sync_versions(apps, schema_editor):
+    """
+    Linhas existentes recebem versões distintas abaixo de qualquer escrita
+    futura: versão atual do contador + id, e o contador avança além delas.
+    A ordem entre elas não importa: os tokens antigos deixam de valer e os
+    clientes refazem a sincronização inicial.
+    """
+    Appointment = apps.get_model('api', 'Appointment')
+    AppointmentTombstone = apps.get_model('api', 'AppointmentTombstone')
+    TableVersion = apps.get_model('api', 'TableVersion')
+
+    counter, _ = TableVersion.objects.get_or_create(name='api.appointment')
+    offset = counter.version
+    last_id = 0
+    for model in (Appointment, AppointmentTombstone):
+        model.objects.update(sync_version=F('id') + offset)
+        last_id = max(last_id, model.objects.aggregate(last=Max('id'))['last'] or 0)
+    counter.version = offset + last_id
+    counter.save(update_fields=['version'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_service_name_unique_per_branch'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='appointment',
+            name='appointment_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='appointment',
+            name='appointment_branch_updated_idx',
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='sync_version',
+            field=models.PositiveBigIntegerField(default=0, editable=False, verbose_name='Versão de sincronização'),
+        ),
+        migrations.AddField(
+            model_name='appointmenttombstone',
+            name='sync_version',
+            field=models.PositiveBigIntegerField(db_index=True, default=0, verbose_name='Versão de sincronização'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['sync_version', 'id'], name='appointment_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['branch', 'sync_version', 'id'], name='appointment_branch_sync_idx'),
+        ),
+        migrations.RunPython(backfill_sync_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,192 @@
+# api/mixins
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.http import StreamingHttpResponse
+from django.utils.http import parse_etags
+from rest_framework import serializers, status
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from .fastserializers import CompiledSerializer, NotCompilable
+from .models import TableVersion
+from .renderers import StreamingJSONRenderer
+from .routers import is_pinned_to_primary, pin_to_primary, reset_replica_reads, set_replica_reads
+from .queries import branch_filter, related_fields, serializer_columns
+
+
+def etag_matches(if_none_match, etag):
+    """Compara If-None-Match com o ETag atual (comparação fraca, como pede o RFC 9110)"""
+    if not if_none_match:
+        return False
+    client_etags = [tag.removeprefix('W/') for tag in parse_etags(if_none_match)]
+    return '*' in client_etags or etag in client_etags
+
+
+class ConditionalGetMixin:
+    """
+    Adiciona ETag às ações list/retrieve e responde 304 quando o cliente envia
+    If-None-Match com o mesmo valor.
+
+    O ETag é calculado antes da consulta principal, a partir do contador de
+    versão das tabelas em `etag_models` (por padrão, o modelo do serializer),
+    do usuário e da URL completa. Qualquer escrita nessas tabelas invalida o
+    ETag de todas as listas e detalhes que dependem delas. Respostas que
+    também mudam com o passar do tempo acrescentam partes em get_etag_parts.
+    """
+    etag_models = None
+
+    def get_etag_models(self):
+        if self.etag_models is not None:
+            return self.etag_models
+        return (self.get_serializer_class().Meta.model,)
+
+    def get_etag_parts(self, request):
+        return ()
+
+    def get_etag(self, request):
+        versions = TableVersion.current(*self.get_etag_models())
+        user = request.user
+        key = '|'.join(str(part) for part in (
+            user.pk, user.is_staff, getattr(user, 'role', ''),
+            request.accepted_renderer.format, request.get_full_path(), *versions,
+            *self.get_etag_parts(request)
+        ))
+        return '"%s"' % hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()
+
+    def _conditional_response(self, handler, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        if etag_matches(request.headers.get('If-None-Match'), etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional_response(super().retrieve, request, *args, **kwargs)
+
+
+class ReplicaReadMixin:
+    """
+    Leituras das ações em `replica_actions` vão para uma réplica (ver
+    api.routers.PrimaryReplicaRouter); todo o resto fica no primário.
+
+    Qualquer escrita bem-sucedida fixa o usuário no primário por
+    REPLICA_STICKY_SECONDS, para que a leitura seguinte (a lista logo depois
+    de um create/cancel) não venha de uma réplica atrasada. A autenticação
+    e o corpo de respostas em streaming, lido depois do dispatch, usam o
+    primário.
+    """
+    replica_actions = ()
+
+    def dispatch(self, request, *args, **kwargs):
+        token = set_replica_reads(False)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            reset_replica_reads(token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (request.method in SAFE_METHODS and self.action in self.replica_actions
+                and not is_pinned_to_primary(request.user.pk)):
+            set_replica_reads(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        user = getattr(request, 'user', None)
+        if request.method not in SAFE_METHODS and response.status_code < 400 and user and user.is_authenticated:
+            pin_to_primary(user.pk)
+        return response
+
+
+class BranchScopedMixin:
+    """
+    Restringe o queryset da view à filial do usuário (BranchQuerySet.for_user);
+    usuários sem filial podem escolher uma com ?branch=. Aplicado em
+    filter_queryset, vale para a listagem e para get_object().
+    """
+
+    def filter_queryset(self, queryset):
+        try:
+            branch = branch_filter(self.request.query_params)
+        except ValidationError as exc:
+            raise serializers.ValidationError(exc.message_dict)
+        return super().filter_queryset(queryset.for_user(self.request.user, **branch))
+
+
+class FieldSelectionMixin:
+    """
+    Com ?fields= ou ?omit= (ver SparseFieldsMixin), carrega em list/retrieve
+    apenas as colunas e relações que o serializer vai representar.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        params = self.request.query_params
+        if self.action not in ('list', 'retrieve') or not (params.get('fields') or params.get('omit')):
+            return queryset
+
+        serializer = self.get_serializer()
+        related = related_fields(serializer)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*serializer_columns(serializer))
+
+
+class FastListMixin:
+    """
+    Com `fast_list = True`, a listagem é gerada por CompiledSerializer a partir
+    de values_list(), com saída idêntica à do serializer da view. Se o
+    serializer não puder ser compilado (ou houver paginação), usa o caminho
+    normal do DRF.
+
+    Com `stream_list = True`, a view passa a aceitar ?format=json-stream: o
+    array é enviado em blocos enquanto o queryset é lido com iterator(), de
+    modo que o primeiro byte e o pico de memória não dependem do tamanho da
+    lista. Um erro no meio da leitura deixa o JSON truncado, pois o status
+    200 já foi enviado.
+    """
+    fast_list = False
+    stream_list = False
+    stream_chunk_size = 500
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if self.stream_list:
+            renderers.append(StreamingJSONRenderer())
+        return renderers
+
+    def list(self, request, *args, **kwargs):
+        streaming = isinstance(request.accepted_renderer, StreamingJSONRenderer)
+        if not (self.fast_list or streaming) or self.paginator is not None:
+            return super().list(request, *args, **kwargs)
+
+        serializer = self.get_serializer()
+        try:
+            compiled = CompiledSerializer(serializer) if self.fast_list else None
+        except NotCompilable:
+            compiled = None
+        queryset = self.filter_queryset(self.get_queryset())
+
+        if not streaming:
+            if compiled is None:
+                return super().list(request, *args, **kwargs)
+            return Response(compiled.data(queryset))
+
+        if compiled is not None:
+            rows = compiled.iter_data(queryset, chunk_size=self.stream_chunk_size)
+        else:
+            rows = (
+                serializer.to_representation(obj)
+                for obj in queryset.iterator(chunk_size=self.stream_chunk_size)
+            )
+        return StreamingHttpResponse(
+            request.accepted_renderer.stream(rows, chunk_size=self.stream_chunk_size),
+            content_type=request.accepted_renderer.media_type
+        )
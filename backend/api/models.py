@@ -1,12 +1,75 @@
 # api/models
-from django.db import models
-from django.db.models import Q
-from django.contrib.auth.models import AbstractUser
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Lower
+from django.contrib.auth.models import AbstractUser, UserManager as DjangoUserManager
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 from datetime import timedelta
 from decimal import Decimal
+import uuid
+
+
+class StaleAppointmentError(Exception):
+    """O agendamento foi alterado por outra requisição desde que foi carregado"""
+
+
+class Branch(models.Model):
+    """Filial do salão: serviços, equipe e agendamentos pertencem a uma filial"""
+    name = models.CharField('Nome', max_length=100, unique=True)
+    is_active = models.BooleanField('Ativa', default=True)
+
+    class Meta:
+        verbose_name = 'Filial'
+        verbose_name_plural = 'Filiais'
+
+    def __str__(self):
+        return self.name
+
+
+class BranchQuerySet(models.QuerySet):
+    """
+    Particionamento por filial. Os modelos particionados têm índices que
+    começam por branch_id, então uma consulta restrita a uma filial só
+    percorre as linhas dela.
+    """
+
+    def for_branch(self, branch):
+        """Linhas de uma filial; None não restringe"""
+        if branch is None:
+            return self
+        return self.filter(branch=branch)
+
+    def for_user(self, user, branch=None):
+        """
+        Linhas visíveis para `user`: usuários de uma filial só enxergam a
+        própria; administradores sem filial (administração central) enxergam
+        todas, ou apenas `branch` quando informada. Os demais usuários sem
+        filial só enxergam as linhas sem filial.
+        """
+        if getattr(user, 'is_central_admin', False):
+            return self.for_branch(branch)
+        return self.filter(branch_id=getattr(user, 'branch_id', None)).for_branch(branch)
+
+
+class UserManager(DjangoUserManager.from_queryset(BranchQuerySet)):
+    pass
+
+
+# Os índices compostos começando por branch já atendem às buscas pela FK,
+# então as FKs de filial não criam um índice próprio (db_index=False)
+def branch_field(related_name):
+    return models.ForeignKey(
+        Branch,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        db_index=False,
+        related_name=related_name,
+        verbose_name='Filial'
+    )
 
 
 class User(AbstractUser):
@@ -22,6 +85,18 @@ class User(AbstractUser):
     )
     phone = models.CharField(max_length=20, blank=True)
     is_staff = models.BooleanField(default=False)
+    # Administrador sem filial: administração central, com acesso a todas as
+    # filiais (is_central_admin); os demais sem filial só veem linhas sem filial
+    branch = branch_field('users')
+    # Carimbo das entradas de cache do usuário (api/usercache.py), trocado a
+    # cada save(). Aleatório em vez de incremental: dois saves concorrentes
+    # a partir da mesma versão nunca produzem o mesmo carimbo.
+    cache_version = models.UUIDField('Versão do cache', default=uuid.uuid4, editable=False)
+
+    objects = UserManager()
+
+    # Gravações que não mudam nada do que é guardado em cache (login)
+    CACHE_NEUTRAL_FIELDS = {'last_login'}
 
     def save(self, *args, **kwargs):
         """Garante que admins sejam staff e username seja minúsculo"""
@@ -29,14 +104,34 @@ class User(AbstractUser):
             self.username = self.username.lower()
         if self.role == self.Role.ADMIN:
             self.is_staff = True
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self.cache_version = uuid.uuid4()
+        elif not set(update_fields) <= self.CACHE_NEUTRAL_FIELDS:
+            self.cache_version = uuid.uuid4()
+            kwargs['update_fields'] = {*update_fields, 'cache_version'}
         super().save(*args, **kwargs)
 
     def delete(self, *args, **kwargs):
         super().delete(*args, **kwargs)
 
+    @property
+    def is_central_admin(self):
+        """Administrador sem filial: o único com acesso a todas as filiais"""
+        return self.is_staff and self.branch_id is None
+
     class Meta:
         verbose_name = 'Usuário'
         verbose_name_plural = 'Usuários'
+        constraints = [
+            # save() já grava em minúsculas; o índice funcional garante a unicidade
+            # sem distinção de maiúsculas também para bulk_create()/update()
+            models.UniqueConstraint(Lower('username'), name='user_username_lower_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['branch', 'role'], name='user_branch_role_idx'),
+        ]
 
 
 class Administrator(User):
@@ -88,7 +183,7 @@ class Professional(User):
 
 
 class Service(models.Model):
-    name = models.CharField(max_length=100, unique=True)
+    name = models.CharField(max_length=100)
     duration = models.PositiveIntegerField(
         validators=[
             MinValueValidator(1),
@@ -105,6 +200,19 @@ class Service(models.Model):
         ]
     )
     is_active = models.BooleanField(default=True)
+    branch = branch_field('services')
+
+    objects = BranchQuerySet.as_manager()
+
+    class Meta:
+        # Nome único dentro da filial (o índice único também atende às listagens
+        # por filial ordenadas por nome); sem filial, único entre os sem filial
+        constraints = [
+            models.UniqueConstraint(fields=['branch', 'name'], name='service_branch_name_uniq'),
+            models.UniqueConstraint(
+                fields=['name'], condition=Q(branch__isnull=True), name='service_no_branch_name_uniq'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -115,6 +223,7 @@ class Appointment(models.Model):
         RESERVED = 'reserved', 'Reservado'
         CANCELLED = 'cancelled', 'Cancelado'
         COMPLETED = 'completed', 'Concluído'
+        NO_SHOW = 'no_show', 'Não compareceu'
 
     service = models.ForeignKey(
         Service,
@@ -139,13 +248,30 @@ class Appointment(models.Model):
         default=Status.RESERVED
     )
     notes = models.TextField('Observações', blank=True, null=True)
+    version = models.PositiveIntegerField('Versão', default=1, editable=False)
     created_at = models.DateTimeField('Criado em', auto_now_add=True)
     updated_at = models.DateTimeField('Atualizado em', auto_now=True)
+    # Posição da última escrita na ordem de commit (TableVersion.next), usada pela sincronização
+    sync_version = models.PositiveBigIntegerField('Versão de sincronização', default=0, editable=False)
+    # Filial do funcionário, copiada em clean()
+    branch = branch_field('appointments')
+
+    objects = BranchQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Agendamento'
         verbose_name_plural = 'Agendamentos'
-        ordering = ['start_time']
+        # Sem ordering padrão: cada consulta ordena explicitamente quando precisa,
+        # para que exists()/count()/subconsultas não paguem ORDER BY
+        indexes = [
+            models.Index(fields=['start_time', 'id'], name='appointment_start_idx'),
+            models.Index(fields=['employee', 'status', 'start_time'], name='appointment_conflict_idx'),
+            # Agenda diária do profissional (api/agenda.py), com todos os status
+            models.Index(fields=['employee', 'start_time'], name='appointment_employee_start_idx'),
+            models.Index(fields=['sync_version', 'id'], name='appointment_sync_idx'),
+            models.Index(fields=['branch', 'start_time', 'id'], name='appointment_branch_start_idx'),
+            models.Index(fields=['branch', 'sync_version', 'id'], name='appointment_branch_sync_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         """Salva o agendamento com validações apropriadas"""
@@ -156,8 +282,37 @@ class Appointment(models.Model):
         
         if not self.end_time:
             self.end_time = self.start_time + timedelta(minutes=self.service.duration)
-        
-        super().save(*args, **kwargs)
+
+        if self._state.adding:
+            self._save_with_sync_version(*args, **kwargs)
+            return
+
+        # Controle de concorrência otimista: ver _do_update
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'version', 'sync_version'}
+        self.version += 1
+        sync_version = self.__dict__.get('sync_version')
+        try:
+            self._save_with_sync_version(*args, **kwargs)
+        except StaleAppointmentError:
+            self.version -= 1
+            self.sync_version = sync_version
+            raise
+
+    def _save_with_sync_version(self, *args, **kwargs):
+        # A versão é tirada na mesma transação da escrita: ver TableVersion.next
+        with transaction.atomic():
+            self.sync_version = TableVersion.next(Appointment)
+            super().save(*args, **kwargs)
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        """UPDATE ... WHERE version = <versão carregada>; falha se outra escrita veio antes"""
+        filtered = base_qs.filter(version=self.version - 1)
+        updated = super()._do_update(filtered, using, pk_val, values, update_fields, forced_update)
+        if not updated and base_qs.filter(pk=pk_val).exists():
+            raise StaleAppointmentError(pk_val)
+        return updated
 
     def clean(self):
         """Validações completas do agendamento"""
@@ -174,6 +329,12 @@ class Appointment(models.Model):
 
         self.end_time = self.start_time + timedelta(minutes=self.service.duration)
 
+        self.branch_id = self.employee.branch_id
+        # Serviços sem filial não aparecem para a equipe das filiais (BranchQuerySet.for_branch),
+        # então também não podem ser agendados por ela
+        if self.service.branch_id != self.branch_id:
+            raise ValidationError({'service': 'O serviço não é oferecido na filial do funcionário.'})
+
         if self.status == self.Status.RESERVED:
             self._validate_reserved_appointment()
         elif self.status == self.Status.COMPLETED:
@@ -239,4 +400,223 @@ class Appointment(models.Model):
         self.save()
 
     def __str__(self):
-        return f"{self.client_name} - {self.service.name} ({self.start_time.strftime('%d/%m/%Y %H:%M')})"
\ No newline at end of file
+        return f"{self.client_name} - {self.service.name} ({self.start_time.strftime('%d/%m/%Y %H:%M')})"
+
+
+class AppointmentTombstone(models.Model):
+    """Registro de agendamentos excluídos, usado pela sincronização incremental"""
+    appointment_id = models.BigIntegerField('Agendamento')
+    employee_id = models.BigIntegerField('Funcionário')
+    branch_id = models.BigIntegerField('Filial', null=True)
+    deleted_at = models.DateTimeField('Excluído em', auto_now_add=True)
+    # Mesma sequência de Appointment.sync_version, tirada na transação da exclusão
+    sync_version = models.PositiveBigIntegerField('Versão de sincronização', default=0, db_index=True)
+
+    class Meta:
+        verbose_name = 'Agendamento excluído'
+        verbose_name_plural = 'Agendamentos excluídos'
+
+
+class TableVersion(models.Model):
+    """Contador de versão por tabela, incrementado a cada escrita (usado nos ETags)"""
+    name = models.CharField(max_length=100, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Versão de tabela'
+        verbose_name_plural = 'Versões de tabelas'
+
+    @classmethod
+    def bump(cls, *models_, by=1):
+        for model in models_:
+            label = model._meta.label_lower
+            if not cls.objects.filter(name=label).update(version=F('version') + by):
+                cls.objects.get_or_create(name=label, defaults={'version': by})
+
+    @classmethod
+    def next(cls, model, count=1):
+        """
+        Incrementa e retorna a versão da tabela de `model`. Dentro de uma
+        transação, o UPDATE mantém a linha do contador travada até o commit:
+        quem pede a versão seguinte espera, então as versões ficam na ordem
+        de commit (um leitor nunca vê a versão N+1 antes de a N ter sido
+        gravada). Por isso a sincronização usa essa versão, e não um horário.
+
+        Com `count`, reserva as `count` versões seguintes e retorna a última.
+        """
+        cls.bump(model, by=count)
+        return cls.objects.get(name=model._meta.label_lower).version
+
+    @classmethod
+    def current(cls, *models_):
+        """Retorna as versões atuais na ordem dos modelos informados (uma consulta)"""
+        labels = [model._meta.label_lower for model in models_]
+        versions = dict(cls.objects.filter(name__in=labels).values_list('name', 'version'))
+        return [versions.get(label, 0) for label in labels]
+
+
+class IdempotencyKey(models.Model):
+    """Resposta armazenada de uma requisição enviada com o cabeçalho Idempotency-Key"""
+    key = models.CharField(max_length=255)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    # Nulo enquanto a requisição original ainda está em processamento
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response_body = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    # Fim do prazo da requisição em processamento (ver IDEMPOTENCY_KEY_LEASE)
+    locked_until = models.DateTimeField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = 'Chave de idempotência'
+        verbose_name_plural = 'Chaves de idempotência'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_key_per_user'),
+        ]
+
+    @classmethod
+    def purge_expired(cls, batch_size=1000):
+        """Remove chaves expiradas em lotes; retorna quantas foram removidas"""
+        total = 0
+        while True:
+            ids = list(
+                cls.objects.filter(expires_at__lte=timezone.now())
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                return total
+            total += cls.objects.filter(pk__in=ids).delete()[0]
+
+
+class TokenRevocation(models.Model):
+    """
+    Revogação de refresh tokens (api/tokens.py): um jti (logout) ou todos os
+    tokens de um usuário emitidos antes de revoked_at. Fonte durável da lista
+    de revogação que fica no cache.
+    """
+    jti = models.CharField(max_length=255, blank=True)
+    # Sem chave estrangeira: a revogação precisa sobreviver à exclusão do usuário
+    user_id = models.BigIntegerField(null=True)
+    revoked_at = models.DateTimeField()
+    # Depois disso nenhum token afetado ainda é válido
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = 'Revogação de token'
+        verbose_name_plural = 'Revogações de token'
+
+    @classmethod
+    def purge_expired(cls, batch_size=1000):
+        """Remove revogações expiradas em lotes; retorna quantas foram removidas"""
+        total = 0
+        while True:
+            ids = list(
+                cls.objects.filter(expires_at__lte=timezone.now())
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                return total
+            total += cls.objects.filter(pk__in=ids).delete()[0]
+
+
+class Task(models.Model):
+    """Tarefa de segundo plano executada por `manage.py run_worker`"""
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pendente'
+        RUNNING = 'running', 'Em execução'
+        DONE = 'done', 'Concluída'
+        FAILED = 'failed', 'Falhou'
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=64, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Tarefa'
+        verbose_name_plural = 'Tarefas'
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='task_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.get_status_display()})"
+
+
+class Reminder(models.Model):
+    """Lembrete de agendamento a ser enviado em `due_at` (ver api/reminders.py)"""
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pendente'
+        SENDING = 'sending', 'Enviando'
+        SENT = 'sent', 'Enviado'
+        CANCELLED = 'cancelled', 'Cancelado'
+
+    appointment = models.OneToOneField(
+        Appointment,
+        on_delete=models.CASCADE,
+        related_name='reminder'
+    )
+    due_at = models.DateTimeField('Enviar em')
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    claimed_by = models.CharField(max_length=64, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Lembrete'
+        verbose_name_plural = 'Lembretes'
+        indexes = [
+            models.Index(fields=['status', 'due_at'], name='reminder_due_idx'),
+        ]
+
+
+class AppointmentArchive(models.Model):
+    """
+    Agendamentos encerrados movidos da tabela principal por
+    `manage.py archive_appointments`. Mantém o id original.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    service = models.ForeignKey(
+        Service,
+        on_delete=models.PROTECT,
+        related_name='archived_appointments',
+        verbose_name='Serviço'
+    )
+    employee = models.ForeignKey(
+        User,
+        on_delete=models.PROTECT,
+        related_name='archived_appointments',
+        verbose_name='Funcionário'
+    )
+    start_time = models.DateTimeField('Data/Hora de Início')
+    end_time = models.DateTimeField('Data/Hora de Término')
+    client_name = models.CharField('Nome do Cliente', max_length=100)
+    client_contact = models.CharField('Contato do Cliente', max_length=100)
+    status = models.CharField('Status', max_length=10, choices=Appointment.Status.choices)
+    notes = models.TextField('Observações', blank=True, null=True)
+    version = models.PositiveIntegerField('Versão')
+    created_at = models.DateTimeField('Criado em')
+    updated_at = models.DateTimeField('Atualizado em')
+    branch = branch_field('archived_appointments')
+    archived_at = models.DateTimeField('Arquivado em', auto_now_add=True)
+
+    objects = BranchQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Agendamento arquivado'
+        verbose_name_plural = 'Agendamentos arquivados'
+        indexes = [
+            models.Index(fields=['start_time', 'id'], name='archive_start_idx'),
+            models.Index(fields=['employee', 'start_time'], name='archive_employee_start_idx'),
+            models.Index(fields=['branch', 'start_time', 'id'], name='archive_branch_start_idx'),
+        ]
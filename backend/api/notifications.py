@@ -0,0 +1,56 @@
+# api/notifications
+import json
+import logging
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class BaseTransport:
+    """Canal de envio de mensagens aos clientes (SMS, WhatsApp, e-mail...)"""
+
+    def send(self, recipient, message):
+        raise NotImplementedError
+
+    def send_many(self, messages):
+        """Envia uma lista de (destinatário, mensagem); transportes podem agrupar"""
+        for recipient, message in messages:
+            self.send(recipient, message)
+
+
+class ConsoleTransport(BaseTransport):
+    """Substituto local: apenas registra as mensagens no log"""
+
+    def send(self, recipient, message):
+        logger.info('Mensagem para %s: %s', recipient, message)
+
+
+class FileTransport(BaseTransport):
+    """Substituto local: grava uma linha JSON por mensagem em NOTIFICATION_FILE_PATH"""
+
+    def __init__(self):
+        self.path = settings.NOTIFICATION_FILE_PATH
+        self._lock = threading.Lock()
+
+    def send(self, recipient, message):
+        self.send_many([(recipient, message)])
+
+    def send_many(self, messages):
+        sent_at = timezone.now().isoformat()
+        lines = ''.join(
+            json.dumps({'to': recipient, 'message': message, 'sent_at': sent_at}, ensure_ascii=False) + '\n'
+            for recipient, message in messages
+        )
+        with self._lock, open(self.path, 'a', encoding='utf-8') as output:
+            output.write(lines)
+
+
+@lru_cache(maxsize=None)
+def get_transport():
+    path = getattr(settings, 'NOTIFICATION_TRANSPORT', 'api.notifications.ConsoleTransport')
+    return import_string(path)()
@@ -0,0 +1,48 @@
+# api/onboarding
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+
+# Abaixo disso, subir o pool (cada processo importa o Django) custa mais do
+# que calcular os hashes em série
+MIN_PARALLEL_PASSWORDS = 8
+
+
+def _setup_worker(settings_module, password_hashers):
+    # Com 'spawn' o processo começa sem o Django configurado
+    if not apps.ready:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+        django.setup()
+    # Os mesmos hashers do processo pai, mesmo sob override_settings
+    settings.PASSWORD_HASHERS = password_hashers
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    Calcula make_password() para cada senha, em paralelo entre os núcleos.
+    O hasher padrão é lento de propósito (centenas de milhares de iterações),
+    então em lotes grandes ele domina o tempo do cadastro.
+
+    Os processos são criados com 'spawn', nunca com fork: chamada dentro de
+    uma requisição, um fork copiaria o servidor (uvicorn, com várias threads)
+    e as conexões abertas com o banco.
+    """
+    passwords = list(passwords)
+    if workers is None:
+        workers = getattr(settings, 'PASSWORD_HASH_WORKERS', None) or os.cpu_count() or 1
+    workers = min(workers, len(passwords))
+    if workers <= 1 or len(passwords) < MIN_PARALLEL_PASSWORDS:
+        return [make_password(password) for password in passwords]
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_setup_worker,
+        initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'), list(settings.PASSWORD_HASHERS))
+    ) as pool:
+        return list(pool.map(make_password, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
@@ -0,0 +1,166 @@
+# api/queries
+from datetime import datetime, time, timedelta
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import serializers
+
+from .models import Appointment, User
+
+
+def appointment_visibility(user):
+    """Regra de visibilidade por papel: profissionais veem apenas os próprios agendamentos"""
+    if not user.is_staff and getattr(user, 'role', None) == User.Role.PROFESSIONAL:
+        return Q(employee=user)
+    return Q()
+
+
+def can_modify_appointment(user, appointment):
+    """Profissionais só alteram, cancelam ou concluem os próprios agendamentos"""
+    return user.is_staff or user.role != User.Role.PROFESSIONAL or appointment.employee_id == user.pk
+
+
+def next_reserved_start():
+    """
+    Início do próximo agendamento reservado (ou None). É o único instante em
+    que can_delete/can_edit de um serviço mudam sem nenhuma escrita: quando
+    ele passa, a reserva deixa de ser futura.
+    """
+    return (
+        Appointment.objects.filter(status=Appointment.Status.RESERVED, start_time__gt=timezone.now())
+        .order_by('start_time')
+        .values_list('start_time', flat=True)
+        .first()
+    )
+
+
+def branch_filter(params):
+    """
+    ?branch=<id> como argumento de BranchQuerySet.for_user. Só restringe
+    a administração central; os demais já estão limitados à própria filial.
+    """
+    branch = params.get('branch')
+    if not branch:
+        return {}
+    if not branch.isdigit():
+        raise ValidationError({'branch': 'Filial inválida'})
+    return {'branch': int(branch)}
+
+
+# Sem restrição de filial (administração central sem ?branch=)
+ALL_BRANCHES = object()
+
+
+def branch_scope(user, params):
+    """
+    Filial de `user` para filtros fora do ORM (feed, exclusões na
+    sincronização), com a regra de BranchQuerySet.for_user: None são as linhas
+    sem filial e ALL_BRANCHES não restringe. Lança ValidationError se ?branch=
+    for inválido.
+    """
+    if user.is_central_admin:
+        return branch_filter(params).get('branch', ALL_BRANCHES)
+    return user.branch_id
+
+
+def appointment_filters(params):
+    """
+    Converte os parâmetros de consulta (branch, status, start, end, search)
+    nos argumentos de visible_appointments. Lança ValidationError se inválidos.
+    """
+    filters = branch_filter(params)
+
+    status = params.get('status')
+    if status:
+        if status not in Appointment.Status.values:
+            raise ValidationError({'status': 'Status inválido'})
+        filters['status'] = status
+
+    for name in ('start', 'end'):
+        value = params.get(name)
+        if value:
+            try:
+                day = parse_date(value)
+            except ValueError:
+                day = None
+            if day is None:
+                raise ValidationError({name: 'Data inválida. Use o formato AAAA-MM-DD.'})
+            filters[name] = day
+
+    if params.get('search'):
+        filters['search'] = params['search']
+
+    return filters
+
+
+def visible_appointments(user, model=Appointment, branch=None, status=None, start=None, end=None, search=None,
+                         serializer=None):
+    """
+    Queryset único de agendamentos visíveis para `user`, usado pelas views,
+    pelo histórico (model=AppointmentArchive) e pelo admin. Aplica a filial
+    do usuário (ver BranchQuerySet.for_user) e a regra por papel.
+
+    `start`/`end` são datas locais inclusivas sobre start_time e usam o índice
+    (start_time, id). Com `serializer` (ações de leitura), carrega apenas as
+    colunas e relações que ele representa, via only() e select_related().
+    """
+    queryset = model.objects.for_user(user, branch).filter(appointment_visibility(user))
+
+    if status:
+        queryset = queryset.filter(status=status)
+    if start:
+        queryset = queryset.filter(start_time__gte=timezone.make_aware(datetime.combine(start, time.min)))
+    if end:
+        queryset = queryset.filter(
+            start_time__lt=timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min))
+        )
+    if search:
+        # Mesma semântica do SearchFilter: todos os termos, em qualquer campo
+        for term in search.split():
+            queryset = queryset.filter(Q(client_name__icontains=term) | Q(client_contact__icontains=term))
+
+    if serializer is None:
+        return queryset.select_related('service', 'employee')
+
+    related = related_fields(serializer)
+    if related:
+        queryset = queryset.select_related(*related)
+    return queryset.only(*serializer_columns(serializer))
+
+
+def _readable_fields(serializer):
+    return [
+        field for field in serializer.fields.values()
+        if not field.write_only and field.source != '*'
+    ]
+
+
+def related_fields(serializer, prefix=''):
+    """Relações representadas por serializers aninhados em `serializer`"""
+    related = []
+    for field in _readable_fields(serializer):
+        if isinstance(field, serializers.Serializer):
+            path = prefix + field.source
+            related += [path, *related_fields(field, path + '__')]
+    return tuple(related)
+
+
+def serializer_columns(serializer, prefix=''):
+    """Colunas do modelo lidas por `serializer`, incluindo as de relações aninhadas"""
+    model = serializer.Meta.model
+    columns = [prefix + model._meta.pk.name]
+    for field in _readable_fields(serializer):
+        source = field.source.split('.')[0]
+        if isinstance(field, serializers.Serializer):
+            columns.append(prefix + source)
+            columns += serializer_columns(field, prefix + source + '__')
+            continue
+        try:
+            model_field = model._meta.get_field(source)
+        except FieldDoesNotExist:
+            continue
+        if model_field.concrete:
+            columns.append(prefix + model_field.name)
+    return columns
@@ -0,0 +1,104 @@
+# api/reminders
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Appointment, Reminder
+from .notifications import get_transport
+
+
+def lead_time():
+    return getattr(settings, 'REMINDER_LEAD_TIME', timedelta(hours=24))
+
+
+def schedule_reminder(appointment):
+    """Cria ou reagenda o lembrete de um agendamento reservado"""
+    due_at = max(appointment.start_time - lead_time(), timezone.now())
+    Reminder.objects.update_or_create(
+        appointment=appointment,
+        defaults={'due_at': due_at, 'status': Reminder.Status.PENDING, 'attempts': 0}
+    )
+
+
+def cancel_reminder(appointment):
+    Reminder.objects.filter(
+        appointment=appointment, status=Reminder.Status.PENDING
+    ).update(status=Reminder.Status.CANCELLED)
+
+
+def reminder_message(appointment):
+    start_time = timezone.localtime(appointment.start_time)
+    return (
+        f"Olá, {appointment.client_name}! Lembrete do seu horário de "
+        f"{appointment.service.name} em {start_time.strftime('%d/%m/%Y às %H:%M')}."
+    )
+
+
+def claim_due(worker_id, batch_size=500, lock_timeout=timedelta(minutes=10)):
+    """
+    Reserva um lote de lembretes vencidos para este worker, usando o índice
+    (status, due_at). Em bancos com SKIP LOCKED, workers concorrentes pegam
+    lotes disjuntos sem esperar uns pelos outros; o UPDATE condicionado ao
+    status garante o mesmo nos demais.
+    """
+    now = timezone.now()
+
+    # Lotes de workers que morreram antes de confirmar o envio voltam à fila
+    Reminder.objects.filter(
+        status=Reminder.Status.SENDING, claimed_at__lt=now - lock_timeout
+    ).update(status=Reminder.Status.PENDING, claimed_by='')
+
+    with transaction.atomic():
+        due = Reminder.objects.filter(
+            status=Reminder.Status.PENDING, due_at__lte=now
+        ).order_by('due_at')
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due.values_list('pk', flat=True)[:batch_size])
+        Reminder.objects.filter(pk__in=ids, status=Reminder.Status.PENDING).update(
+            status=Reminder.Status.SENDING, claimed_by=worker_id, claimed_at=now
+        )
+
+    return list(
+        Reminder.objects.filter(pk__in=ids, claimed_by=worker_id, status=Reminder.Status.SENDING)
+        .select_related('appointment__service')
+    )
+
+
+def dispatch_due(worker_id, batch_size=500, transport=None):
+    """Envia um lote de lembretes vencidos; retorna quantos foram processados"""
+    transport = transport or get_transport()
+    reminders = claim_due(worker_id, batch_size=batch_size)
+    if not reminders:
+        return 0
+
+    to_send, stale = [], []
+    for reminder in reminders:
+        appointment = reminder.appointment
+        if appointment.status != Appointment.Status.RESERVED or appointment.start_time <= timezone.now():
+            stale.append(reminder.pk)
+        else:
+            to_send.append(reminder)
+
+    try:
+        transport.send_many(
+            [(r.appointment.client_contact, reminder_message(r.appointment)) for r in to_send]
+        )
+    except Exception:
+        Reminder.objects.filter(pk__in=[r.pk for r in to_send]).update(
+            status=Reminder.Status.PENDING,
+            claimed_by='',
+            attempts=F('attempts') + 1,
+            due_at=timezone.now() + timedelta(minutes=1)
+        )
+        raise
+    finally:
+        Reminder.objects.filter(pk__in=stale).update(status=Reminder.Status.CANCELLED)
+
+    Reminder.objects.filter(pk__in=[r.pk for r in to_send]).update(
+        status=Reminder.Status.SENT, sent_at=timezone.now()
+    )
+    return len(reminders)
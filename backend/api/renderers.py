@@ -0,0 +1,68 @@
+# api/renderers
+import json
+from itertools import islice
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # Dependência opcional: sem ela, ORJSONRenderer usa o json da stdlib
+    orjson = None
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Permite negociar text/event-stream; erros viram um evento 'error'"""
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        payload = json.dumps(data, cls=JSONEncoder, ensure_ascii=False)
+        return f'event: error\ndata: {payload}\n\n'.encode(self.charset)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer com orjson, produzindo a mesma saída compacta do renderer
+    padrão. Datetimes saem com o offset do fuso (ex.: -03:00 em
+    America/Sao_Paulo) e UTC como "Z"; Decimal e demais tipos não nativos
+    passam pelo JSONEncoder do DRF.
+
+    Cai no JSONRenderer quando o orjson não está instalado ou quando a saída
+    pedida não é a compacta em UTF-8 (indent, ASCII). Diferente do modo
+    estrito do DRF, NaN/Infinity são renderizados como null em vez de erro.
+    """
+    options = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is None or indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=self.encoder_class().default, option=self.options)
+        # Mesmo escape do JSONRenderer, para a saída continuar um subconjunto válido de JavaScript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class StreamingJSONRenderer(ORJSONRenderer):
+    """
+    Formato opt-in (?format=json-stream) para listagens grandes: a view
+    devolve um StreamingHttpResponse cujo corpo é gerado por `stream()`, um
+    array JSON emitido em blocos à medida que o iterator do queryset avança.
+    Fora das listagens (detalhe, erros), renderiza como ORJSONRenderer.
+    """
+    format = 'json-stream'
+
+    def stream(self, rows, chunk_size=500):
+        rows = iter(rows)
+        yield b'['
+        separator = b''
+        while chunk := list(islice(rows, chunk_size)):
+            yield separator + self.render(chunk)[1:-1]
+            separator = b','
+        yield b']'
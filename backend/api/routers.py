@@ -0,0 +1,72 @@
+# api/routers
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Ativado pelas views (ReplicaReadMixin) só durante leituras seguras
+_replica_reads = ContextVar('replica_reads', default=False)
+
+PINNED_KEY = 'db:primary-until:{user_id}'
+
+
+def replica_reads_enabled():
+    return _replica_reads.get()
+
+
+def set_replica_reads(enabled):
+    """Liga/desliga as leituras em réplica no contexto atual; devolve o token para reset"""
+    return _replica_reads.set(enabled)
+
+
+def reset_replica_reads(token):
+    _replica_reads.reset(token)
+
+
+@contextmanager
+def replica_reads():
+    """Encaminha as leituras deste bloco para uma réplica, se houver"""
+    token = set_replica_reads(True)
+    try:
+        yield
+    finally:
+        reset_replica_reads(token)
+
+
+def pin_to_primary(user_id):
+    """
+    Depois de uma escrita, as leituras do usuário ficam no primário por
+    REPLICA_STICKY_SECONDS, tempo maior que o atraso típico da replicação:
+    quem acabou de criar ou cancelar um agendamento vê a própria alteração.
+    """
+    seconds = getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+    cache.set(PINNED_KEY.format(user_id=user_id), time.time() + seconds, timeout=seconds)
+
+
+def is_pinned_to_primary(user_id):
+    until = cache.get(PINNED_KEY.format(user_id=user_id))
+    return until is not None and until > time.time()
+
+
+class PrimaryReplicaRouter:
+    """
+    Escritas sempre no 'default'; leituras numa das DATABASE_REPLICAS apenas
+    dentro de replica_reads(). Sem réplicas configuradas, tudo vai para o
+    'default'.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', ())
+        if replicas and _replica_reads.get():
+            return random.choice(replicas)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primário e réplicas têm os mesmos dados
+        return True
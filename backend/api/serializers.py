@@ -1,19 +1,126 @@
 # api/serializers
+from collections.abc import Mapping
+
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.validators import UniqueValidator
-from django.db import transaction
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
 from django.utils import timezone
-from .models import User, Service, Appointment
+from .models import User, Branch, Service, Appointment, AppointmentArchive, TableVersion
+from .onboarding import hash_passwords
+from .tokens import RevocableRefreshToken
 from datetime import timedelta  
 from django.core.exceptions import ValidationError
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
+USERNAME_TAKEN = 'Este nome de usuário já está em uso'
+
+
+def _field_paths(value):
+    """'id,service.name' -> [('id',), ('service', 'name')]"""
+    if not value:
+        return []
+    return [tuple(part.strip().split('.')) for part in value.split(',') if part.strip()]
+
+
+class SparseFieldsMixin:
+    """
+    Sparse fieldsets em leituras: ?fields=id,start_time,service.name devolve só
+    esses campos e ?omit=notes,employee remove campos. Campos aninhados usam
+    ponto. Como as views derivam only()/select_related() de `fields`, as
+    colunas e relações removidas também deixam de ser consultadas.
+    """
+
+    def _field_path(self):
+        path, node = [], self
+        while getattr(node, 'parent', None) is not None:
+            if node.field_name:
+                path.append(node.field_name)
+            node = node.parent
+        return tuple(reversed(path))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return fields
+
+        path = self._field_path()
+        depth = len(path)
+
+        selected = _field_paths(request.query_params.get('fields'))
+        below = [p[depth:] for p in selected if p[:depth] == path and len(p) > depth]
+        if below and path not in selected:
+            keep = {p[0] for p in below}
+            self._check_known(keep, fields, 'fields')
+            fields = {name: field for name, field in fields.items() if name in keep}
+
+        omitted = {p[depth] for p in _field_paths(request.query_params.get('omit'))
+                   if p[:depth] == path and len(p) == depth + 1}
+        if omitted:
+            self._check_known(omitted, fields, 'omit')
+            fields = {name: field for name, field in fields.items() if name not in omitted}
+
+        return fields
+
+    def _check_known(self, names, fields, param):
+        unknown = sorted(names - set(fields))
+        if unknown:
+            prefix = '.'.join(self._field_path())
+            unknown = [f'{prefix}.{name}' if prefix else name for name in unknown]
+            raise serializers.ValidationError({param: f'Campos desconhecidos: {", ".join(unknown)}'})
+
+
+class CurrentBranchDefault:
+    """
+    Filial do usuário da requisição. Para a administração central, a única
+    filial cadastrada, se houver só uma; senão None (validate_branch exige
+    a filial quando ela é obrigatória).
+    """
+    requires_context = True
+
+    def __call__(self, serializer_field):
+        request = serializer_field.context.get('request')
+        user = getattr(request, 'user', None)
+        if getattr(user, 'branch', None) is not None:
+            return user.branch
+        branches = list(Branch.objects.all()[:2])
+        return branches[0] if len(branches) == 1 else None
+
+
+class BranchFieldMixin(serializers.Serializer):
+    """
+    Campo `branch` gravável: por padrão, a filial de quem cadastra. Só a
+    administração central cadastra em outra filial; quando há filiais
+    cadastradas, registros que exigem filial (branch_required) não podem
+    ficar sem ela, pois só a administração central os enxergaria.
+    """
+    branch = serializers.PrimaryKeyRelatedField(
+        queryset=Branch.objects.all(),
+        allow_null=True,
+        default=CurrentBranchDefault()
+    )
+
+    def branch_required(self):
+        return True
+
+    def validate_branch(self, value):
+        request = self.context.get('request')
+        user = getattr(request, 'user', None)
+        if not getattr(user, 'is_central_admin', False) and getattr(value, 'pk', None) != getattr(user, 'branch_id', None):
+            raise serializers.ValidationError('Só é possível cadastrar na sua própria filial.')
+        if value is None and self.branch_required() and Branch.objects.exists():
+            raise serializers.ValidationError('Informe a filial.')
+        return value
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(SparseFieldsMixin, BranchFieldMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'first_name', 'last_name',
-                 'email', 'phone', 'role', 'is_staff', 'is_active']
+                 'email', 'phone', 'role', 'is_staff', 'is_active', 'branch']
         read_only_fields = ['is_staff', 'is_active']
         extra_kwargs = {
             'password': {
@@ -24,6 +131,15 @@ class UserSerializer(serializers.ModelSerializer):
                     'min_length': 'A senha deve ter pelo menos 6 caracteres.'
                 }
             },
+            'username': {
+                # Substitui os validadores do modelo: o formato é repetido aqui e a
+                # unicidade é uma consulta exata sobre o valor já em minúsculas
+                # (ver to_internal_value)
+                'validators': [
+                    UnicodeUsernameValidator(),
+                    UniqueValidator(queryset=User.objects.all(), message=USERNAME_TAKEN),
+                ]
+            },
             'email': {
                 'required': True,
                 'validators': [UniqueValidator(queryset=User.objects.all())]
@@ -32,6 +148,24 @@ class UserSerializer(serializers.ModelSerializer):
             'last_name': {'required': True}
         }
 
+    def branch_required(self):
+        # Administradores podem ficar sem filial (administração central). O
+        # papel fixado pela view (contexto) prevalece sobre o enviado
+        role = self.context.get('role')
+        if role is None and isinstance(getattr(self, 'initial_data', None), Mapping):
+            role = self.initial_data.get('role')
+        if role is None:
+            role = getattr(self.instance, 'role', User.Role.EMPLOYEE)
+        return role != User.Role.ADMIN
+
+    def to_internal_value(self, data):
+        # User.save grava o username em minúsculas; normalizar antes da validação
+        # permite checar a unicidade com uma única consulta exata no índice
+        if isinstance(data, Mapping) and isinstance(data.get('username'), str):
+            data = data.copy()
+            data['username'] = data['username'].lower()
+        return super().to_internal_value(data)
+
     def validate(self, data):
         errors = {}
 
@@ -54,7 +188,7 @@ class UserSerializer(serializers.ModelSerializer):
         user = User(**validated_data)
         if password:
             user.set_password(password)
-        user.save()
+        self._save_user(user)
         return user
 
     def update(self, instance, validated_data):
@@ -65,9 +199,18 @@ class UserSerializer(serializers.ModelSerializer):
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         
-        instance.save()
+        self._save_user(instance)
         return instance
 
+    def _save_user(self, user):
+        # Concorrência entre a validação e o INSERT/UPDATE: quem chegar depois
+        # esbarra em user_username_lower_uniq e recebe o mesmo erro de validação
+        try:
+            with transaction.atomic():
+                user.save()
+        except IntegrityError:
+            raise serializers.ValidationError({'username': [USERNAME_TAKEN]})
+
 
 class EmployeeSerializer(UserSerializer):
     first_name = serializers.CharField(required=True)  # Força a validação
@@ -76,14 +219,6 @@ class EmployeeSerializer(UserSerializer):
         if not data.get('first_name'):
             raise serializers.ValidationError({"first_name": "Este campo é obrigatório"})
         
-        if 'username' in data:
-            username = data['username'].lower()
-            instance = getattr(self, 'instance', None)
-            # Verifica se já existe outro usuário com o mesmo username (case-insensitive)
-            if User.objects.filter(username__iexact=username).exclude(pk=instance.pk if instance else None).exists():
-                raise serializers.ValidationError({"username": "Este nome de usuário já está em uso"})
-            data['username'] = username
-        
         # Validação específica para senha
         is_create = self.instance is None
         if is_create and not data.get('password'):
@@ -99,8 +234,8 @@ class EmployeeSerializer(UserSerializer):
         extra_kwargs = {
             **UserSerializer.Meta.extra_kwargs,
             'username': {
-                'required': True,
-                'validators': [UniqueValidator(queryset=User.objects.all())]
+                **UserSerializer.Meta.extra_kwargs['username'],
+                'required': True
             },
             'password': {
                 'write_only': True,
@@ -116,17 +251,6 @@ class EmployeeSerializer(UserSerializer):
         validated_data['role'] = User.Role.EMPLOYEE
         return super().create(validated_data)
 
-    def update(self, instance, validated_data):
-        if 'password' in validated_data:
-            password = validated_data.pop('password')
-            instance.set_password(password)
-        
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        
-        instance.save()
-        return instance
-
 
 class ProfessionalSerializer(UserSerializer):
     first_name = serializers.CharField(required=True)
@@ -135,13 +259,6 @@ class ProfessionalSerializer(UserSerializer):
         if not data.get('first_name'):
             raise serializers.ValidationError({"first_name": "Este campo é obrigatório"})
         
-        if 'username' in data:
-            username = data['username'].lower()
-            instance = getattr(self, 'instance', None)
-            if User.objects.filter(username__iexact=username).exclude(pk=instance.pk if instance else None).exists():
-                raise serializers.ValidationError({"username": "Este nome de usuário já está em uso"})
-            data['username'] = username
-        
         is_create = self.instance is None
         if is_create and not data.get('password'):
             raise serializers.ValidationError({"password": "Senha é obrigatória no cadastro"})
@@ -156,8 +273,8 @@ class ProfessionalSerializer(UserSerializer):
         extra_kwargs = {
             **UserSerializer.Meta.extra_kwargs,
             'username': {
-                'required': True,
-                'validators': [UniqueValidator(queryset=User.objects.all())]
+                **UserSerializer.Meta.extra_kwargs['username'],
+                'required': True
             },
             'password': {
                 'write_only': True,
@@ -173,25 +290,71 @@ class ProfessionalSerializer(UserSerializer):
         validated_data['role'] = User.Role.PROFESSIONAL
         return super().create(validated_data)
 
-    def update(self, instance, validated_data):
-        if 'password' in validated_data:
-            password = validated_data.pop('password')
-            instance.set_password(password)
-        
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        
-        instance.save()
-        return instance
 
+class BulkProfessionalListSerializer(serializers.ListSerializer):
+    """
+    Valida o lote inteiro antes de gravar: campos linha a linha e unicidade
+    de username/e-mail com uma consulta por coluna para o lote todo (e não
+    por linha), incluindo duplicatas dentro do próprio lote. Erros seguem o
+    formato do DRF para listas: um dicionário por linha.
+    """
+
+    def to_internal_value(self, data):
+        rows = super().to_internal_value(data)
+
+        errors = [{} for _ in rows]
+        for field, message in (('username', USERNAME_TAKEN), ('email', 'Este e-mail já está em uso')):
+            values = [row.get(field) for row in rows]
+            taken = set(User.objects.filter(**{f'{field}__in': [v for v in values if v]}).values_list(field, flat=True))
+            seen = set()
+            for index, value in enumerate(values):
+                if value and (value in taken or value in seen):
+                    errors[index][field] = [message]
+                seen.add(value)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return rows
 
-class ServiceSerializer(serializers.ModelSerializer):
+    def create(self, validated_data):
+        passwords = hash_passwords(
+            (row.pop('password') for row in validated_data),
+            workers=self.context.get('password_hash_workers')
+        )
+        users = [
+            User(**row, password=password, role=User.Role.PROFESSIONAL, is_staff=False)
+            for row, password in zip(validated_data, passwords)
+        ]
+        try:
+            with transaction.atomic():
+                # bulk_create não dispara post_save: o contador do ETag é atualizado aqui
+                users = User.objects.bulk_create(users)
+                TableVersion.bump(User)
+        except IntegrityError:
+            raise serializers.ValidationError({'username': [USERNAME_TAKEN]})
+        return users
+
+
+class BulkProfessionalSerializer(ProfessionalSerializer):
+    """Linha do cadastro em lote; a unicidade é checada por BulkProfessionalListSerializer"""
+
+    class Meta(ProfessionalSerializer.Meta):
+        list_serializer_class = BulkProfessionalListSerializer
+        extra_kwargs = {
+            **ProfessionalSerializer.Meta.extra_kwargs,
+            'username': {'required': True, 'validators': [UnicodeUsernameValidator()]},
+            'email': {'required': True, 'validators': []},
+        }
+
+
+class ServiceSerializer(SparseFieldsMixin, BranchFieldMixin, serializers.ModelSerializer):
     can_delete = serializers.SerializerMethodField()
     can_edit = serializers.SerializerMethodField() 
 
     class Meta:
         model = Service
-        fields = ['id', 'name', 'duration', 'price', 'is_active', 'can_delete', 'can_edit']
+        fields = ['id', 'name', 'duration', 'price', 'is_active', 'branch', 'can_delete', 'can_edit']
+        # A unicidade de (branch, name) é checada em validate(), com o erro no campo name
+        validators = []
 
     def get_can_delete(self, obj):
         return not obj.appointments.filter(
@@ -206,6 +369,16 @@ class ServiceSerializer(serializers.ModelSerializer):
             status=Appointment.Status.RESERVED
         ).exists()
 
+    def get_can_delete_expression(self, prefix=''):
+        """Equivalente em SQL de get_can_delete, usado por CompiledSerializer"""
+        return ~Exists(Appointment.objects.filter(
+            service=OuterRef(prefix + 'pk'),
+            start_time__gt=timezone.now(),
+            status=Appointment.Status.RESERVED
+        ))
+
+    get_can_edit_expression = get_can_delete_expression
+
     def validate_duration(self, value):
         if not 1 <= value <= 480:
             raise serializers.ValidationError(
@@ -219,8 +392,19 @@ class ServiceSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Valor máximo é R$ 10.000,00")
         return value
 
+    def validate(self, data):
+        # Só compara com serviços da mesma filial: não revela nomes de outras filiais
+        name = data.get('name', getattr(self.instance, 'name', None))
+        branch = data['branch'] if 'branch' in data else getattr(self.instance, 'branch', None)
+        duplicates = Service.objects.filter(name=name, branch=branch)
+        if self.instance is not None:
+            duplicates = duplicates.exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise serializers.ValidationError({'name': 'Já existe um serviço com este nome nesta filial.'})
+        return data
+
 
-class AppointmentSerializer(serializers.ModelSerializer):
+class AppointmentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     service = ServiceSerializer(read_only=True)
     employee = UserSerializer(read_only=True)
     service_id = serializers.PrimaryKeyRelatedField(
@@ -238,14 +422,21 @@ class AppointmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Appointment
         fields = ['id', 'client_name', 'client_contact', 'start_time',
-                'end_time', 'status', 'notes', 'service', 'employee',
+                'end_time', 'status', 'notes', 'version', 'branch', 'service', 'employee',
                 'service_id', 'employee_id']
-        read_only_fields = ['end_time', 'status']
+        # A filial vem do funcionário (Appointment.clean)
+        read_only_fields = ['end_time', 'status', 'version', 'branch']
 
     def validate(self, data):
         
         user = self.context['request'].user
 
+        if not user.is_central_admin:
+            if 'employee' in data and data['employee'].branch_id != user.branch_id:
+                raise serializers.ValidationError({"employee": "Funcionário de outra filial."})
+            if 'service' in data and data['service'].branch_id != user.branch_id:
+                raise serializers.ValidationError({"service": "Serviço de outra filial."})
+
         if user.role == User.Role.PROFESSIONAL:
             if self.instance and 'employee' in data and data['employee'] != self.instance.employee:
                 raise serializers.ValidationError({"employee": "Profissionais não podem alterar o profissional responsável pelo agendamento."})
@@ -260,7 +451,41 @@ class AppointmentSerializer(serializers.ModelSerializer):
         validated_data['status'] = Appointment.Status.RESERVED
         return super().create(validated_data)
 
+class AppointmentArchiveSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Mesma representação de AppointmentSerializer para agendamentos arquivados"""
+    service = ServiceSerializer(read_only=True)
+    employee = UserSerializer(read_only=True)
+
+    class Meta:
+        model = AppointmentArchive
+        fields = ['id', 'client_name', 'client_contact', 'start_time',
+                'end_time', 'status', 'notes', 'version', 'branch', 'service', 'employee']
+        read_only_fields = fields
+
+
+class AgendaServiceSerializer(serializers.ModelSerializer):
+    """Serviço na agenda: sem can_delete/can_edit, que custam uma consulta por linha"""
+
+    class Meta:
+        model = Service
+        fields = ['id', 'name', 'duration', 'price']
+        read_only_fields = fields
+
+
+class AgendaAppointmentSerializer(serializers.ModelSerializer):
+    """Agendamento na agenda do profissional (api/agenda.py); o serviço vem do select_related"""
+    service = AgendaServiceSerializer(read_only=True)
+
+    class Meta:
+        model = Appointment
+        fields = ['id', 'client_name', 'client_contact', 'start_time',
+                'end_time', 'status', 'notes', 'version', 'service']
+        read_only_fields = fields
+
+
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = RevocableRefreshToken
+
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
@@ -0,0 +1,133 @@
+# api/signals
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from .agenda import invalidate_agendas
+from .events import appointment_event, get_broker
+from .models import User, Service, Appointment, AppointmentTombstone, TableVersion
+from .reminders import cancel_reminder, schedule_reminder
+from .taskqueue import enqueue
+from .tasks import send_appointment_confirmation
+from .tokens import revoke_user_tokens
+
+
+@receiver(post_init, sender=Appointment)
+def remember_appointment_status(sender, instance, **kwargs):
+    # Usa __dict__ para não disparar consulta em campos adiados (only/defer)
+    instance._loaded_status = instance.__dict__.get('status')
+    instance._loaded_start_time = instance.__dict__.get('start_time')
+    instance._loaded_employee_id = instance.__dict__.get('employee_id')
+
+
+def _publish_on_commit(event):
+    transaction.on_commit(lambda: get_broker().publish(event))
+
+
+def _event_type(instance, created, status_changed):
+    if created:
+        return 'created'
+    if status_changed and instance.status in (Appointment.Status.CANCELLED, Appointment.Status.COMPLETED):
+        return instance.status
+    return 'updated'
+
+
+@receiver(post_save, sender=Appointment)
+def appointment_saved(sender, instance, created, **kwargs):
+    status_changed = not created and instance.status != instance._loaded_status
+
+    _publish_on_commit(appointment_event(_event_type(instance, created, status_changed), instance))
+
+    if instance.status == Appointment.Status.RESERVED:
+        if created or instance.start_time != instance._loaded_start_time:
+            schedule_reminder(instance)
+    elif status_changed:
+        cancel_reminder(instance)
+
+    if created:
+        enqueue(send_appointment_confirmation, appointment_id=instance.pk)
+
+    instance._loaded_status = instance.status
+    instance._loaded_start_time = instance.start_time
+
+
+def _invalidate_agendas_on_commit(*employee_ids):
+    employee_ids = [pk for pk in employee_ids if pk is not None]
+    transaction.on_commit(lambda: invalidate_agendas(employee_ids))
+
+
+@receiver(post_save, sender=Appointment)
+def invalidate_agenda_on_save(sender, instance, **kwargs):
+    # Troca de profissional invalida também a agenda do anterior
+    _invalidate_agendas_on_commit(instance.employee_id, instance._loaded_employee_id)
+    instance._loaded_employee_id = instance.employee_id
+
+
+@receiver(post_delete, sender=Appointment)
+def invalidate_agenda_on_delete(sender, instance, **kwargs):
+    _invalidate_agendas_on_commit(instance.employee_id)
+
+
+@receiver(post_delete, sender=Appointment)
+def publish_appointment_deleted(sender, instance, **kwargs):
+    _publish_on_commit(appointment_event('deleted', instance))
+
+
+@receiver(post_delete, sender=Appointment)
+def record_appointment_tombstone(sender, instance, **kwargs):
+    AppointmentTombstone.objects.create(
+        appointment_id=instance.pk,
+        employee_id=instance.employee_id,
+        branch_id=instance.branch_id,
+        sync_version=TableVersion.next(Appointment)
+    )
+
+
+# Appointment avança o próprio contador em save() e ao gravar a lápide (TableVersion.next)
+VERSIONED_MODELS = (User, Service)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_table_version(sender, **kwargs):
+    # Sem filtro de sender para também cobrir os proxies de User
+    if issubclass(sender, VERSIONED_MODELS):
+        TableVersion.bump(sender._meta.concrete_model)
+
+
+# Campos que, ao mudar, invalidam os refresh tokens já emitidos (além da senha)
+TOKEN_SENSITIVE_FIELDS = ('role', 'is_active')
+
+
+@receiver(post_init)
+def remember_user_access(sender, instance, **kwargs):
+    if issubclass(sender, User):
+        instance._loaded_access = {
+            field: instance.__dict__[field] for field in TOKEN_SENSITIVE_FIELDS if field in instance.__dict__
+        }
+
+
+@receiver(pre_save)
+def flag_token_revocation(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None or not issubclass(sender, User):
+        return
+    # _password só é preenchido por set_password(); o rehash no login o limpa antes de salvar
+    instance._revoke_tokens = instance._password is not None or any(
+        instance.__dict__.get(field) != value for field, value in instance._loaded_access.items()
+    )
+
+
+@receiver(post_save)
+def revoke_tokens_on_access_change(sender, instance, created, **kwargs):
+    if issubclass(sender, User) and getattr(instance, '_revoke_tokens', False):
+        user_id = instance.pk
+        transaction.on_commit(lambda: revoke_user_tokens(user_id))
+        instance._revoke_tokens = False
+        remember_user_access(sender, instance)
+
+
+@receiver(post_delete)
+def revoke_tokens_on_user_delete(sender, instance, **kwargs):
+    if issubclass(sender, User):
+        user_id = instance.pk
+        transaction.on_commit(lambda: revoke_user_tokens(user_id))
@@ -0,0 +1,79 @@
+# api/sync
+from django.core import signing
+from django.db.models import Q
+
+from .models import AppointmentTombstone
+from .queries import ALL_BRANCHES
+
+# v2: tokens antigos (por updated_at) deixam de valer; o cliente refaz a sincronização inicial
+WATERMARK_SALT = 'api.appointments.changes.v2'
+
+
+class InvalidWatermark(Exception):
+    pass
+
+
+def encode_watermark(sync_version, last_id, tombstone_version):
+    return signing.dumps([sync_version, last_id, tombstone_version], salt=WATERMARK_SALT)
+
+
+def decode_watermark(token):
+    """Retorna (sync_version, last_id, tombstone_version) a partir do token opaco"""
+    try:
+        sync_version, last_id, tombstone_version = signing.loads(token, salt=WATERMARK_SALT)
+    except (signing.BadSignature, TypeError, ValueError):
+        raise InvalidWatermark(token)
+    return sync_version, last_id, tombstone_version
+
+
+def appointment_changes(queryset, token=None, limit=500, employee_id=None, branch_id=ALL_BRANCHES):
+    """
+    Retorna (alterados, ids_excluídos, próximo_token, has_more) desde o token.
+
+    Agendamentos e lápides são percorridos pela versão de sincronização
+    (sync_version, ver TableVersion.next), que segue a ordem de commit: uma
+    escrita que commita depois da leitura sempre recebe uma versão maior que
+    a do token, mesmo que tenha começado antes. Um horário (updated_at) não
+    serve, pois é marcado antes do commit.
+
+    Os agendamentos usam (sync_version, id), coberto pelo índice
+    appointment_sync_idx; o id desempata as linhas de uma mesma varredura em
+    massa. Sem token, devolve o estado atual completo e posiciona as lápides
+    no fim. `employee_id` restringe as exclusões às de um único profissional
+    e `branch_id`, às de uma filial (None: às sem filial).
+    """
+    sync_version, last_id, tombstone_version = (None, 0, None)
+    if token:
+        sync_version, last_id, tombstone_version = decode_watermark(token)
+
+    changed = queryset.order_by('sync_version', 'id')
+    if sync_version is not None:
+        changed = changed.filter(
+            Q(sync_version__gt=sync_version) | Q(sync_version=sync_version, id__gt=last_id)
+        )
+    changed = list(changed[:limit + 1])
+    has_more = len(changed) > limit
+    changed = changed[:limit]
+    if changed:
+        sync_version, last_id = changed[-1].sync_version, changed[-1].id
+
+    tombstones = AppointmentTombstone.objects.order_by('sync_version')
+    if tombstone_version is None:
+        # Sincronização inicial: exclusões anteriores não interessam ao cliente
+        last_tombstone = tombstones.values_list('sync_version', flat=True).last()
+        deleted, tombstone_version = [], last_tombstone or 0
+    else:
+        tombstones = tombstones.filter(sync_version__gt=tombstone_version)
+        if employee_id is not None:
+            tombstones = tombstones.filter(employee_id=employee_id)
+        if branch_id is not ALL_BRANCHES:
+            tombstones = tombstones.filter(branch_id=branch_id)
+        rows = list(tombstones.values_list('sync_version', 'appointment_id')[:limit + 1])
+        has_more = has_more or len(rows) > limit
+        rows = rows[:limit]
+        deleted = [appointment_id for _, appointment_id in rows]
+        if rows:
+            tombstone_version = rows[-1][0]
+
+    return changed, deleted, encode_watermark(sync_version, last_id, tombstone_version), has_more
+
@@ -0,0 +1,116 @@
+# api/taskqueue
+import logging
+import traceback
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def task(name=None, max_attempts=5):
+    """Registra uma função como tarefa de segundo plano"""
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        func.task_name = task_name
+        func.max_attempts = max_attempts
+        _registry[task_name] = func
+        return func
+    return decorator
+
+
+def enqueue(func, run_after=None, **payload):
+    """
+    Agenda `func` para depois do commit da transação atual, de modo que a
+    requisição não espere pela tarefa e a tarefa nunca veja dados revertidos.
+    """
+    transaction.on_commit(
+        lambda: get_backend().enqueue(func.task_name, payload, run_after=run_after, max_attempts=func.max_attempts)
+    )
+
+
+def run(task_name, payload):
+    return _registry[task_name](**payload)
+
+
+class DatabaseBackend:
+    """Fila na tabela Task, consumida por `manage.py run_worker`"""
+
+    def enqueue(self, name, payload, run_after=None, max_attempts=5):
+        Task.objects.create(
+            name=name,
+            payload=payload,
+            run_after=run_after or timezone.now(),
+            max_attempts=max_attempts
+        )
+
+    def claim(self, worker_id, batch_size=50, lock_timeout=timedelta(minutes=10)):
+        """Reserva até `batch_size` tarefas vencidas para este worker"""
+        now = timezone.now()
+
+        # Devolve à fila tarefas de workers que morreram no meio da execução
+        Task.objects.filter(
+            status=Task.Status.RUNNING, locked_at__lt=now - lock_timeout
+        ).update(status=Task.Status.PENDING, locked_by='')
+
+        with transaction.atomic():
+            due = Task.objects.filter(
+                status=Task.Status.PENDING, run_after__lte=now
+            ).order_by('run_after')
+            if connection.features.has_select_for_update_skip_locked:
+                due = due.select_for_update(skip_locked=True)
+            ids = list(due.values_list('pk', flat=True)[:batch_size])
+            # O filtro por status evita que dois workers reservem a mesma tarefa
+            Task.objects.filter(pk__in=ids, status=Task.Status.PENDING).update(
+                status=Task.Status.RUNNING, locked_by=worker_id, locked_at=now
+            )
+        return list(Task.objects.filter(pk__in=ids, locked_by=worker_id, status=Task.Status.RUNNING))
+
+    def execute(self, task_row):
+        try:
+            run(task_row.name, task_row.payload)
+        except Exception:
+            task_row.attempts += 1
+            task_row.last_error = traceback.format_exc()
+            if task_row.attempts >= task_row.max_attempts:
+                task_row.status = Task.Status.FAILED
+                logger.exception('Tarefa %s (%s) falhou definitivamente', task_row.pk, task_row.name)
+            else:
+                task_row.status = Task.Status.PENDING
+                task_row.run_after = timezone.now() + retry_delay(task_row.attempts)
+        else:
+            task_row.attempts += 1
+            task_row.status = Task.Status.DONE
+        task_row.locked_by = ''
+        task_row.save(update_fields=['status', 'attempts', 'last_error', 'run_after', 'locked_by'])
+
+    def purge_finished(self, older_than):
+        return Task.objects.filter(
+            status=Task.Status.DONE, created_at__lt=timezone.now() - older_than
+        ).delete()[0]
+
+
+class ImmediateBackend:
+    """Executa a tarefa no próprio processo, após o commit (desenvolvimento)"""
+
+    def enqueue(self, name, payload, run_after=None, max_attempts=5):
+        run(name, payload)
+
+
+def retry_delay(attempts):
+    """Backoff exponencial: 30s, 1min, 2min, ... limitado a 1h"""
+    return timedelta(seconds=min(30 * 2 ** (attempts - 1), 3600))
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    path = getattr(settings, 'TASK_BACKEND', 'api.taskqueue.DatabaseBackend')
+    return import_string(path)()
@@ -0,0 +1,20 @@
+# api/tasks
+from django.utils import timezone
+
+from .models import Appointment
+from .notifications import get_transport
+from .taskqueue import task
+
+
+@task(name='appointments.send_confirmation')
+def send_appointment_confirmation(appointment_id):
+    """Confirmação de agendamento enviada fora do caminho da requisição"""
+    appointment = Appointment.objects.select_related('service').filter(pk=appointment_id).first()
+    if appointment is None:
+        return
+    start_time = timezone.localtime(appointment.start_time)
+    get_transport().send(
+        appointment.client_contact,
+        f"Olá, {appointment.client_name}! Seu horário de {appointment.service.name} "
+        f"está confirmado para {start_time.strftime('%d/%m/%Y às %H:%M')}."
+    )
@@ -0,0 +1,117 @@
+#api/tests_agenda.py
+
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from .agenda import cached_professional_agenda
+from .maintenance import archive_appointments, sweep_stale_appointments
+from .models import User, Service, Appointment
+
+
+class ProfessionalAgendaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.professional = User.objects.create_user(
+            username='profissional',
+            password='professional123',
+            email='profissional@example.com',
+            role=User.Role.PROFESSIONAL
+        )
+        self.other = User.objects.create_user(
+            username='outro',
+            password='professional123',
+            email='outro@example.com',
+            role=User.Role.PROFESSIONAL
+        )
+        self.client.force_authenticate(user=self.professional)
+
+        self.service = Service.objects.create(name='Corte de Cabelo', duration=60, price=50)
+        self.day = timezone.localdate() - timedelta(days=2)
+        self.morning = self._create(9)
+        self.afternoon = self._create(14)
+        self._create(16, status=Appointment.Status.CANCELLED)
+        self.url = reverse('professional-agenda', args=[self.professional.id])
+
+    def tearDown(self):
+        cache.clear()
+
+    def _create(self, hour, employee=None, status=Appointment.Status.RESERVED):
+        appointment = Appointment(
+            service=self.service,
+            employee=employee or self.professional,
+            start_time=timezone.make_aware(datetime.combine(self.day, time(hour))),
+            client_name='Cliente Teste',
+            client_contact='11999999999',
+            status=status
+        )
+        appointment.save(skip_validation=True)
+        return appointment
+
+    def _get(self):
+        return self.client.get(self.url, {'date': self.day.isoformat()})
+
+    def test_agenda_lists_appointments_gaps_and_totals(self):
+        response = self._get()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['appointments']), 3)
+        self.assertEqual(response.data['appointments'][0]['service']['name'], 'Corte de Cabelo')
+        # Expediente 8h-20h; o cancelado das 16h não ocupa horário
+        self.assertEqual([gap['minutes'] for gap in response.data['gaps']], [60, 240, 300])
+        self.assertEqual(response.data['totals'], {
+            'appointments': 2, 'booked_minutes': 120, 'expected_revenue': '100.00'
+        })
+
+    def test_agenda_is_one_query_and_then_cached(self):
+        with self.assertNumQueries(1):
+            cached_professional_agenda(self.professional, self.day)
+        with self.assertNumQueries(0):
+            cached_professional_agenda(self.professional, self.day)
+
+    def test_saving_appointment_invalidates_agenda(self):
+        self._get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.afternoon.status = Appointment.Status.COMPLETED
+            self.afternoon.save(skip_validation=True)
+
+        response = self._get()
+        statuses = [a['status'] for a in response.data['appointments']]
+        self.assertIn(Appointment.Status.COMPLETED, statuses)
+
+    def test_moving_appointment_invalidates_both_agendas(self):
+        other_day = cached_professional_agenda(self.other, self.day)
+        self.assertEqual(other_day['appointments'], [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.morning.employee = self.other
+            self.morning.save(skip_validation=True)
+
+        self.assertEqual(len(cached_professional_agenda(self.other, self.day)['appointments']), 1)
+        self.assertEqual(len(cached_professional_agenda(self.professional, self.day)['appointments']), 2)
+
+    def test_sweep_and_archive_invalidate_agenda(self):
+        self._get()
+        with self.captureOnCommitCallbacks(execute=True):
+            sweep_stale_appointments(timedelta(hours=1), Appointment.Status.NO_SHOW)
+        statuses = {a['status'] for a in self._get().data['appointments']}
+        self.assertNotIn(Appointment.Status.RESERVED, statuses)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            archive_appointments(timezone.now())
+        self.assertEqual(self._get().data['appointments'], [])
+
+    def test_professional_cannot_see_other_agenda(self):
+        response = self.client.get(reverse('professional-agenda', args=[self.other.id]))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_invalid_date_is_rejected(self):
+        response = self.client.get(self.url, {'date': '2024-13-40'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,8 +1,13 @@
+from unittest import mock
+
+from django.db import connection, transaction
+from django.db.models import F
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
-from .models import User, Service, Appointment
+from .models import User, Service, Appointment, IdempotencyKey, StaleAppointmentError
 from django.utils import timezone
 from datetime import timedelta, datetime
 import decimal
@@ -698,4 +703,466 @@ class AppointmentListViewTests(TestCase):
 
     def test_unauthenticated_access_fails(self):
         response = self.client.get(self.url)
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+class AppointmentChangesTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('appointment-changes')
+
+        self.admin = User.objects.create_superuser(
+            username='admin',
+            password='admin123',
+            email='admin@example.com',
+            role=User.Role.ADMIN
+        )
+        self.client.force_authenticate(user=self.admin)
+
+        self.employee = User.objects.create_user(
+            username='employee',
+            password='employee123',
+            email='employee@example.com',
+            role=User.Role.EMPLOYEE
+        )
+
+        self.service = Service.objects.create(
+            name='Corte de Cabelo',
+            duration=30,
+            price=50.00,
+            is_active=True
+        )
+
+        self.appointments = [
+            Appointment.objects.create(
+                service=self.service,
+                employee=self.employee,
+                start_time=timezone.now() + timedelta(days=day),
+                client_name=f'Cliente {day}',
+                client_contact='11999999999'
+            )
+            for day in (1, 2, 3)
+        ]
+
+    def test_initial_sync_returns_all_appointments(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['changed']), 3)
+        self.assertEqual(response.data['deleted'], [])
+        self.assertFalse(response.data['has_more'])
+
+    def test_sync_since_token_returns_only_changes_and_deletions(self):
+        token = self.client.get(self.url).data['next']
+
+        response = self.client.get(self.url, {'since': token})
+        self.assertEqual(response.data['changed'], [])
+        self.assertEqual(response.data['deleted'], [])
+
+        updated, deleted = self.appointments[0], self.appointments[1]
+        updated.client_name = 'Nome Alterado'
+        updated.save()
+        deleted_id = deleted.id
+        deleted.delete()
+
+        response = self.client.get(self.url, {'since': token})
+        self.assertEqual([a['id'] for a in response.data['changed']], [updated.id])
+        self.assertEqual(response.data['deleted'], [deleted_id])
+
+    def test_sync_includes_write_stamped_before_watermark_but_committed_after(self):
+        token = self.client.get(self.url).data['next']
+
+        # Transação que marcou updated_at antes da última leitura, mas commitou depois dela
+        late = self.appointments[2]
+        late.client_name = 'Commit atrasado'
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() - timedelta(minutes=5)):
+            late.save()
+
+        response = self.client.get(self.url, {'since': token})
+        self.assertEqual([a['id'] for a in response.data['changed']], [late.id])
+
+        response = self.client.get(self.url, {'since': response.data['next']})
+        self.assertEqual(response.data['changed'], [])
+
+    def test_sync_is_paginated_by_limit(self):
+        response = self.client.get(self.url, {'limit': 2})
+        self.assertEqual(len(response.data['changed']), 2)
+        self.assertTrue(response.data['has_more'])
+
+        response = self.client.get(self.url, {'since': response.data['next'], 'limit': 2})
+        self.assertEqual(len(response.data['changed']), 1)
+        self.assertFalse(response.data['has_more'])
+
+    def test_sync_with_invalid_token_fails(self):
+        response = self.client.get(self.url, {'since': 'invalido'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AppointmentConcurrencyTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+        self.employee = User.objects.create_user(
+            username='employee',
+            password='employee123',
+            email='employee@example.com',
+            role=User.Role.EMPLOYEE
+        )
+        self.client.force_authenticate(user=self.employee)
+
+        self.service = Service.objects.create(
+            name='Corte de Cabelo',
+            duration=30,
+            price=50.00,
+            is_active=True
+        )
+
+        self.appointment = Appointment.objects.create(
+            service=self.service,
+            employee=self.employee,
+            start_time=timezone.now() + timedelta(days=1),
+            client_name='Cliente Original',
+            client_contact='11999999999'
+        )
+
+        self.url = reverse('appointment-detail', args=[self.appointment.id])
+
+    def test_update_with_matching_if_match_success(self):
+        response = self.client.patch(
+            self.url, {'client_name': 'Novo Nome'}, HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['version'], 2)
+
+    def test_update_with_stale_if_match_fails(self):
+        self.appointment.client_name = 'Alterado por outro usuário'
+        self.appointment.save()
+
+        response = self.client.patch(
+            self.url, {'client_name': 'Novo Nome'}, HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.appointment.refresh_from_db()
+        self.assertEqual(self.appointment.client_name, 'Alterado por outro usuário')
+
+    def test_if_match_accepts_etag_from_detail(self):
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.patch(self.url, {'client_name': 'Novo Nome'}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # O ETag recebido antes da alteração ficou velho
+        response = self.client.patch(self.url, {'client_name': 'Outro Nome'}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        response = self.client.post(
+            reverse('appointment-cancel', args=[self.appointment.id]), HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+        etag = self.client.get(self.url)['ETag']
+        self.assertTrue(etag.startswith('"2-'))
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_update_with_stale_version_in_body_fails(self):
+        Appointment.objects.get(pk=self.appointment.pk).cancel()
+
+        response = self.client.patch(self.url, {'client_name': 'Novo Nome', 'version': 1})
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+    def test_complete_after_concurrent_change_fails(self):
+        start_time = timezone.now() - timedelta(hours=2)
+        Appointment.objects.filter(pk=self.appointment.pk).update(
+            start_time=start_time, end_time=start_time + timedelta(minutes=30))
+        original_complete = Appointment.complete
+
+        def complete_after_concurrent_change(appointment):
+            # Outra requisição altera o agendamento entre o carregamento e o save
+            Appointment.objects.filter(pk=appointment.pk).update(version=F('version') + 1)
+            original_complete(appointment)
+
+        with mock.patch.object(Appointment, 'complete', complete_after_concurrent_change):
+            response = self.client.post(reverse('appointment-complete', args=[self.appointment.id]))
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+    def test_concurrent_saves_of_loaded_instances_conflict(self):
+        first = Appointment.objects.get(pk=self.appointment.pk)
+        second = Appointment.objects.get(pk=self.appointment.pk)
+
+        first.client_name = 'Primeiro'
+        first.save()
+
+        second.client_name = 'Segundo'
+        with self.assertRaises(StaleAppointmentError), transaction.atomic():
+            second.save()
+        self.assertEqual(second.version, 1)
+
+        self.appointment.refresh_from_db()
+        self.assertEqual(self.appointment.client_name, 'Primeiro')
+        self.assertEqual(self.appointment.version, 2)
+
+
+class AppointmentIdempotencyTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.appointment_url = reverse('appointment-list')
+
+        self.employee = User.objects.create_user(
+            username='employee',
+            password='employee123',
+            email='employee@example.com',
+            role=User.Role.EMPLOYEE
+        )
+        self.client.force_authenticate(user=self.employee)
+
+        self.service = Service.objects.create(
+            name='Corte de Cabelo',
+            duration=30,
+            price=50.00,
+            is_active=True
+        )
+
+        self.valid_appointment_data = {
+            'client_name': 'Cliente Teste',
+            'client_contact': '11999999999',
+            'service_id': self.service.id,
+            'employee_id': self.employee.id,
+            'start_time': (timezone.now() + timedelta(days=1)).isoformat(),
+        }
+
+    def test_retried_create_is_replayed(self):
+        first = self.client.post(
+            self.appointment_url, self.valid_appointment_data, HTTP_IDEMPOTENCY_KEY='abc-123')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+
+        second = self.client.post(
+            self.appointment_url, self.valid_appointment_data, HTTP_IDEMPOTENCY_KEY='abc-123')
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(second.data['id'], first.data['id'])
+        self.assertEqual(Appointment.objects.count(), 1)
+
+    def test_reused_key_with_different_payload_fails(self):
+        self.client.post(
+            self.appointment_url, self.valid_appointment_data, HTTP_IDEMPOTENCY_KEY='abc-123')
+
+        other_data = {**self.valid_appointment_data, 'client_name': 'Outro Cliente'}
+        response = self.client.post(
+            self.appointment_url, other_data, HTTP_IDEMPOTENCY_KEY='abc-123')
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Appointment.objects.count(), 1)
+
+    def test_retried_cancel_is_replayed(self):
+        appointment_id = self.client.post(self.appointment_url, self.valid_appointment_data).data['id']
+        cancel_url = reverse('appointment-cancel', args=[appointment_id])
+
+        first = self.client.post(cancel_url, HTTP_IDEMPOTENCY_KEY='cancel-1')
+        second = self.client.post(cancel_url, HTTP_IDEMPOTENCY_KEY='cancel-1')
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+
+    def _interrupt_first_request(self, locked_until):
+        """Simula a primeira requisição morta no meio: a chave fica em processamento"""
+        self.client.post(
+            self.appointment_url, self.valid_appointment_data, HTTP_IDEMPOTENCY_KEY='abc-123')
+        Appointment.objects.all().delete()
+        IdempotencyKey.objects.update(status_code=None, response_body=None, locked_until=locked_until)
+
+    def test_retry_while_in_progress_conflicts(self):
+        self._interrupt_first_request(timezone.now() + timedelta(seconds=30))
+
+        response = self.client.post(
+            self.appointment_url, self.valid_appointment_data, HTTP_IDEMPOTENCY_KEY='abc-123')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertTrue(1 <= int(response['Retry-After']) <= 30)
+        self.assertFalse(Appointment.objects.exists())
+
+    def test_retry_takes_over_after_lease_expires(self):
+        self._interrupt_first_request(timezone.now() - timedelta(seconds=1))
+
+        response = self.client.post(
+            self.appointment_url, self.valid_appointment_data, HTTP_IDEMPOTENCY_KEY='abc-123')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(response.has_header('Idempotent-Replayed'))
+        self.assertEqual(Appointment.objects.count(), 1)
+
+        replayed = self.client.post(
+            self.appointment_url, self.valid_appointment_data, HTTP_IDEMPOTENCY_KEY='abc-123')
+        self.assertEqual(replayed['Idempotent-Replayed'], 'true')
+        self.assertEqual(replayed.data['id'], response.data['id'])
+
+    def test_expired_keys_are_purged(self):
+        self.client.post(
+            self.appointment_url, self.valid_appointment_data, HTTP_IDEMPOTENCY_KEY='abc-123')
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(IdempotencyKey.purge_expired(), 1)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+class AppointmentOrderingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('appointment-list')
+
+        self.employee = User.objects.create_user(
+            username='employee',
+            password='employee123',
+            email='employee@example.com',
+            role=User.Role.EMPLOYEE
+        )
+        self.employee2 = User.objects.create_user(
+            username='employee2',
+            password='employee123',
+            email='employee2@example.com',
+            role=User.Role.EMPLOYEE
+        )
+        self.client.force_authenticate(user=self.employee)
+
+        self.service = Service.objects.create(
+            name='Corte de Cabelo',
+            duration=30,
+            price=50.00,
+            is_active=True
+        )
+
+        self.start_time = timezone.now() + timedelta(days=1)
+
+    def _create(self, employee, start_time):
+        return Appointment.objects.create(
+            service=self.service,
+            employee=employee,
+            start_time=start_time,
+            client_name='Cliente Teste',
+            client_contact='11999999999'
+        )
+
+    def test_conflict_check_queries_do_not_sort(self):
+        appointment = self._create(self.employee, self.start_time)
+        appointment.start_time += timedelta(hours=2)
+
+        with CaptureQueriesContext(connection) as queries:
+            appointment.full_clean()
+
+        self.assertTrue(queries.captured_queries)
+        for query in queries.captured_queries:
+            self.assertNotIn('ORDER BY', query['sql'])
+
+    def test_unordered_subqueries_do_not_sort(self):
+        batch = Appointment.objects.filter(status=Appointment.Status.RESERVED).values('pk')[:100]
+        self.assertNotIn('ORDER BY', str(batch.query))
+
+    def test_list_is_ordered_by_start_time_then_id(self):
+        later = self._create(self.employee, self.start_time + timedelta(hours=1))
+        first_tie = self._create(self.employee2, self.start_time)
+        second_tie = self._create(self.employee, self.start_time)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+
+        self.assertEqual(
+            [row['id'] for row in response.data],
+            [first_tie.id, second_tie.id, later.id]
+        )
+        # A última consulta: antes dela, o ETag busca a próxima reserva
+        list_query = [q['sql'] for q in queries.captured_queries if 'FROM "api_appointment"' in q['sql']][-1]
+        # A listagem compilada (values_list) ordena pelas posições das colunas no SELECT
+        self.assertRegex(
+            list_query,
+            r'ORDER BY ("api_appointment"\."start_time"|4) ASC, ("api_appointment"\."id"|1) ASC'
+        )
+
+
+class AppointmentQueryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('appointment-list')
+
+        self.employee = User.objects.create_user(
+            username='employee',
+            password='employee123',
+            email='employee@example.com',
+            role=User.Role.EMPLOYEE
+        )
+        self.professional = User.objects.create_user(
+            username='professional',
+            password='professional123',
+            email='professional@example.com',
+            role=User.Role.PROFESSIONAL
+        )
+
+        self.service = Service.objects.create(
+            name='Corte de Cabelo',
+            duration=30,
+            price=50.00,
+            is_active=True
+        )
+
+        self.start_time = timezone.localtime(timezone.now() + timedelta(days=2)).replace(hour=10, minute=0, second=0, microsecond=0)
+        self.own = self._create(self.professional, self.start_time, 'Maria Silva')
+        self.other = self._create(self.employee, self.start_time + timedelta(days=1), 'João Souza')
+
+    def _create(self, employee, start_time, client_name):
+        return Appointment.objects.create(
+            service=self.service,
+            employee=employee,
+            start_time=start_time,
+            client_name=client_name,
+            client_contact='11999999999'
+        )
+
+    def test_professional_only_sees_own_appointments(self):
+        self.client.force_authenticate(user=self.professional)
+        response = self.client.get(self.url)
+        self.assertEqual([row['id'] for row in response.data], [self.own.id])
+
+        response = self.client.get(reverse('appointment-detail', args=[self.other.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_filter_by_date_range_and_search(self):
+        self.client.force_authenticate(user=self.employee)
+        day = self.start_time.date().isoformat()
+
+        response = self.client.get(self.url, {'start': day, 'end': day})
+        self.assertEqual([row['id'] for row in response.data], [self.own.id])
+
+        response = self.client.get(self.url, {'search': 'souza'})
+        self.assertEqual([row['id'] for row in response.data], [self.other.id])
+
+    def test_filter_by_invalid_date_fails(self):
+        self.client.force_authenticate(user=self.employee)
+        response = self.client.get(self.url, {'start': '2024-13-01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_loads_only_serialized_columns(self):
+        self.client.force_authenticate(user=self.employee)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        list_query = [q['sql'] for q in queries.captured_queries if 'FROM "api_appointment"' in q['sql']][-1]
+        self.assertNotIn('"api_appointment"."created_at"', list_query)
+        self.assertNotIn('"api_user"."password"', list_query)
+
+    def test_sparse_fieldset_limits_response_and_columns(self):
+        self.client.force_authenticate(user=self.employee)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'fields': 'id,start_time,service.name'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data[0]), {'id', 'start_time', 'service'})
+        self.assertEqual(set(response.data[0]['service']), {'name'})
+        list_query = [q['sql'] for q in queries.captured_queries if 'FROM "api_appointment"' in q['sql']][-1]
+        self.assertNotIn('"api_appointment"."notes"', list_query)
+        self.assertNotIn('"api_user"', list_query)
+        self.assertNotIn('"api_service"."price"', list_query)
+
+    def test_omit_removes_fields(self):
+        self.client.force_authenticate(user=self.employee)
+        response = self.client.get(self.url, {'omit': 'notes,employee'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('notes', response.data[0])
+        self.assertNotIn('employee', response.data[0])
+        self.assertIn('service', response.data[0])
+
+    def test_unknown_sparse_field_fails(self):
+        self.client.force_authenticate(user=self.employee)
+        response = self.client.get(self.url, {'fields': 'id,colour'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,82 @@
+#api/tests_asyncviews.py
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from .models import User, Service
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.employee = User.objects.create_user(
+            username='employee',
+            password='employee123',
+            email='employee@example.com',
+            role=User.Role.EMPLOYEE
+        )
+        Service.objects.create(name='Corte de Cabelo', duration=30, price=50)
+        Service.objects.create(name='Coloração', duration=90, price=150)
+        Service.objects.create(name='Hidratação', duration=60, price=80, is_active=False)
+
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(self.employee)}'}
+        self.async_client = AsyncClient()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.employee)
+
+    def tearDown(self):
+        cache.clear()
+
+    async def test_me_matches_sync_view(self):
+        response = await self.async_client.get(reverse('async-me'), headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        expected = await self._sync_get(reverse('me'))
+        self.assertEqual(response.json(), expected)
+
+    async def test_service_list_matches_sync_view(self):
+        for params in ({}, {'search': 'co'}, {'fields': 'id,name'}):
+            response = await self.async_client.get(reverse('async-service-list'), params, headers=self.headers)
+
+            self.assertEqual(response.status_code, 200)
+            expected = await self._sync_get(reverse('service-list'), params)
+            self.assertEqual(response.json(), expected)
+
+    async def test_requires_valid_token(self):
+        response = await self.async_client.get(reverse('async-me'))
+        self.assertEqual(response.status_code, 401)
+
+        response = await self.async_client.get(reverse('async-me'), headers={'Authorization': 'Bearer invalido'})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_invalid_params_return_400(self):
+        response = await self.async_client.get(reverse('async-service-list'), {'branch': 'x'}, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('branch', response.json())
+
+        response = await self.async_client.get(reverse('async-service-list'), {'fields': 'nope'}, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.json())
+
+    async def test_shares_throttle_budget_with_sync_view(self):
+        rates = {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], 'user': '2/min', 'list': '2/min'}
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates}):
+            for sync_name, async_name in (('me', 'async-me'), ('service-list', 'async-service-list')):
+                await self._sync_get(reverse(sync_name))
+                response = await self.async_client.get(reverse(async_name), headers=self.headers)
+                self.assertEqual(response.status_code, 200)
+
+                # Balde esgotado pelas duas URLs: a assíncrona não contorna o limite
+                response = await self.async_client.get(reverse(async_name), headers=self.headers)
+                self.assertEqual(response.status_code, 429)
+                self.assertEqual(response['Retry-After'], '30')
+                response = await sync_to_async(self.client.get)(reverse(sync_name))
+                self.assertEqual(response.status_code, 429)
+
+    async def _sync_get(self, url, params=None):
+        response = await sync_to_async(self.client.get)(url, params)
+        return response.json()
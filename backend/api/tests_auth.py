@@ -0,0 +1,216 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .hashers import check_password_hasher_profile
+from .models import TokenRevocation, User
+from .tokens import check_revocation_cache, revocation_cache
+
+PBKDF2 = settings.PASSWORD_HASHER_PROFILES['pbkdf2']
+
+
+class PasswordHasherProfileTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('token_obtain_pair')
+
+    def _login(self):
+        return self.client.post(self.url, {'username': 'employee', 'password': 'employee123'}, format='json')
+
+    @override_settings(PASSWORD_HASHERS=PBKDF2, PASSWORD_HASHER_COST={'pbkdf2': {'iterations': 1000}})
+    def test_login_rehashes_when_cost_changes(self):
+        user = User.objects.create_user(username='employee', password='employee123', role=User.Role.EMPLOYEE)
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+
+        with override_settings(PASSWORD_HASHERS=list(PBKDF2), PASSWORD_HASHER_COST={'pbkdf2': {'iterations': 2000}}):
+            response = self._login()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))
+
+    @override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher', *PBKDF2],
+                       PASSWORD_HASHER_COST={'pbkdf2': {'iterations': 1000}})
+    def test_login_rehashes_with_preferred_hasher(self):
+        user = User.objects.create_user(username='employee', role=User.Role.EMPLOYEE)
+        with override_settings(PASSWORD_HASHERS=PBKDF2):
+            user.set_password('employee123')
+            user.save()
+
+        self.assertEqual(self._login().status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('md5$'))
+
+    @override_settings(PASSWORD_HASHER_PROFILE='argon2', PASSWORD_HASHERS=PBKDF2)
+    def test_check_warns_when_profile_library_is_missing(self):
+        self.assertEqual([message.id for message in check_password_hasher_profile(None)], ['api.W001'])
+
+    @override_settings(PASSWORD_HASHER_PROFILE='scrypt')
+    def test_check_rejects_unknown_profile(self):
+        self.assertEqual([message.id for message in check_password_hasher_profile(None)], ['api.E001'])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class StatelessRefreshTests(TestCase):
+    def setUp(self):
+        revocation_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='employee',
+            password='employee123',
+            email='employee@example.com',
+            role=User.Role.EMPLOYEE
+        )
+        response = self.client.post(
+            reverse('token_obtain_pair'), {'username': 'employee', 'password': 'employee123'}, format='json'
+        )
+        self.refresh = response.data['refresh']
+
+    def tearDown(self):
+        revocation_cache().clear()
+
+    def _refresh(self):
+        return self.client.post(reverse('token_refresh'), {'refresh': self.refresh}, format='json')
+
+    def test_refresh_uses_embedded_claims_without_queries(self):
+        # A primeira renovação recarrega as revogações do banco; as seguintes só leem o cache
+        with self.assertNumQueries(1):
+            self._refresh()
+        with self.assertNumQueries(0):
+            response = self._refresh()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        access = AccessToken(response.data['access'])
+        self.assertEqual(access['username'], 'employee')
+        self.assertEqual(access['role'], User.Role.EMPLOYEE)
+
+    def test_revoked_token_cannot_refresh(self):
+        response = self.client.post(reverse('token_revoke'), {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_205_RESET_CONTENT)
+        self.assertEqual(self._refresh().status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_revokes_existing_tokens(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('nova-senha123')
+            self.user.save()
+        self.assertEqual(self._refresh().status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivation_revokes_existing_tokens(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            user = User.objects.get(pk=self.user.pk)
+            user.is_active = False
+            user.save()
+        self.assertEqual(self._refresh().status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_unrelated_change_keeps_tokens(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = 'Ana'
+            self.user.save()
+        self.assertEqual(self._refresh().status_code, status.HTTP_200_OK)
+
+    def test_revocations_survive_cache_loss(self):
+        other = self.client.post(
+            reverse('token_obtain_pair'), {'username': 'employee', 'password': 'employee123'}, format='json'
+        ).data['refresh']
+        self.client.post(reverse('token_revoke'), {'refresh': other}, format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('nova-senha123')
+            self.user.save()
+        self.assertEqual(TokenRevocation.objects.count(), 2)
+
+        # Reinício do processo (ou outro worker com cache próprio)
+        revocation_cache().clear()
+        self.assertEqual(self._refresh().status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post(reverse('token_refresh'), {'refresh': other}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_login_right_after_password_change_is_not_revoked(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('nova-senha123')
+            self.user.save()
+        # Provavelmente no mesmo segundo da troca: "iat" sozinho não os distingue
+        self.refresh = self.client.post(
+            reverse('token_obtain_pair'), {'username': 'employee', 'password': 'nova-senha123'}, format='json'
+        ).data['refresh']
+
+        self.assertEqual(self._refresh().status_code, status.HTTP_200_OK)
+
+    def test_access_token_does_not_copy_issue_instant(self):
+        access = AccessToken(self._refresh().data['access'])
+        self.assertNotIn('issued_at', access.payload)
+
+    def test_revocations_outlive_culls_of_the_default_cache(self):
+        self.client.post(reverse('token_revoke'), {'refresh': self.refresh}, format='json')
+        self._refresh()
+
+        # Baldes de throttle e caches de leitura enchem o cache padrão (MAX_ENTRIES=300)
+        cache.set_many({f'throttle:token:x:{i}': i for i in range(1000)})
+
+        self.assertEqual(self._refresh().status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_check_warns_on_per_process_cache_with_several_workers(self):
+        with mock.patch.dict('os.environ', {'WEB_CONCURRENCY': '4'}):
+            self.assertEqual([message.id for message in check_revocation_cache(None)], ['api.W002'])
+        with mock.patch.dict('os.environ', {'WEB_CONCURRENCY': '1'}):
+            self.assertEqual(check_revocation_cache(None), [])
+
+
+class CachedMeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='employee',
+            password='employee123',
+            email='employee@example.com',
+            role=User.Role.EMPLOYEE
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('me')
+
+    def test_repeated_calls_use_cache_and_etag(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data['username'], 'employee')
+
+        with mock.patch('api.views.UserSerializer') as serializer:
+            second = self.client.get(self.url)
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+
+        serializer.assert_not_called()
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_save_invalidates_cache_and_etag(self):
+        first = self.client.get(self.url)
+
+        self.user.first_name = 'Ana'
+        self.user.save(update_fields=['first_name'])
+        self.user.refresh_from_db()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['first_name'], 'Ana')
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+    def test_update_fields_persist_the_new_version(self):
+        version = self.user.cache_version
+
+        self.user.phone = '11999999999'
+        self.user.save(update_fields=['phone'])
+
+        self.assertNotEqual(self.user.cache_version, version)
+        self.assertEqual(User.objects.get(pk=self.user.pk).cache_version, self.user.cache_version)
+
+    def test_login_does_not_invalidate(self):
+        version = self.user.cache_version
+        self.user.last_login = timezone.now()
+        self.user.save(update_fields=['last_login'])
+        self.assertEqual(User.objects.get(pk=self.user.pk).cache_version, version)
@@ -0,0 +1,215 @@
+#api/tests_branches.py
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from datetime import timedelta
+from .models import User, Branch, Service, Appointment, AppointmentTombstone
+
+
+class BranchPartitioningTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.north = Branch.objects.create(name='Norte')
+        self.south = Branch.objects.create(name='Sul')
+
+        self.admin = User.objects.create_superuser(
+            username='admin',
+            password='admin123',
+            email='admin@example.com',
+            role=User.Role.ADMIN
+        )
+        self.north_manager = User.objects.create_user(
+            username='gerente',
+            password='gerente123',
+            email='gerente@example.com',
+            role=User.Role.ADMIN,
+            branch=self.north
+        )
+        self.north_employee = User.objects.create_user(
+            username='norte',
+            password='employee123',
+            email='norte@example.com',
+            role=User.Role.EMPLOYEE,
+            branch=self.north
+        )
+        self.south_employee = User.objects.create_user(
+            username='sul',
+            password='employee123',
+            email='sul@example.com',
+            role=User.Role.EMPLOYEE,
+            branch=self.south
+        )
+        # Filiais diferentes podem oferecer serviços com o mesmo nome
+        self.north_service = Service.objects.create(name='Corte de Cabelo', duration=30, price=50, branch=self.north)
+        self.south_service = Service.objects.create(name='Corte de Cabelo', duration=30, price=50, branch=self.south)
+
+        start = timezone.now() + timedelta(days=1)
+        self.north_appointment = Appointment.objects.create(
+            service=self.north_service, employee=self.north_employee, start_time=start,
+            client_name='Cliente Norte', client_contact='11999999999'
+        )
+        self.south_appointment = Appointment.objects.create(
+            service=self.south_service, employee=self.south_employee, start_time=start,
+            client_name='Cliente Sul', client_contact='11999999999'
+        )
+
+    def test_appointment_branch_comes_from_employee(self):
+        self.assertEqual(self.north_appointment.branch, self.north)
+        self.assertEqual(self.south_appointment.branch, self.south)
+
+    def test_branch_users_only_see_their_branch(self):
+        self.client.force_authenticate(user=self.north_employee)
+
+        appointments = self.client.get(reverse('appointment-list')).data
+        services = self.client.get(reverse('service-list')).data
+
+        self.assertEqual([a['id'] for a in appointments], [self.north_appointment.id])
+        self.assertEqual([s['id'] for s in services], [self.north_service.id])
+        response = self.client.get(reverse('appointment-detail', args=[self.south_appointment.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_branch_admin_only_manages_their_branch(self):
+        self.client.force_authenticate(user=self.north_manager)
+
+        employees = self.client.get(reverse('employee-list')).data
+        self.assertEqual([e['id'] for e in employees], [self.north_employee.id])
+        response = self.client.patch(reverse('service-detail', args=[self.south_service.id]), {'price': '60.00'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_central_admin_sees_all_branches_or_one_with_param(self):
+        self.client.force_authenticate(user=self.admin)
+        url = reverse('appointment-list')
+
+        self.assertEqual(len(self.client.get(url).data), 2)
+        response = self.client.get(url, {'branch': self.south.id})
+        self.assertEqual([a['id'] for a in response.data], [self.south_appointment.id])
+        self.assertEqual(self.client.get(url, {'branch': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(reverse('service-list'), {'branch': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_branchless_staff_member_sees_no_branch(self):
+        loose = User.objects.create_user(
+            username='solto', password='employee123', email='solto@example.com', role=User.Role.EMPLOYEE
+        )
+        self.client.force_authenticate(user=loose)
+
+        self.assertEqual(self.client.get(reverse('appointment-list')).data, [])
+        self.assertEqual(self.client.get(reverse('service-list'), {'branch': self.north.id}).data, [])
+        token = self.client.get(reverse('appointment-changes')).data['next']
+        self.south_appointment.delete()
+        self.assertEqual(self.client.get(reverse('appointment-changes'), {'since': token}).data['deleted'], [])
+
+    def test_central_admin_must_pick_branch_for_staff_and_services(self):
+        self.client.force_authenticate(user=self.admin)
+
+        response = self.client.post(reverse('employee-list'), {
+            'username': 'novo', 'password': 'employee123', 'email': 'novo@example.com',
+            'first_name': 'Novo', 'last_name': 'Funcionário',
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('branch', response.data)
+        response = self.client.post(reverse('service-list'), {'name': 'Escova', 'duration': 30, 'price': '40.00'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('branch', response.data)
+
+        # Administradores podem ficar sem filial
+        response = self.client.post(reverse('administrator-list'), {
+            'username': 'central', 'email': 'central@example.com', 'first_name': 'Adm', 'last_name': 'Central',
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIsNone(response.data['branch'])
+
+    def test_single_branch_is_the_default_for_central_admin(self):
+        self.south_appointment.delete()
+        self.south_service.delete()
+        self.south_employee.delete()
+        self.south.delete()
+        self.client.force_authenticate(user=self.admin)
+
+        response = self.client.post(reverse('service-list'), {'name': 'Escova', 'duration': 30, 'price': '40.00'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['branch'], self.north.id)
+
+    def test_branch_query_filters_on_branch_id(self):
+        self.client.force_authenticate(user=self.north_employee)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('appointment-list'))
+
+        sql = [q['sql'] for q in queries if 'FROM "api_appointment"' in q['sql']]
+        self.assertTrue(sql)
+        self.assertIn('"api_appointment"."branch_id" = %d' % self.north.id, sql[-1])
+
+    def test_created_service_defaults_to_creator_branch(self):
+        self.client.force_authenticate(user=self.north_manager)
+        url = reverse('service-list')
+
+        response = self.client.post(url, {'name': 'Escova', 'duration': 30, 'price': '40.00'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['branch'], self.north.id)
+
+        response = self.client.post(url, {'name': 'Barba', 'duration': 30, 'price': '40.00', 'branch': self.south.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('branch', response.data)
+
+    def test_service_name_is_unique_within_branch_only(self):
+        self.client.force_authenticate(user=self.north_manager)
+        url = reverse('service-list')
+
+        response = self.client.post(url, {'name': 'Escova', 'duration': 30, 'price': '40.00'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.post(url, {'name': 'Escova', 'duration': 30, 'price': '40.00'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('name', response.data)
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post(url, {'name': 'Escova', 'duration': 30, 'price': '40.00', 'branch': self.south.id})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_cannot_book_service_without_branch(self):
+        shared = Service.objects.create(name='Hidratação', duration=30, price=50)
+        self.client.force_authenticate(user=self.north_employee)
+
+        self.assertNotIn(shared.id, [s['id'] for s in self.client.get(reverse('service-list')).data])
+        response = self.client.post(reverse('appointment-list'), {
+            'client_name': 'Cliente',
+            'client_contact': '11999999999',
+            'service_id': shared.id,
+            'employee_id': self.north_employee.id,
+            'start_time': (timezone.now() + timedelta(days=2)).isoformat(),
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('service', response.data)
+
+    def test_cannot_book_staff_or_service_from_another_branch(self):
+        self.client.force_authenticate(user=self.north_employee)
+        data = {
+            'client_name': 'Cliente',
+            'client_contact': '11999999999',
+            'service_id': self.north_service.id,
+            'employee_id': self.south_employee.id,
+            'start_time': (timezone.now() + timedelta(days=2)).isoformat(),
+        }
+
+        response = self.client.post(reverse('appointment-list'), data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        data.update(employee_id=self.north_employee.id, service_id=self.south_service.id)
+        response = self.client.post(reverse('appointment-list'), data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_sync_only_reports_deletions_from_own_branch(self):
+        self.client.force_authenticate(user=self.north_employee)
+        url = reverse('appointment-changes')
+        token = self.client.get(url).data['next']
+
+        south_id = self.south_appointment.id
+        self.south_appointment.delete()
+        self.assertTrue(AppointmentTombstone.objects.filter(appointment_id=south_id, branch_id=self.south.id).exists())
+
+        response = self.client.get(url, {'since': token})
+        self.assertEqual(response.data['deleted'], [])
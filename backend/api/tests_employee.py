@@ -1,12 +1,22 @@
-from django.test import TestCase
+import csv
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.hashers import check_password
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 from .models import User, Appointment, Service
+from .onboarding import hash_passwords
 from django.utils import timezone
 from datetime import timedelta
 import json
-from django.db import DatabaseError
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from concurrent.futures import ProcessPoolExecutor
 from unittest.mock import patch
 
 
@@ -107,6 +117,50 @@ class EmployeeRegistrationTests(TestCase):
         self.assertIn('pelo menos 6 caracteres',
                       str(response.data['password']))
 
+    def test_duplicate_username_with_different_case_fails(self):
+        self.client.force_authenticate(user=self.admin)
+        data = {**self.valid_data, 'username': 'Existing'}
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, data=json.dumps(data), content_type='application/json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['username'], ['Este nome de usuário já está em uso'])
+        username_checks = [q for q in queries.captured_queries if '"api_user"."username"' in q['sql']]
+        self.assertEqual(len(username_checks), 1)
+
+    def test_username_with_invalid_characters_fails(self):
+        self.client.force_authenticate(user=self.admin)
+        data = {**self.valid_data, 'username': 'bad name/..'}
+
+        for url in (self.url, reverse('user-list'), reverse('administrator-list')):
+            response = self.client.post(url, data=json.dumps(data), content_type='application/json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('username', response.data)
+
+        self.rows = [{**data, 'first_name': 'Pro', 'last_name': 'Silva'}]
+        response = self.client.post(
+            reverse('professional-bulk'), data=json.dumps(self.rows), content_type='application/json'
+        )
+        self.assertIn('username', response.data[0])
+
+    def test_username_race_is_reported_as_validation_error(self):
+        self.client.force_authenticate(user=self.admin)
+        # Simula outro cadastro gravado entre a validação e o INSERT
+        with patch('rest_framework.validators.UniqueValidator.__call__'):
+            response = self.client.post(
+                self.url,
+                data=json.dumps({**self.valid_data, 'username': 'existing'}),
+                content_type='application/json'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['username'], ['Este nome de usuário já está em uso'])
+
+    def test_lowercase_index_rejects_bulk_inserts(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            User.objects.bulk_create([User(username='EXISTING', email='x@example.com')])
+
 
 class EmployeeDeletionTests(TestCase):
     def setUp(self):
@@ -158,3 +212,94 @@ class EmployeeDeletionTests(TestCase):
         url = reverse('employee-detail', args=[999])
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ProfessionalBulkOnboardingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(
+            username='admin',
+            password='admin123',
+            email='admin@example.com',
+            role=User.Role.ADMIN
+        )
+        self.existing = User.objects.create_user(
+            username='existing',
+            password='professional123',
+            email='existing@example.com',
+            role=User.Role.PROFESSIONAL
+        )
+        self.url = reverse('professional-bulk')
+        self.rows = [
+            {
+                'username': f'Pro{i}',
+                'first_name': f'Profissional {i}',
+                'last_name': 'Silva',
+                'email': f'pro{i}@example.com',
+                'password': f'senha{i}23'
+            }
+            for i in range(5)
+        ]
+
+    def test_bulk_onboarding_creates_all_rows(self):
+        self.client.force_authenticate(user=self.admin)
+        etag = self.client.get(reverse('professional-list'))['ETag']
+
+        response = self.client.post(self.url, data=json.dumps(self.rows), content_type='application/json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 5)
+        created = User.objects.get(username='pro3')
+        self.assertEqual(created.role, User.Role.PROFESSIONAL)
+        self.assertFalse(created.is_staff)
+        self.assertTrue(created.check_password('senha323'))
+        self.assertNotEqual(self.client.get(reverse('professional-list'))['ETag'], etag)
+
+    def test_bulk_onboarding_rejects_duplicates_without_saving(self):
+        self.client.force_authenticate(user=self.admin)
+        self.rows[1]['username'] = 'EXISTING'
+        self.rows[4]['email'] = self.rows[0]['email']
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, data=json.dumps(self.rows), content_type='application/json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[1], {'username': ['Este nome de usuário já está em uso']})
+        self.assertIn('email', response.data[4])
+        self.assertEqual(response.data[0], {})
+        self.assertFalse(User.objects.filter(username='pro0').exists())
+        uniqueness_checks = [q for q in queries.captured_queries if 'FROM "api_user"' in q['sql'] and ' IN (' in q['sql']]
+        self.assertEqual(len(uniqueness_checks), 2)
+
+    def test_bulk_onboarding_requires_admin(self):
+        self.client.force_authenticate(user=self.existing)
+        response = self.client.post(self.url, data=json.dumps(self.rows), content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_passwords_are_hashed_in_parallel_workers(self):
+        passwords = [f'senha{i}' for i in range(8)]
+        with patch('api.onboarding.ProcessPoolExecutor', wraps=ProcessPoolExecutor) as pool:
+            hashes = hash_passwords(passwords, workers=2)
+
+        # Processos novos, sem herdar threads nem conexões do servidor
+        self.assertEqual(pool.call_args.kwargs['mp_context'].get_start_method(), 'spawn')
+        self.assertEqual(len(hashes), 8)
+        for password, encoded in zip(passwords, hashes):
+            self.assertTrue(check_password(password, encoded))
+
+    @override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+    def test_parallel_workers_use_the_current_hashers(self):
+        hashes = hash_passwords([f'senha{i}' for i in range(8)], workers=2)
+        self.assertTrue(all(encoded.startswith('md5$') for encoded in hashes))
+
+    def test_onboard_command_reads_csv(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as file:
+            writer = csv.DictWriter(file, fieldnames=list(self.rows[0]))
+            writer.writeheader()
+            writer.writerows(self.rows)
+        self.addCleanup(os.unlink, file.name)
+
+        call_command('onboard_professionals', file.name, '--workers', '1', stdout=StringIO())
+
+        self.assertEqual(User.objects.filter(role=User.Role.PROFESSIONAL).count(), 6)
@@ -0,0 +1,158 @@
+# api/tests_events.py
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+from .events import get_broker
+from .models import User, Service, Appointment
+from django.utils import timezone
+from datetime import timedelta
+
+
+class AppointmentStreamTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.stream_url = reverse('appointment-stream')
+
+        self.employee = User.objects.create_user(
+            username='employee',
+            password='employee123',
+            email='employee@example.com',
+            role=User.Role.EMPLOYEE
+        )
+
+        self.employee2 = User.objects.create_user(
+            username='employee2',
+            password='employee123',
+            email='employee2@example.com',
+            role=User.Role.EMPLOYEE
+        )
+
+        self.service = Service.objects.create(
+            name='Corte de Cabelo',
+            duration=30,
+            price=50.00,
+            is_active=True
+        )
+
+        self.client.force_authenticate(user=self.employee)
+        self.token = str(AccessToken.for_user(self.employee))
+        self.async_client = AsyncClient()
+
+    async def _open_stream(self, query=''):
+        response = await self.async_client.get(
+            self.stream_url + query,
+            headers={'Authorization': f'Bearer {self.token}', 'Accept': 'text/event-stream'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b': connected\n\n')
+        return chunks
+
+    @sync_to_async
+    def _create_appointment(self, employee, days=1):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Appointment.objects.create(
+                service=self.service,
+                employee=employee,
+                start_time=timezone.now() + timedelta(days=days),
+                client_name='Cliente Teste',
+                client_contact='11999999999'
+            )
+
+    @sync_to_async
+    def _cancel(self, appointment):
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.cancel()
+
+    async def _next(self, chunks):
+        return await asyncio.wait_for(anext(chunks), timeout=5)
+
+    async def _disconnect(self, chunks):
+        """Como o ASGIHandler na desconexão do cliente: cancela a leitura em andamento"""
+        reading = asyncio.ensure_future(anext(chunks))
+        await asyncio.sleep(0)
+        reading.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await reading
+
+    async def test_stream_publishes_created_and_cancelled_events(self):
+        chunks = await self._open_stream()
+
+        appointment = await self._create_appointment(self.employee)
+        self.assertIn(b'event: created', await self._next(chunks))
+
+        await self._cancel(appointment)
+        chunk = await self._next(chunks)
+        self.assertIn(b'event: cancelled', chunk)
+        self.assertIn(f'"id": {appointment.id}'.encode(), chunk)
+        await self._disconnect(chunks)
+
+    async def test_stream_filters_by_employee(self):
+        chunks = await self._open_stream(f'?employee={self.employee2.id}')
+
+        await self._create_appointment(self.employee)
+        appointment = await self._create_appointment(self.employee2, days=2)
+
+        chunk = await self._next(chunks)
+        self.assertIn(f'"id": {appointment.id}'.encode(), chunk)
+        await self._disconnect(chunks)
+
+    async def test_subscription_is_created_by_the_body_and_released_on_close(self):
+        broker = get_broker()
+        before = len(broker._subscriptions)
+        response = await self.async_client.get(
+            self.stream_url, headers={'Authorization': f'Bearer {self.token}'}
+        )
+        # Resposta ainda não consumida: nenhuma assinatura aberta
+        self.assertEqual(len(broker._subscriptions), before)
+
+        chunks = aiter(response.streaming_content)
+        await anext(chunks)
+        self.assertEqual(len(broker._subscriptions), before + 1)
+        await self._disconnect(chunks)
+        self.assertEqual(len(broker._subscriptions), before)
+
+    async def test_asgi_handler_sends_events_without_waiting_for_the_end(self):
+        """Pela aplicação ASGI real: o primeiro pedaço chega antes de o stream terminar"""
+        messages = asyncio.Queue()
+        disconnect = asyncio.Event()
+
+        async def receive():
+            if not hasattr(receive, 'sent'):
+                receive.sent = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': self.stream_url, 'raw_path': self.stream_url.encode(),
+            'query_string': b'', 'root_path': '', 'server': ('testserver', 80), 'client': ('127.0.0.1', 1),
+            'headers': [(b'host', b'testserver'), (b'authorization', f'Bearer {self.token}'.encode())],
+        }
+        task = asyncio.create_task(ASGIHandler()(scope, receive, messages.put))
+        try:
+            start = await asyncio.wait_for(messages.get(), timeout=5)
+            self.assertEqual(start['status'], status.HTTP_200_OK)
+            body = await asyncio.wait_for(messages.get(), timeout=5)
+            self.assertEqual(body['body'], b': connected\n\n')
+            self.assertTrue(body['more_body'])
+        finally:
+            disconnect.set()
+            await asyncio.wait_for(task, timeout=5)
+
+    def test_stream_is_refused_under_wsgi(self):
+        response = self.client.get(self.stream_url)
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+
+    def test_stream_with_invalid_date_fails(self):
+        response = self.client.get(self.stream_url + '?date=amanha')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,137 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from .fastserializers import CompiledSerializer, NotCompilable
+from .models import Appointment, AppointmentArchive, Service, User
+from .serializers import AppointmentArchiveSerializer, AppointmentSerializer, ServiceSerializer, UserSerializer
+from .views import AppointmentViewSet
+
+
+class CompiledSerializerParityTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username='admin',
+            password='admin123',
+            email='admin@example.com',
+            role=User.Role.ADMIN
+        )
+        self.employee = User.objects.create_user(
+            username='employee',
+            password='employee123',
+            email='employee@example.com',
+            first_name='Ana',
+            phone='11988887777',
+            role=User.Role.EMPLOYEE
+        )
+        self.service = Service.objects.create(name='Corte de Cabelo', duration=30, price='50.10', is_active=True)
+        self.idle_service = Service.objects.create(name='Escova', duration=45, price='80.00', is_active=False)
+
+        start = timezone.now() + timedelta(days=1)
+        self.appointments = [
+            Appointment.objects.create(
+                service=self.service,
+                employee=self.employee,
+                start_time=start + timedelta(hours=i),
+                client_name=f'Cliente {i}',
+                client_contact='11999999999',
+                notes='Prefere tesoura' if i % 2 else None
+            )
+            for i in range(3)
+        ]
+        self.appointments[0].cancel()
+        AppointmentArchive.objects.create(
+            id=999, service=self.idle_service, employee=self.employee,
+            client_name='Cliente antigo', client_contact='11999999999',
+            start_time=timezone.now() - timedelta(days=400),
+            end_time=timezone.now() - timedelta(days=400) + timedelta(minutes=45),
+            status=Appointment.Status.COMPLETED, version=3,
+            created_at=timezone.now() - timedelta(days=401),
+            updated_at=timezone.now() - timedelta(days=400),
+        )
+
+    def _context(self, **params):
+        request = Request(APIRequestFactory().get('/', params))
+        request.user = self.admin
+        return {'request': request}
+
+    def assertParity(self, serializer_class, queryset, **params):
+        context = self._context(**params)
+        expected = serializer_class(queryset, many=True, context=context).data
+        compiled = CompiledSerializer(serializer_class(context=context))
+        self.assertEqual(compiled.data(queryset), expected)
+        self.assertTrue(expected)
+
+    def test_appointment_serializer(self):
+        self.assertParity(AppointmentSerializer, Appointment.objects.order_by('start_time', 'id'))
+
+    def test_appointment_serializer_with_sparse_fieldset(self):
+        queryset = Appointment.objects.order_by('start_time', 'id')
+        self.assertParity(AppointmentSerializer, queryset, fields='id,start_time,service.name,service.can_delete')
+        self.assertParity(AppointmentSerializer, queryset, omit='notes,employee')
+
+    def test_archive_serializer(self):
+        self.assertParity(AppointmentArchiveSerializer, AppointmentArchive.objects.all())
+
+    def test_service_serializer(self):
+        self.assertParity(ServiceSerializer, Service.objects.order_by('id'))
+
+    def test_user_serializer(self):
+        self.assertParity(UserSerializer, User.objects.order_by('id'))
+
+    def test_method_field_without_expression_is_not_compilable(self):
+        class NameSerializer(serializers.ModelSerializer):
+            display = serializers.SerializerMethodField()
+
+            class Meta:
+                model = User
+                fields = ['id', 'display']
+
+            def get_display(self, obj):
+                return obj.get_full_name()
+
+        with self.assertRaises(NotCompilable):
+            CompiledSerializer(NameSerializer())
+
+
+class FastListViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.employee = User.objects.create_user(
+            username='employee',
+            password='employee123',
+            email='employee@example.com',
+            role=User.Role.EMPLOYEE
+        )
+        self.client.force_authenticate(user=self.employee)
+        self.service = Service.objects.create(name='Corte de Cabelo', duration=30, price=50.00, is_active=True)
+        start = timezone.now() + timedelta(days=1)
+        for i in range(5):
+            Appointment.objects.create(
+                service=self.service,
+                employee=self.employee,
+                start_time=start + timedelta(hours=i),
+                client_name=f'Cliente {i}',
+                client_contact='11999999999'
+            )
+        self.url = reverse('appointment-list')
+
+    def test_fast_list_matches_regular_list(self):
+        fast = self.client.get(self.url)
+        with mock.patch.object(AppointmentViewSet, 'fast_list', False):
+            regular = self.client.get(self.url)
+
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast.content, regular.content)
+
+    def test_fast_list_runs_a_single_query(self):
+        # ETag (contador de versão e próxima reserva) + listagem
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data), 5)
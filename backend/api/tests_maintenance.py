@@ -0,0 +1,177 @@
+# api/tests_maintenance.py
+
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from rest_framework import status
+from rest_framework.test import APIClient
+from .maintenance import archive_appointments, sweep_stale_appointments
+from .models import User, Service, Appointment, AppointmentArchive, AppointmentTombstone
+
+
+class SweepAppointmentsTests(TestCase):
+    def setUp(self):
+        self.employee = User.objects.create_user(
+            username='employee',
+            password='employee123',
+            email='employee@example.com',
+            role=User.Role.EMPLOYEE
+        )
+
+        self.service = Service.objects.create(
+            name='Corte de Cabelo',
+            duration=30,
+            price=50.00,
+            is_active=True
+        )
+
+        self.stale = [self._create(timezone.now() - timedelta(days=day)) for day in (1, 2, 3)]
+        self.recent = self._create(timezone.now() - timedelta(minutes=45))
+        self.future = self._create(timezone.now() + timedelta(days=1))
+
+    def _create(self, start_time):
+        appointment = Appointment(
+            service=self.service,
+            employee=self.employee,
+            start_time=start_time,
+            client_name='Cliente Teste',
+            client_contact='11999999999'
+        )
+        appointment.save(skip_validation=True)
+        return appointment
+
+    def test_sweep_marks_stale_reservations_as_no_show(self):
+        swept = sweep_stale_appointments(timedelta(hours=2), Appointment.Status.NO_SHOW, batch_size=2)
+        self.assertEqual(swept, 3)
+
+        for appointment in self.stale:
+            appointment.refresh_from_db()
+            self.assertEqual(appointment.status, Appointment.Status.NO_SHOW)
+            self.assertEqual(appointment.version, 2)
+
+        self.recent.refresh_from_db()
+        self.future.refresh_from_db()
+        self.assertEqual(self.recent.status, Appointment.Status.RESERVED)
+        self.assertEqual(self.future.status, Appointment.Status.RESERVED)
+
+    def test_sweep_publishes_status_change_per_appointment(self):
+        with mock.patch('api.maintenance.get_broker') as get_broker:
+            with self.captureOnCommitCallbacks(execute=True):
+                sweep_stale_appointments(timedelta(hours=2), Appointment.Status.COMPLETED, batch_size=2)
+
+        events = [call.args[0] for call in get_broker.return_value.publish.call_args_list]
+        self.assertEqual(
+            sorted(event['appointment']['id'] for event in events), sorted(a.id for a in self.stale)
+        )
+        self.assertEqual({event['type'] for event in events}, {Appointment.Status.COMPLETED})
+        self.assertEqual({event['appointment']['status'] for event in events}, {Appointment.Status.COMPLETED})
+
+    def test_sweep_is_idempotent(self):
+        sweep_stale_appointments(timedelta(hours=2), Appointment.Status.COMPLETED)
+        self.assertEqual(sweep_stale_appointments(timedelta(hours=2), Appointment.Status.COMPLETED), 0)
+        self.assertEqual(Appointment.objects.filter(status=Appointment.Status.COMPLETED).count(), 3)
+
+    def test_command_accepts_age_and_policy(self):
+        call_command('sweep_appointments', older_than='10m', policy='completed', stdout=StringIO())
+        self.recent.refresh_from_db()
+        self.assertEqual(self.recent.status, Appointment.Status.COMPLETED)
+
+
+class ArchiveAppointmentsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.history_url = reverse('appointment-history')
+
+        self.employee = User.objects.create_user(
+            username='employee',
+            password='employee123',
+            email='employee@example.com',
+            role=User.Role.EMPLOYEE
+        )
+        self.client.force_authenticate(user=self.employee)
+
+        self.service = Service.objects.create(
+            name='Corte de Cabelo',
+            duration=30,
+            price=50.00,
+            is_active=True
+        )
+
+        now = timezone.now()
+        self.old_completed = self._create(now - timedelta(days=200), Appointment.Status.COMPLETED)
+        self.old_cancelled = self._create(now - timedelta(days=190), Appointment.Status.CANCELLED)
+        self.old_reserved = self._create(now - timedelta(days=185), Appointment.Status.RESERVED)
+        self.recent_completed = self._create(now - timedelta(days=2), Appointment.Status.COMPLETED)
+
+    def _create(self, start_time, status_):
+        appointment = Appointment(
+            service=self.service,
+            employee=self.employee,
+            start_time=start_time,
+            client_name='Cliente Teste',
+            client_contact='11999999999',
+            status=status_
+        )
+        appointment.save(skip_validation=True)
+        return appointment
+
+    def test_archive_moves_only_old_finished_appointments(self):
+        archived = archive_appointments(timezone.now() - timedelta(days=180), batch_size=1)
+        self.assertEqual(archived, 2)
+
+        self.assertEqual(
+            set(AppointmentArchive.objects.values_list('id', flat=True)),
+            {self.old_completed.id, self.old_cancelled.id}
+        )
+        self.assertEqual(
+            set(Appointment.objects.values_list('id', flat=True)),
+            {self.old_reserved.id, self.recent_completed.id}
+        )
+
+    def test_archived_appointments_are_reported_as_deleted_to_sync(self):
+        url = reverse('appointment-changes')
+        token = self.client.get(url).data['next']
+
+        archive_appointments(timezone.now() - timedelta(days=180))
+
+        # Uma versão por lápide: uma página menor que o lote não perde nenhuma
+        first = self.client.get(url, {'since': token, 'limit': 1}).data
+        second = self.client.get(url, {'since': first['next'], 'limit': 1}).data
+        self.assertEqual(
+            first['deleted'] + second['deleted'], [self.old_completed.id, self.old_cancelled.id]
+        )
+        versions = AppointmentTombstone.objects.values_list('sync_version', flat=True)
+        self.assertEqual(len(set(versions)), 2)
+
+    def test_history_unions_archive_when_range_crosses_boundary(self):
+        archive_appointments(timezone.now() - timedelta(days=180))
+
+        start = timezone.localdate() - timedelta(days=365)
+        response = self.client.get(self.history_url, {'start': start, 'end': timezone.localdate()})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [row['id'] for row in response.data],
+            [self.old_completed.id, self.old_cancelled.id, self.old_reserved.id, self.recent_completed.id]
+        )
+        self.assertEqual(response.data[0]['service']['name'], 'Corte de Cabelo')
+
+    def test_history_with_recent_range_reads_only_current_table(self):
+        archive_appointments(timezone.now() - timedelta(days=180))
+
+        start = timezone.localdate() - timedelta(days=7)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.history_url, {'start': start, 'end': timezone.localdate()})
+        self.assertEqual([row['id'] for row in response.data], [self.recent_completed.id])
+        self.assertFalse(any(
+            'FROM "api_appointmentarchive" INNER JOIN' in query['sql'] for query in queries.captured_queries
+        ))
+
+    def test_history_without_range_fails(self):
+        response = self.client.get(self.history_url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,73 @@
+# api/tests_reminders.py
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from datetime import timedelta
+from .models import User, Service, Appointment, Reminder
+from .notifications import BaseTransport
+from .reminders import dispatch_due
+
+
+class RecordingTransport(BaseTransport):
+    def __init__(self):
+        self.messages = []
+
+    def send(self, recipient, message):
+        self.messages.append((recipient, message))
+
+
+@override_settings(REMINDER_LEAD_TIME=timedelta(hours=2))
+class ReminderTests(TestCase):
+    def setUp(self):
+        self.transport = RecordingTransport()
+
+        self.employee = User.objects.create_user(
+            username='employee',
+            password='employee123',
+            email='employee@example.com',
+            role=User.Role.EMPLOYEE
+        )
+
+        self.service = Service.objects.create(
+            name='Corte de Cabelo',
+            duration=30,
+            price=50.00,
+            is_active=True
+        )
+
+        self.appointment = Appointment.objects.create(
+            service=self.service,
+            employee=self.employee,
+            start_time=timezone.now() + timedelta(days=1),
+            client_name='Cliente Teste',
+            client_contact='11999999999'
+        )
+
+    def test_reminder_is_scheduled_before_start_time(self):
+        reminder = self.appointment.reminder
+        self.assertEqual(reminder.status, Reminder.Status.PENDING)
+        self.assertEqual(reminder.due_at, self.appointment.start_time - timedelta(hours=2))
+
+    def test_reschedule_moves_reminder(self):
+        self.appointment.start_time += timedelta(days=1)
+        self.appointment.save()
+
+        reminder = Reminder.objects.get(appointment=self.appointment)
+        self.assertEqual(reminder.due_at, self.appointment.start_time - timedelta(hours=2))
+
+    def test_cancel_cancels_reminder(self):
+        self.appointment.cancel()
+        self.assertEqual(Reminder.objects.get().status, Reminder.Status.CANCELLED)
+
+    def test_dispatch_sends_only_due_reminders_once(self):
+        self.assertEqual(dispatch_due('worker', transport=self.transport), 0)
+
+        Reminder.objects.update(due_at=timezone.now())
+        self.assertEqual(dispatch_due('worker', transport=self.transport), 1)
+        self.assertEqual(dispatch_due('worker', transport=self.transport), 0)
+
+        self.assertEqual(len(self.transport.messages), 1)
+        recipient, message = self.transport.messages[0]
+        self.assertEqual(recipient, '11999999999')
+        self.assertIn('Corte de Cabelo', message)
+        self.assertEqual(Reminder.objects.get().status, Reminder.Status.SENT)
@@ -0,0 +1,56 @@
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock
+from zoneinfo import ZoneInfo
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from . import renderers
+from .management.commands.benchmark_json import sample_appointments
+from .parsers import ORJSONParser
+from .renderers import ORJSONRenderer
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    def test_output_matches_json_renderer(self):
+        data = {
+            'appointments': sample_appointments(5),
+            'price': Decimal('50.10'),
+            'local': datetime(2024, 3, 10, 9, 30, 15, 123456, tzinfo=ZoneInfo('America/Sao_Paulo')),
+            'utc': datetime(2024, 3, 10, 12, 30, tzinfo=dt_timezone.utc),
+            'label': gettext_lazy('Reservado'),
+            1: 'chave numérica',
+            'separator': 'linha\u2028nova',
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_sao_paulo_datetime_keeps_offset(self):
+        value = datetime(2024, 3, 10, 9, 30, tzinfo=ZoneInfo('America/Sao_Paulo'))
+        self.assertEqual(ORJSONRenderer().render({'t': value}), b'{"t":"2024-03-10T09:30:00-03:00"}')
+
+    def test_indented_output_falls_back_to_json_renderer(self):
+        data = {'price': Decimal('10.5')}
+        self.assertEqual(
+            ORJSONRenderer().render(data, 'application/json; indent=4'),
+            JSONRenderer().render(data, 'application/json; indent=4')
+        )
+
+    def test_falls_back_without_orjson(self):
+        data = sample_appointments(2)
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+class ORJSONParserTests(SimpleTestCase):
+    def test_parses_like_json_parser(self):
+        body = JSONRenderer().render(sample_appointments(3))
+        self.assertEqual(ORJSONParser().parse(BytesIO(body)), JSONParser().parse(BytesIO(body)))
+
+    def test_invalid_body_raises_parse_error(self):
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(BytesIO(b'{"client_name": '))
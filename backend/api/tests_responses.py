@@ -0,0 +1,121 @@
+import gzip
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from .middleware import CompressionMiddleware, accepted_encodings
+from .models import Appointment, Service, User
+from .views import AppointmentViewSet
+
+
+@override_settings(RESPONSE_COMPRESSION_MIN_SIZE=1024)
+class CompressionMiddlewareTests(SimpleTestCase):
+    def _process(self, response, accept_encoding='gzip, deflate'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_large_response_is_gzipped(self):
+        body = b'[' + b','.join(b'{"id":%d}' % i for i in range(500)) + b']'
+        response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = '"abc"'
+
+        response = self._process(response)
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), body)
+        self.assertEqual(response['ETag'], 'W/"abc"')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    async def test_async_mode_compresses_without_a_thread(self):
+        body = b'[' + b','.join(b'{"id":%d}' % i for i in range(500)) + b']'
+
+        async def get_response(request):
+            return HttpResponse(body, content_type='application/json')
+
+        middleware = CompressionMiddleware(get_response)
+        response = await middleware(RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip'))
+
+        self.assertTrue(middleware.async_mode)
+        self.assertEqual(gzip.decompress(response.content), body)
+
+    def test_small_response_is_not_compressed(self):
+        response = self._process(HttpResponse(b'{"id":1}', content_type='application/json'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_identity_only_client_is_not_compressed(self):
+        response = self._process(HttpResponse(b'x' * 4096), accept_encoding='gzip;q=0, identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_event_stream_is_not_compressed(self):
+        response = StreamingHttpResponse(iter([b': connected\n\n']), content_type='text/event-stream')
+        response = self._process(response)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_response_is_compressed_in_chunks(self):
+        chunks = [b'[', b'{"id":1}', b',{"id":2}', b']']
+        response = self._process(StreamingHttpResponse(iter(chunks), content_type='application/json'))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b''.join(chunks))
+
+    def test_accepted_encodings(self):
+        self.assertEqual(accepted_encodings('br;q=1.0, gzip;q=0.8, *;q=0'), {'br', 'gzip'})
+
+
+class StreamedListTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(
+            username='admin',
+            password='admin123',
+            email='admin@example.com',
+            role=User.Role.ADMIN
+        )
+        self.client.force_authenticate(user=self.admin)
+        employee = User.objects.create_user(
+            username='employee',
+            password='employee123',
+            email='employee@example.com',
+            role=User.Role.EMPLOYEE
+        )
+
+        service = Service.objects.create(name='Corte de Cabelo', duration=30, price=50.00, is_active=True)
+        start = timezone.now() + timedelta(days=1)
+        for i in range(7):
+            Appointment.objects.create(
+                service=service,
+                employee=employee,
+                start_time=start + timedelta(hours=i),
+                client_name=f'Cliente {i}',
+                client_contact='11999999999'
+            )
+
+    def _streamed(self, url, **params):
+        response = self.client.get(url, {'format': 'json-stream', **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_streamed_appointments_match_regular_list(self):
+        url = reverse('appointment-list')
+        with mock.patch.object(AppointmentViewSet, 'stream_chunk_size', 3):
+            streamed = self._streamed(url)
+        self.assertEqual(streamed, json.loads(self.client.get(url).content))
+        self.assertEqual(len(streamed), 7)
+
+    def test_streamed_users_match_regular_list(self):
+        url = reverse('user-list')
+        self.assertEqual(
+            self._streamed(url, fields='id,username'),
+            json.loads(self.client.get(url, {'fields': 'id,username'}).content)
+        )
+
+    def test_empty_stream_is_an_empty_array(self):
+        self.assertEqual(self._streamed(reverse('appointment-list'), status='cancelled'), [])
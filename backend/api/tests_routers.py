@@ -0,0 +1,88 @@
+#api/tests_routers.py
+
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from .models import User, Service
+from .routers import PrimaryReplicaRouter, replica_reads, replica_reads_enabled
+
+
+class PrimaryReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    def test_reads_use_replica_only_when_enabled(self):
+        self.assertEqual(self.router.db_for_read(Service), 'default')
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Service), 'replica')
+            self.assertEqual(self.router.db_for_write(Service), 'default')
+        self.assertEqual(self.router.db_for_read(Service), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_uses_default(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Service), 'default')
+
+
+class ReplicaReadViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(
+            username='admin',
+            password='admin123',
+            email='admin@example.com',
+            role=User.Role.ADMIN
+        )
+        self.client.force_authenticate(user=self.admin)
+        Service.objects.create(name='Corte de Cabelo', duration=30, price=50)
+
+    def tearDown(self):
+        cache.clear()
+
+    def _read_targets(self, method, url, data=None):
+        """Executa a requisição e devolve se cada leitura da view foi liberada para réplica"""
+        reads = []
+        original = PrimaryReplicaRouter.db_for_read
+
+        def spy(router, model, **hints):
+            reads.append(replica_reads_enabled())
+            return original(router, model, **hints)
+
+        with mock.patch.object(PrimaryReplicaRouter, 'db_for_read', spy):
+            response = getattr(self.client, method)(url, data)
+        return response, reads
+
+    def test_service_list_reads_from_replica(self):
+        response, reads = self._read_targets('get', reverse('service-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(True, reads)
+        self.assertFalse(replica_reads_enabled())
+
+    def test_appointment_list_stays_on_primary(self):
+        response, reads = self._read_targets('get', reverse('appointment-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn(True, reads)
+
+    def test_write_pins_user_to_primary_for_sticky_window(self):
+        with mock.patch('api.routers.time.time', return_value=1000.0) as now:
+            response, reads = self._read_targets(
+                'post', reverse('service-list'), {'name': 'Escova', 'duration': 30, 'price': '40.00'}
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertNotIn(True, reads)
+
+            _, reads = self._read_targets('get', reverse('service-list'))
+            self.assertNotIn(True, reads)
+
+            # REPLICA_STICKY_SECONDS = 5
+            now.return_value = 1006.0
+            _, reads = self._read_targets('get', reverse('service-list'))
+            self.assertIn(True, reads)
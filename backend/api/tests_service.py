@@ -8,6 +8,7 @@ from .models import User, Service, Appointment
 from django.utils import timezone
 from datetime import timedelta
 import decimal
+from unittest import mock
 
 
 class ServiceCreationTests(TestCase):
@@ -390,4 +391,90 @@ class ServiceDeletionTests(TestCase):
         self.client.force_authenticate(user=self.admin)
         url = reverse('service-detail', args=[999])  # ID inexistente
         response = self.client.delete(url)
-        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class ServiceConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.employee = User.objects.create_user(
+            username='employee',
+            password='employee123',
+            email='employee@example.com',
+            role=User.Role.EMPLOYEE
+        )
+        self.client.force_authenticate(user=self.employee)
+
+        self.service = Service.objects.create(
+            name="Corte de Cabelo",
+            duration=30,
+            price=50.00,
+            is_active=True
+        )
+
+        self.url = reverse('service-list')
+
+    def test_list_returns_etag_and_304_when_unchanged(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_write_to_service_invalidates_etag(self):
+        etag = self.client.get(self.url)['ETag']
+
+        self.service.price = 60.00
+        self.service.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_new_appointment_invalidates_service_etag(self):
+        etag = self.client.get(self.url)['ETag']
+
+        Appointment.objects.create(
+            service=self.service,
+            employee=self.employee,
+            start_time=timezone.now() + timedelta(days=1),
+            client_name='Cliente',
+            client_contact='11999999999'
+        )
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data[0]['can_delete'])
+
+    def test_etag_changes_when_reserved_appointment_starts(self):
+        start = timezone.now() + timedelta(hours=1)
+        Appointment.objects.create(
+            service=self.service,
+            employee=self.employee,
+            start_time=start,
+            client_name='Cliente',
+            client_contact='11999999999'
+        )
+        response = self.client.get(self.url)
+        self.assertFalse(response.data[0]['can_delete'])
+
+        # Sem nenhuma escrita, a reserva deixa de ser futura
+        with mock.patch('django.utils.timezone.now', return_value=start + timedelta(minutes=1)):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data[0]['can_delete'])
+
+    def test_etag_differs_between_list_and_detail(self):
+        list_etag = self.client.get(self.url)['ETag']
+        detail_url = reverse('service-detail', args=[self.service.id])
+        response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_sparse_fieldset_has_its_own_etag(self):
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, {'fields': 'id,name'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0], {'id': self.service.id, 'name': 'Corte de Cabelo'})
@@ -0,0 +1,97 @@
+# api/tests_tasks.py
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from datetime import timedelta
+from .models import User, Service, Appointment, Task
+from .taskqueue import DatabaseBackend, enqueue, task
+
+calls = []
+
+
+@task(name='tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task(name='tests.explode', max_attempts=2)
+def explode():
+    raise RuntimeError('falha')
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+        self.backend = DatabaseBackend()
+
+    def test_enqueue_waits_for_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            enqueue(record, value=1)
+            self.assertFalse(Task.objects.exists())
+
+        callbacks[0]()
+        task_row = Task.objects.get()
+        self.assertEqual(task_row.name, 'tests.record')
+        self.assertEqual(task_row.payload, {'value': 1})
+
+    def test_worker_runs_due_tasks(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue(record, value=1)
+            enqueue(record, value=2)
+            enqueue(record, run_after=timezone.now() + timedelta(hours=1), value=3)
+
+        call_command('run_worker', once=True)
+
+        self.assertEqual(sorted(calls), [1, 2])
+        self.assertEqual(Task.objects.filter(status=Task.Status.DONE).count(), 2)
+        self.assertEqual(Task.objects.filter(status=Task.Status.PENDING).count(), 1)
+
+    def test_claimed_tasks_are_not_claimed_twice(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue(record, value=1)
+
+        self.assertEqual(len(self.backend.claim('worker-1')), 1)
+        self.assertEqual(self.backend.claim('worker-2'), [])
+
+    def test_failing_task_is_retried_then_marked_failed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue(explode)
+
+        self.backend.execute(self.backend.claim('worker')[0])
+        task_row = Task.objects.get()
+        self.assertEqual(task_row.status, Task.Status.PENDING)
+        self.assertEqual(task_row.attempts, 1)
+        self.assertGreater(task_row.run_after, timezone.now())
+
+        Task.objects.update(run_after=timezone.now())
+        self.backend.execute(self.backend.claim('worker')[0])
+        task_row.refresh_from_db()
+        self.assertEqual(task_row.status, Task.Status.FAILED)
+        self.assertIn('RuntimeError', task_row.last_error)
+
+    def test_appointment_creation_enqueues_confirmation(self):
+        employee = User.objects.create_user(
+            username='employee',
+            password='employee123',
+            email='employee@example.com',
+            role=User.Role.EMPLOYEE
+        )
+        service = Service.objects.create(
+            name='Corte de Cabelo',
+            duration=30,
+            price=50.00,
+            is_active=True
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment = Appointment.objects.create(
+                service=service,
+                employee=employee,
+                start_time=timezone.now() + timedelta(days=1),
+                client_name='Cliente Teste',
+                client_contact='11999999999'
+            )
+
+        task_row = Task.objects.get(name='appointments.send_confirmation')
+        self.assertEqual(task_row.payload, {'appointment_id': appointment.id})
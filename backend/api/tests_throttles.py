@@ -0,0 +1,100 @@
+#api/tests_throttles.py
+
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from .models import User
+
+
+def throttle_rates(**rates):
+    return override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates})
+
+
+@throttle_rates(user='100/min', list='2/min', create='1/min', token='1/min')
+class TokenBucketThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(
+            username='admin',
+            password='admin123',
+            email='admin@example.com',
+            role=User.Role.ADMIN
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.service_url = reverse('service-list')
+
+    def tearDown(self):
+        # Os baldes ficam no cache, que não é desfeito junto com a transação do teste
+        cache.clear()
+
+    def test_list_budget_returns_429_with_retry_after(self):
+        for _ in range(2):
+            self.assertEqual(self.client.get(self.service_url).status_code, status.HTTP_200_OK)
+
+        response = self.client.get(self.service_url)
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # 2 fichas por minuto: uma nova ficha a cada 30 s
+        self.assertEqual(response['Retry-After'], '30')
+
+    def test_budgets_are_separate_per_scope_and_view(self):
+        for _ in range(2):
+            self.client.get(self.service_url)
+        self.assertEqual(self.client.get(self.service_url).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # Outras views e outras actions têm baldes próprios
+        self.assertEqual(self.client.get(reverse('appointment-list')).status_code, status.HTTP_200_OK)
+        response = self.client.post(self.service_url, {'name': 'Corte', 'duration': 30, 'price': '50.00'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.get(reverse('service-detail', args=[response.data['id']]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_budgets_are_per_user(self):
+        for _ in range(3):
+            self.client.get(self.service_url)
+
+        employee = User.objects.create_user(username='employee', password='employee123', role=User.Role.EMPLOYEE)
+        self.client.force_authenticate(user=employee)
+        self.assertEqual(self.client.get(self.service_url).status_code, status.HTTP_200_OK)
+
+    def test_bucket_refills_over_time(self):
+        with mock.patch('api.throttles.time.time', return_value=1000.0) as now:
+            for _ in range(2):
+                self.client.get(self.service_url)
+            self.assertEqual(self.client.get(self.service_url).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+            now.return_value = 1030.0
+            self.assertEqual(self.client.get(self.service_url).status_code, status.HTTP_200_OK)
+            self.assertEqual(self.client.get(self.service_url).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_token_endpoint_is_limited_per_client(self):
+        client = APIClient()
+        url = reverse('token_obtain_pair')
+        data = {'username': 'admin', 'password': 'errada'}
+
+        self.assertEqual(client.post(url, data, format='json').status_code, status.HTTP_401_UNAUTHORIZED)
+        response = client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+
+    def test_forwarded_for_header_does_not_reset_token_bucket(self):
+        client = APIClient()
+        url = reverse('token_obtain_pair')
+        data = {'username': 'admin', 'password': 'errada'}
+
+        responses = [
+            client.post(url, data, format='json', HTTP_X_FORWARDED_FOR=f'203.0.113.{i}')
+            for i in range(3)
+        ]
+
+        self.assertEqual(
+            [response.status_code for response in responses],
+            [status.HTTP_401_UNAUTHORIZED] + [status.HTTP_429_TOO_MANY_REQUESTS] * 2
+        )
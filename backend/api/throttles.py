@@ -0,0 +1,102 @@
+# api/throttles
+import threading
+import time
+
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+# Escopo usado para cada action quando a view não define throttle_scopes
+DEFAULT_ACTION_SCOPES = {
+    'list': 'list',
+    'create': 'create',
+}
+DEFAULT_SCOPE = 'user'
+
+
+def parse_rate(rate):
+    """'120/min' -> (120, 60)"""
+    num, period = rate.split('/')
+    return int(num), {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Balde de fichas por (escopo, view, usuário): cabem até N fichas, que se
+    recompõem continuamente a N/período por segundo. Rajadas curtas passam
+    enquanto houver fichas; um cliente em loop fica limitado à taxa média.
+
+    O estado de cada balde é (fichas, instante da última leitura) no cache
+    `cache_alias` (padrão 'default'). A leitura e a escrita acontecem sob um
+    lock do processo, o que as torna atômicas com o LocMemCache local; com um
+    cache compartilhado entre workers o limite passa a ser aproximado.
+
+    As taxas vêm de REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'][escopo]; escopo
+    sem taxa (ou com taxa None) não é limitado.
+    """
+    cache_alias = 'default'
+    cache_format = 'throttle:{scope}:{view}:{ident}'
+    scope = None
+    _lock = threading.Lock()
+
+    def get_scope(self, request, view):
+        return self.scope
+
+    def get_rate(self, scope):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+
+    def get_cache_key(self, request, view, scope):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        view_name = getattr(view, 'basename', None) or type(view).__name__
+        return self.cache_format.format(scope=scope, view=view_name, ident=ident)
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(request, view)
+        rate = self.get_rate(scope)
+        if rate is None:
+            return True
+
+        capacity, duration = parse_rate(rate)
+        refill = capacity / duration
+        key = self.get_cache_key(request, view, scope)
+        cache = caches[self.cache_alias]
+
+        with self._lock:
+            now = time.time()
+            tokens, updated = cache.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            # Sem uso por `duration` segundos o balde estaria cheio de novo: a entrada pode expirar
+            cache.set(key, (tokens, now), timeout=duration)
+
+        self._wait = 0 if allowed else (1 - tokens) / refill
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class ActionRateThrottle(TokenBucketThrottle):
+    """
+    Escolhe o escopo pela action da view: `view.throttle_scope` fixa um escopo
+    para a view inteira; `view.throttle_scopes` mapeia action -> escopo; sem
+    nenhum dos dois, list e create têm orçamentos próprios e o resto usa 'user'.
+    """
+
+    def get_scope(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if scope:
+            return scope
+        action = getattr(view, 'action', None)
+        scopes = {**DEFAULT_ACTION_SCOPES, **getattr(view, 'throttle_scopes', {})}
+        return scopes.get(action, DEFAULT_SCOPE)
+
+
+class TokenRateThrottle(TokenBucketThrottle):
+    """Endpoints de token (login, renovação, logout), anônimos: o balde é por IP"""
+    scope = 'token'
@@ -0,0 +1,189 @@
+# api/tokens
+import os
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .models import TokenRevocation
+
+# Lista de revogação: a fonte é a tabela TokenRevocation e o cache é uma cópia
+# lida a cada renovação. Cada entrada expira junto com o último token que ela
+# pode afetar, então o conjunto nunca cresce além dos tokens vivos. O cache é
+# só dela (TOKEN_REVOCATION_CACHE): uma entrada descartada para abrir espaço
+# valeria como "não revogado" até a próxima recarga.
+TOKEN_KEY = 'jwt:revoked:{jti}'
+USER_KEY = 'jwt:revoked-before:{user_id}'
+# Presente enquanto o cache estiver em dia com o banco; ao expirar (ou se o
+# cache for perdido num reinício) a próxima renovação recarrega as revogações
+SYNC_KEY = 'jwt:revocations-synced'
+
+# Instante de emissão com fração de segundo ("iat" é em segundos inteiros)
+ISSUED_AT_CLAIM = 'issued_at'
+
+# Caches que não são compartilhados entre processos
+PER_PROCESS_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+class RevocableRefreshToken(RefreshToken):
+    """Refresh token com o instante exato de emissão, comparado com as revogações do usuário"""
+    no_copy_claims = RefreshToken.no_copy_claims + (ISSUED_AT_CLAIM,)
+
+    def set_iat(self, claim='iat', at_time=None):
+        if at_time is None:
+            at_time = self.current_time
+        super().set_iat(claim, at_time)
+        self.payload[ISSUED_AT_CLAIM] = at_time.timestamp()
+
+
+def _timeout(exp):
+    return max(int(exp - timezone.now().timestamp()), 1)
+
+
+def revocation_cache():
+    return caches[getattr(settings, 'TOKEN_REVOCATION_CACHE', 'default')]
+
+
+def _sync_seconds():
+    return getattr(settings, 'TOKEN_REVOCATION_SYNC_SECONDS', 30)
+
+
+def revoke_token(token):
+    """Revoga um refresh token (logout) até a sua expiração"""
+    jti = token[api_settings.JTI_CLAIM]
+    TokenRevocation.objects.create(
+        jti=jti,
+        revoked_at=timezone.now(),
+        expires_at=datetime_from_epoch(token['exp']),
+    )
+    revocation_cache().set(TOKEN_KEY.format(jti=jti), True, timeout=_timeout(token['exp']))
+
+
+def revoke_user_tokens(user_id):
+    """
+    Revoga todos os refresh tokens emitidos até agora para o usuário
+    (troca de senha ou de papel, desativação, exclusão).
+    """
+    now = timezone.now()
+    TokenRevocation.objects.create(
+        user_id=user_id, revoked_at=now, expires_at=now + api_settings.REFRESH_TOKEN_LIFETIME
+    )
+    revocation_cache().set(
+        USER_KEY.format(user_id=user_id),
+        now.timestamp(),
+        timeout=int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+    )
+
+
+def _load_revocations():
+    """
+    Copia para o cache as revogações ainda vigentes no banco. Cobre o cache
+    vazio depois de um reinício e, com cache por processo, as revogações
+    feitas em outros workers (com atraso de até TOKEN_REVOCATION_SYNC_SECONDS).
+    """
+    cache = revocation_cache()
+    if cache.get(SYNC_KEY):
+        return
+    revoked_tokens, revoked_users = {}, {}
+    rows = TokenRevocation.objects.filter(expires_at__gt=timezone.now()).values_list(
+        'jti', 'user_id', 'revoked_at'
+    )
+    for jti, user_id, revoked_at in rows:
+        if jti:
+            revoked_tokens[TOKEN_KEY.format(jti=jti)] = True
+        else:
+            key = USER_KEY.format(user_id=user_id)
+            revoked_users[key] = max(revoked_users.get(key, 0), revoked_at.timestamp())
+    # Nunca recua um corte gravado por uma revogação concorrente
+    for key, revoked_before in cache.get_many(list(revoked_users)).items():
+        revoked_users[key] = max(revoked_users[key], revoked_before)
+    cache.set_many(
+        {**revoked_tokens, **revoked_users},
+        timeout=int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+    )
+    cache.set(SYNC_KEY, True, timeout=_sync_seconds())
+
+
+def is_revoked(token):
+    _load_revocations()
+    keys = [
+        TOKEN_KEY.format(jti=token[api_settings.JTI_CLAIM]),
+        USER_KEY.format(user_id=token[api_settings.USER_ID_CLAIM]),
+    ]
+    found = revocation_cache().get_many(keys)
+    if keys[0] in found:
+        return True
+    revoked_before = found.get(keys[1])
+    if revoked_before is None:
+        return False
+    # Tokens sem a claim (emitidos antes dela) caem no "iat" truncado, o que
+    # só pode revogar a mais, nunca a menos
+    return token.get(ISSUED_AT_CLAIM, token['iat']) < revoked_before
+
+
+@checks.register(checks.Tags.security, checks.Tags.caches)
+def check_revocation_cache(app_configs, **kwargs):
+    """Avisa quando vários workers usam um cache por processo para a lista de revogação"""
+    alias = getattr(settings, 'TOKEN_REVOCATION_CACHE', 'default')
+    backend = settings.CACHES.get(alias, {}).get('BACKEND')
+    try:
+        workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+    except ValueError:
+        workers = 1
+    if backend in PER_PROCESS_CACHES and workers > 1:
+        return [checks.Warning(
+            f'{backend} não é compartilhado entre os {workers} workers: uma revogação de token '
+            f'leva até {_sync_seconds()}s para valer nos outros.',
+            hint=f'Configure um cache compartilhado (Redis/Memcached) em CACHES[{alias!r}].',
+            id='api.W002',
+        )]
+    return []
+
+
+class StatelessTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Renova o access token sem carregar o usuário do banco: assinatura e
+    expiração vêm do próprio JWT, `username` e `role` são copiados das claims
+    do refresh token (MyTokenObtainPairSerializer) e a lista de revogação é
+    lida do cache (o banco só é consultado para recarregá-la).
+    """
+    token_class = RevocableRefreshToken
+
+    def validate(self, attrs):
+        # TokenError (assinatura/expiração) vira 401 em TokenRefreshView
+        refresh = self.token_class(attrs['refresh'])
+        if is_revoked(refresh):
+            raise InvalidToken('Token revogado')
+
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                revoke_token(refresh)
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+
+        return data
+
+
+class TokenRevokeSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
+
+    def validate(self, attrs):
+        try:
+            attrs['token'] = RevocableRefreshToken(attrs['refresh'])
+        except TokenError as exc:
+            raise InvalidToken(exc.args[0])
+        return attrs
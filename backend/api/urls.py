@@ -6,6 +6,7 @@ from .views import (
     AppointmentViewSet,
     me
 )
+from . import asyncviews
 
 router = DefaultRouter()
 router.register(r'users', UserViewSet, basename='user')
@@ -18,4 +19,7 @@ router.register(r'appointments', AppointmentViewSet, basename='appointment')
 urlpatterns = [
     path('', include(router.urls)),
     path('me/', me, name='me'),
+    # Variantes assíncronas para servir sob ASGI (ver api/asyncviews.py)
+    path('async/me/', asyncviews.me, name='async-me'),
+    path('async/services/', asyncviews.service_list, name='async-service-list'),
 ]
\ No newline at end of file
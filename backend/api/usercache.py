@@ -0,0 +1,42 @@
+# api/usercache
+"""
+Cache de dados derivados de um usuário. As chaves incluem User.cache_version,
+trocado em todo User.save(): depois de uma alteração as entradas antigas
+deixam de ser lidas (e expiram sozinhas), sem apagar nada explicitamente.
+
+Uma alteração que não passe por save() (QuerySet.update) precisa trocar
+cache_version junto, no mesmo UPDATE.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def user_cache_key(user, name):
+    return f'user:{user.pk}:{user.cache_version.hex}:{name}'
+
+
+def user_etag(user, name, *parts):
+    """ETag forte derivado da versão do usuário; `parts` distingue representações (ex.: formato)"""
+    key = '|'.join(str(part) for part in (user_cache_key(user, name), *parts))
+    return '"%s"' % hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()
+
+
+def cached_for_user(user, name, compute):
+    """Valor de `compute()` guardado por USER_CACHE_TIMEOUT segundos para a versão atual do usuário"""
+    key = user_cache_key(user, name)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout=getattr(settings, 'USER_CACHE_TIMEOUT', 300))
+    return value
+
+
+async def acached_for_user(user, name, compute):
+    key = user_cache_key(user, name)
+    value = await cache.aget(key)
+    if value is None:
+        value = compute()
+        await cache.aset(key, value, timeout=getattr(settings, 'USER_CACHE_TIMEOUT', 300))
+    return value
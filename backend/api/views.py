@@ -1,21 +1,49 @@
 # api/views
-from django.http import Http404
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, StreamingHttpResponse
+from django.utils.http import parse_etags
 from django.core.exceptions import PermissionDenied, ValidationError
 from django.db import DatabaseError, IntegrityError
 from rest_framework import viewsets, permissions, status, filters
-from rest_framework.decorators import action, api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import action, api_view, permission_classes, throttle_classes
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from django.utils import timezone
-from .models import Service, Appointment, User
-from .serializers import ServiceSerializer, EmployeeSerializer, ProfessionalSerializer, AppointmentSerializer, UserSerializer
-from django.db.models import Q
+from django.utils.dateparse import parse_date, parse_datetime
+from .agenda import cached_professional_agenda
+from .events import event_stream
+from .idempotency import idempotent
+from .mixins import (
+    BranchScopedMixin, ConditionalGetMixin, FastListMixin, FieldSelectionMixin, ReplicaReadMixin, etag_matches
+)
+from .models import Service, Appointment, AppointmentArchive, User, StaleAppointmentError
+from .renderers import EventStreamRenderer, ORJSONRenderer
+from .queries import (
+    ALL_BRANCHES, appointment_filters, branch_scope, can_modify_appointment, next_reserved_start,
+    visible_appointments
+)
+from . import tokens
+from .sync import InvalidWatermark, appointment_changes
+from .throttles import TokenRateThrottle
+from .tokens import TokenRevokeSerializer
+from .usercache import cached_for_user, user_etag
+from .serializers import (
+    ServiceSerializer, EmployeeSerializer, ProfessionalSerializer, BulkProfessionalSerializer, AppointmentSerializer,
+    AppointmentArchiveSerializer, UserSerializer
+)
+from django.db.models import Max
+from datetime import datetime, time
 from django_filters.rest_framework import DjangoFilterBackend
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(
+    ReplicaReadMixin, ConditionalGetMixin, FieldSelectionMixin, BranchScopedMixin, FastListMixin, viewsets.ModelViewSet
+):
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAdminUser]
+    fast_list = True
+    stream_list = True
 
     def get_queryset(self):
         queryset = User.objects.all().order_by('first_name')
@@ -34,24 +62,32 @@ class UserViewSet(viewsets.ModelViewSet):
             user.save()
 
 
-class AdministratorViewSet(viewsets.ModelViewSet):
+class AdministratorViewSet(ReplicaReadMixin, ConditionalGetMixin, FieldSelectionMixin, BranchScopedMixin, viewsets.ModelViewSet):
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAdminUser]
 
     def get_queryset(self):
         return User.objects.filter(role=User.Role.ADMIN).order_by('first_name')
 
+    def get_serializer_context(self):
+        # Papel gravado por perform_create (ver UserSerializer.branch_required)
+        return {**super().get_serializer_context(), 'role': User.Role.ADMIN}
+
     def perform_create(self, serializer):
         serializer.save(role=User.Role.ADMIN, is_staff=True)
 
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+class EmployeeViewSet(ReplicaReadMixin, ConditionalGetMixin, FieldSelectionMixin, BranchScopedMixin, viewsets.ModelViewSet):
     serializer_class = EmployeeSerializer
     permission_classes = [permissions.IsAdminUser]
 
     def get_queryset(self):
         return User.objects.filter(role=User.Role.EMPLOYEE).order_by('first_name')
 
+    def get_serializer_context(self):
+        # Papel gravado por perform_create (ver UserSerializer.branch_required)
+        return {**super().get_serializer_context(), 'role': User.Role.EMPLOYEE}
+
     def perform_create(self, serializer):
         serializer.save(role=User.Role.EMPLOYEE, is_staff=False)
 
@@ -59,16 +95,64 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         employee = self.get_object()
 
 
-class ProfessionalViewSet(viewsets.ModelViewSet):
+class ProfessionalViewSet(ReplicaReadMixin, ConditionalGetMixin, FieldSelectionMixin, BranchScopedMixin, viewsets.ModelViewSet):
     serializer_class = ProfessionalSerializer
     permission_classes = [permissions.IsAuthenticated]
+    replica_actions = ('list', 'retrieve')
+    # A agenda traz os horários livres do dia
+    throttle_scopes = {'agenda': 'availability'}
 
     def get_queryset(self):
         return User.objects.filter(role=User.Role.PROFESSIONAL).order_by('first_name')
 
+    def get_serializer_context(self):
+        # Papel gravado por perform_create (ver UserSerializer.branch_required)
+        return {**super().get_serializer_context(), 'role': User.Role.PROFESSIONAL}
+
     def perform_create(self, serializer):
         serializer.save(role=User.Role.PROFESSIONAL, is_staff=False)
 
+    @action(detail=True, methods=['get'])
+    def agenda(self, request, pk=None):
+        """Agenda do dia (?date=AAAA-MM-DD, padrão hoje): agendamentos, intervalos livres e totais"""
+        professional = self.get_object()
+        if not request.user.is_staff and request.user.role == User.Role.PROFESSIONAL and professional.pk != request.user.pk:
+            return Response(
+                {'status': 'error', 'message': 'Profissionais só podem ver a própria agenda.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        day = request.query_params.get('date')
+        try:
+            day = parse_date(day) if day else timezone.localdate()
+        except ValueError:
+            day = None
+        if day is None:
+            return Response(
+                {'status': 'error', 'message': 'Data inválida. Use o formato AAAA-MM-DD.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(cached_professional_agenda(professional, day))
+
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    @idempotent
+    def bulk(self, request):
+        """Cadastro em lote: valida todas as linhas e grava tudo ou nada"""
+        serializer = BulkProfessionalSerializer(
+            data=request.data,
+            many=True,
+            min_length=1,
+            max_length=getattr(settings, 'BULK_ONBOARDING_MAX_ROWS', 1000),
+            context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        users = serializer.save()
+        return Response(
+            ProfessionalSerializer(users, many=True, context=self.get_serializer_context()).data,
+            status=status.HTTP_201_CREATED
+        )
+
     def destroy(self, request, *args, **kwargs):
         professional = self.get_object()
 
@@ -102,8 +186,13 @@ class ProfessionalViewSet(viewsets.ModelViewSet):
         return super().handle_exception(exc)
 
 
-class ServiceViewSet(viewsets.ModelViewSet):
+class ServiceViewSet(
+    ReplicaReadMixin, ConditionalGetMixin, FieldSelectionMixin, BranchScopedMixin, FastListMixin, viewsets.ModelViewSet
+):
     serializer_class = ServiceSerializer
+    etag_models = (Service, Appointment)
+    fast_list = True
+    replica_actions = ('list', 'retrieve')
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [filters.SearchFilter]
     search_fields = ['^name']
@@ -113,6 +202,10 @@ class ServiceViewSet(viewsets.ModelViewSet):
             return [permissions.IsAdminUser()]
         return [permissions.IsAuthenticated()]
 
+    def get_etag_parts(self, request):
+        # can_delete/can_edit dependem do relógio, não só das escritas
+        return (next_reserved_start(),)
+
     def get_queryset(self):
         queryset = Service.objects.all()
 
@@ -158,30 +251,22 @@ class ServiceViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class AppointmentViewSet(viewsets.ModelViewSet):
+class AppointmentViewSet(ReplicaReadMixin, ConditionalGetMixin, FieldSelectionMixin, FastListMixin, viewsets.ModelViewSet):
     serializer_class = AppointmentSerializer
-    filter_backends = [filters.SearchFilter, DjangoFilterBackend]
-    search_fields = ['client_name', 'client_contact']
-    filterset_fields = ['status', 'employee', 'service']
-
-    def get_queryset(self):
-        queryset = Appointment.objects.select_related('service', 'employee')
-        
-        # Filtro por status
-        status = self.request.query_params.get('status')
-        if status:
-            if status not in dict(Appointment.Status.choices):
-                raise ValidationError({'status': 'Status inválido'})
-            queryset = queryset.filter(status=status)
-        
-        # Filtros para não-admins
-        if not self.request.user.is_staff:
-            queryset = queryset.filter(
-                Q(employee=self.request.user) |
-                Q(status=Appointment.Status.RESERVED)
-            )
-        
-        return queryset.order_by('start_time')
+    etag_models = (Appointment, Service, User)
+    list_ordering = ('start_time', 'id')
+    fast_list = True
+    stream_list = True
+    # Ações em que o serializer define as colunas carregadas (only)
+    read_actions = ('list', 'retrieve', 'history')
+    # status, período (start/end) e busca ficam em visible_appointments
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['employee', 'service']
+    # Sincronização e histórico são consultados em polling, como a listagem
+    throttle_scopes = {'changes': 'list', 'history': 'list'}
+    # Relatório de períodos passados: tolera o atraso da réplica. A lista fica
+    # no primário, pois é relida logo após create/cancel
+    replica_actions = ('history',)
 
     def handle_exception(self, exc):
         if isinstance(exc, ValidationError):
@@ -189,35 +274,78 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 {'status': 'error', 'message': exc.message_dict},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        if isinstance(exc, StaleAppointmentError):
+            return self._precondition_failed()
         return super().handle_exception(exc)
 
+    def get_etag_parts(self, request):
+        # O serviço embutido traz can_delete/can_edit (ver ServiceViewSet)
+        return (next_reserved_start(),)
+
+    def _precondition_failed(self):
+        return Response(
+            {'status': 'error', 'message': 'O agendamento foi alterado por outro usuário. Recarregue e tente novamente.'},
+            status=status.HTTP_412_PRECONDITION_FAILED
+        )
+
+    def _expected_version(self, request):
+        """
+        Versão esperada pelo cliente, via cabeçalho If-Match (o ETag do
+        detalhe, "3-<hash>", ou só "3") ou campo `version` no corpo. Retorna
+        None quando nenhuma foi informada.
+        """
+        if_match = request.headers.get('If-Match')
+        if if_match:
+            tags = [tag.removeprefix('W/').strip('"') for tag in parse_etags(if_match)]
+            if '*' in tags:
+                return None
+            version = tags[0].partition('-')[0] if len(tags) == 1 else ''
+        else:
+            version = request.data.get('version')
+            if version is None:
+                return None
+        version = str(version)
+        # Valores malformados nunca coincidem com a versão atual
+        return int(version) if version.isdigit() else -1
+
     def get_permissions(self):
         if self.action == 'create' and self.request.user.role == User.Role.PROFESSIONAL:
             self.permission_denied(self.request, message='Profissionais não podem criar agendamentos.')
         
-        if self.action in ['create', 'list', 'retrieve', 'update', 'partial_update', 'cancel', 'complete']:
+        if self.action in ['create', 'list', 'retrieve', 'update', 'partial_update', 'cancel', 'complete', 'stream', 'changes', 'history']:
             return [permissions.IsAuthenticated()]
         return [permissions.IsAdminUser()]
 
     def get_queryset(self):
-        user = self.request.user
-        queryset = Appointment.objects.select_related('service', 'employee')
-
-        if not user.is_staff:
-            if user.role == User.Role.PROFESSIONAL:
-                # Profissionais veem apenas seus próprios agendamentos
-                queryset = queryset.filter(employee=user)
-            else:
-                pass
-
-        # Filtro por status
-        status = self.request.query_params.get('status')
-        if status:
-            if status not in dict(Appointment.Status.choices):
-                raise ValidationError({'status': 'Status inválido'})
-            queryset = queryset.filter(status=status)
-            
-        return queryset.order_by('start_time')
+        queryset = visible_appointments(
+            self.request.user,
+            serializer=self.get_serializer() if self.action in self.read_actions else None,
+            **appointment_filters(self.request.query_params)
+        )
+
+        # Ordenação só na listagem, alinhada ao índice appointment_start_idx
+        if self.action == 'list':
+            queryset = queryset.order_by(*self.list_ordering)
+        return queryset
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        O ETag do detalhe começa pela versão da linha ("3-<hash>"): o mesmo
+        valor serve para If-None-Match e, devolvido em If-Match, é a versão
+        conferida por update/cancel/complete.
+        """
+        instance = self.get_object()
+        etag = '"%d-%s"' % (instance.version, self.get_etag(request).strip('"'))
+        if etag_matches(request.headers.get('If-None-Match'), etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        response = Response(self.get_serializer(instance).data)
+        response['ETag'] = etag
+        return response
 
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -228,13 +356,17 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        if request.user.role == User.Role.PROFESSIONAL and instance.employee != request.user:
+        if not can_modify_appointment(request.user, instance):
             return Response(
                 {'status': 'error',
                     'message': 'Profissionais só podem editar seus próprios agendamentos.'},
                 status=status.HTTP_403_FORBIDDEN
             )
 
+        expected_version = self._expected_version(request)
+        if expected_version is not None and expected_version != instance.version:
+            return self._precondition_failed()
+
         if instance.status != Appointment.Status.RESERVED:
             return Response(
                 {'status': 'error', 'message': f'Agendamento não pode ser alterado. O status atual é "{instance.get_status_display()}" e apenas agendamentos "Reservado" podem ser modificados.'},
@@ -254,16 +386,21 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    @idempotent
     def cancel(self, request, pk=None):
         appointment = self.get_object()
 
         try:
-            if request.user.role == User.Role.PROFESSIONAL and appointment.employee != request.user:
+            if not can_modify_appointment(request.user, appointment):
                 return Response(
                     {'status': 'error', 'message': 'Permissão negada. Profissionais só podem cancelar seus próprios agendamentos.'},
                     status=status.HTTP_403_FORBIDDEN
                 )
 
+            expected_version = self._expected_version(request)
+            if expected_version is not None and expected_version != appointment.version:
+                return self._precondition_failed()
+
             appointment.cancel()
 
             return Response(
@@ -278,15 +415,20 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             )
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    @idempotent
     def complete(self, request, pk=None):
         try:
             appointment = self.get_object()  
-            if request.user.role == User.Role.PROFESSIONAL and appointment.employee != request.user:
+            if not can_modify_appointment(request.user, appointment):
                 return Response(
                     {'status': 'error', 'message': 'Permissão negada. Profissionais só podem concluir seus próprios agendamentos.'},
                     status=status.HTTP_403_FORBIDDEN
                 )
-            
+
+            expected_version = self._expected_version(request)
+            if expected_version is not None and expected_version != appointment.version:
+                return self._precondition_failed()
+
             appointment.complete()
             
             return Response(
@@ -304,15 +446,165 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 {'status': 'error', 'message': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        except StaleAppointmentError:
+            return self._precondition_failed()
         except Exception as e:
             return Response(
                 {'status': 'error', 'message': 'Erro ao concluir agendamento'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """Sincronização incremental: alterações e exclusões desde o token `since`"""
+        try:
+            limit = min(int(request.query_params.get('limit', 500)), 1000)
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            return Response(
+                {'status': 'error', 'message': 'Limite inválido'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        employee_id = None
+        if not request.user.is_staff and request.user.role == User.Role.PROFESSIONAL:
+            employee_id = request.user.pk
+        branch_id = branch_scope(request.user, request.query_params)
+
+        try:
+            changed, deleted, next_token, has_more = appointment_changes(
+                self.get_queryset(),
+                token=request.query_params.get('since'),
+                limit=limit,
+                employee_id=employee_id,
+                branch_id=branch_id
+            )
+        except InvalidWatermark:
+            return Response(
+                {'status': 'error', 'message': 'Token de sincronização inválido'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response({
+            'changed': self.get_serializer(changed, many=True).data,
+            'deleted': deleted,
+            'next': next_token,
+            'has_more': has_more,
+        })
+
+    @action(detail=False, methods=['get'])
+    def history(self, request):
+        """Agendamentos entre `start` e `end` (datas), incluindo os já arquivados"""
+        start = parse_date(request.query_params.get('start', ''))
+        end = parse_date(request.query_params.get('end', ''))
+        if start is None or end is None or end < start:
+            return Response(
+                {'status': 'error', 'message': 'Informe start e end no formato AAAA-MM-DD, com start <= end.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # get_queryset já aplica start/end, status e busca
+        current = list(self.get_queryset())
+        rows = [
+            (appointment.start_time, appointment.id, data)
+            for appointment, data in zip(current, self.get_serializer(current, many=True).data)
+        ]
+
+        # Só consulta o histórico quando o período alcança a fronteira do arquivamento
+        boundary = AppointmentArchive.objects.aggregate(Max('start_time'))['start_time__max']
+        if boundary is not None and timezone.make_aware(datetime.combine(start, time.min)) <= boundary:
+            context = self.get_serializer_context()
+            archived = list(visible_appointments(
+                request.user,
+                model=AppointmentArchive,
+                serializer=AppointmentArchiveSerializer(context=context),
+                **appointment_filters(request.query_params)
+            ))
+            serializer = AppointmentArchiveSerializer(archived, many=True, context=context)
+            rows += [
+                (appointment.start_time, appointment.id, data)
+                for appointment, data in zip(archived, serializer.data)
+            ]
+
+        rows.sort(key=lambda row: row[:2])
+        return Response([data for _, _, data in rows])
+
+    @action(detail=False, methods=['get'], renderer_classes=[EventStreamRenderer, ORJSONRenderer])
+    def stream(self, request):
+        """Feed SSE de criação/alteração/cancelamento/conclusão de agendamentos"""
+        employee_id = request.query_params.get('employee')
+        day = request.query_params.get('date')
+
+        if employee_id is not None and not employee_id.isdigit():
+            return Response(
+                {'status': 'error', 'message': 'Funcionário inválido'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if day is not None:
+            day = parse_date(day)
+            if day is None:
+                return Response(
+                    {'status': 'error', 'message': 'Data inválida. Use o formato AAAA-MM-DD.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        # Profissionais só acompanham os próprios agendamentos
+        if not request.user.is_staff and request.user.role == User.Role.PROFESSIONAL:
+            employee_id = request.user.pk
+        elif employee_id is not None:
+            employee_id = int(employee_id)
+        branch_id = branch_scope(request.user, request.query_params)
+
+        def matches(event):
+            appointment = event['appointment']
+            if employee_id is not None and appointment['employee_id'] != employee_id:
+                return False
+            if branch_id is not ALL_BRANCHES and appointment['branch_id'] != branch_id:
+                return False
+            if day is not None:
+                start_time = timezone.localtime(parse_datetime(appointment['start_time']))
+                return start_time.date() == day
+            return True
+
+        # Sob WSGI o gerador assíncrono seria acumulado numa lista que nunca termina,
+        # prendendo o worker: o feed só é servido pelo ASGI
+        if not isinstance(request._request, ASGIRequest):
+            return Response(
+                {'status': 'error', 'message': 'O feed em tempo real exige o servidor ASGI (config.asgi).'},
+                status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+
+        response = StreamingHttpResponse(
+            event_stream(
+                matches,
+                heartbeat=getattr(settings, 'APPOINTMENT_STREAM_HEARTBEAT', 15)
+            ),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@throttle_classes([TokenRateThrottle])
+def revoke_token(request):
+    """Logout: revoga o refresh token informado; a renovação passa a responder 401"""
+    serializer = TokenRevokeSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    tokens.revoke_token(serializer.validated_data['token'])
+    return Response(status=status.HTTP_205_RESET_CONTENT)
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def me(request):
-    serializer = UserSerializer(request.user)
-    return Response(serializer.data)
\ No newline at end of file
+    """Chamado a cada troca de rota do frontend: ETag e cache por versão do usuário"""
+    user = request.user
+    etag = user_etag(user, 'me', request.accepted_renderer.format)
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+    data = cached_for_user(user, 'me', lambda: dict(UserSerializer(user).data))
+    return Response(data, headers={'ETag': etag})
\ No newline at end of file
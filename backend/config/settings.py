@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+from importlib.util import find_spec
 from pathlib import Path
 from datetime import timedelta
 
@@ -48,6 +50,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Antes de quem lê ou altera o corpo da resposta, para comprimir por último
+    'api.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -63,8 +67,41 @@ REST_FRAMEWORK = {
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',    
-    ]
+    ],
+    # orjson é opcional: sem ele, renderer e parser usam o json da stdlib
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Balde de fichas por usuário e por view (api.throttles). O escopo vem da
+    # action: listagens e criação têm orçamentos próprios, os endpoints de
+    # token são limitados por IP e 'availability' fica reservado para as
+    # consultas de horários livres. Excedido o limite, a resposta é 429 com
+    # Retry-After.
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttles.ActionRateThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'user': '600/min',
+        'list': '120/min',
+        'create': '30/min',
+        'availability': '240/min',
+        'token': '20/min',
+    },
+    # Proxies reversos confiáveis na frente da aplicação: os baldes anônimos
+    # usam o IP que o último deles acrescentou ao X-Forwarded-For. Com 0
+    # (uvicorn exposto direto, como no Dockerfile) o cabeçalho, que o cliente
+    # escolhe livremente, é ignorado e vale REMOTE_ADDR
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
 }
+# Só para medições de carga (manage.py benchmark_asgi sobe os servidores assim)
+if os.environ.get('DISABLE_THROTTLING') == '1':
+    REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] = {}
 
 ROOT_URLCONF = 'config.urls'
 
@@ -84,6 +121,8 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+# Servidor de produção (Dockerfile); necessário para o feed SSE
+ASGI_APPLICATION = 'config.asgi.application'
 
 
 # Database
@@ -96,6 +135,22 @@ DATABASES = {
     }
 }
 
+# Réplicas de leitura (api.routers.PrimaryReplicaRouter): listagens de
+# serviços e profissionais e o histórico leem de uma réplica; escritas e
+# leituras logo após uma escrita do mesmo usuário (REPLICA_STICKY_SECONDS)
+# ficam no primário. Para testar localmente, aponte DATABASE_REPLICA_PATH
+# para uma cópia do db.sqlite3 (a suíte de testes roda sem a variável).
+DATABASE_REPLICAS = []
+if os.environ.get('DATABASE_REPLICA_PATH'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['DATABASE_REPLICA_PATH'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append('replica')
+DATABASE_ROUTERS = ['api.routers.PrimaryReplicaRouter']
+REPLICA_STICKY_SECONDS = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -116,6 +171,34 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Hash de senhas: o perfil escolhe o hasher preferido; hashes de outros perfis
+# continuam válidos e são refeitos no próximo login. Custos e trade-offs em api/hashers.py.
+PASSWORD_HASHER_PROFILE = os.environ.get('PASSWORD_HASHER_PROFILE', 'pbkdf2')
+PASSWORD_HASHER_COST = {
+    'pbkdf2': {'iterations': 1_000_000},
+    'argon2': {'time_cost': 2, 'memory_cost': 64 * 1024, 'parallelism': 1},  # memory_cost em KiB
+    'bcrypt': {'rounds': 12},
+}
+_PASSWORD_HASHER_CLASSES = {
+    'pbkdf2': 'api.hashers.PBKDF2PasswordHasher',
+    'argon2': 'api.hashers.Argon2PasswordHasher',
+    'bcrypt': 'api.hashers.BCryptSHA256PasswordHasher',
+}
+PASSWORD_HASHER_PROFILES = {
+    name: [hasher, *(other for other in _PASSWORD_HASHER_CLASSES.values() if other != hasher)]
+    for name, hasher in _PASSWORD_HASHER_CLASSES.items()
+}
+# argon2-cffi e bcrypt são opcionais: sem a biblioteca, o perfil volta para pbkdf2
+# (o aviso api.W001 aparece em `manage.py check`)
+_PASSWORD_HASHER_LIBRARIES = {'argon2': 'argon2', 'bcrypt': 'bcrypt'}
+PASSWORD_HASHERS = PASSWORD_HASHER_PROFILES[
+    PASSWORD_HASHER_PROFILE
+    if PASSWORD_HASHER_PROFILE in PASSWORD_HASHER_PROFILES
+    and find_spec(_PASSWORD_HASHER_LIBRARIES.get(PASSWORD_HASHER_PROFILE, 'hashlib'))
+    else 'pbkdf2'
+]
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -158,4 +241,81 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=10),
     "REFRESH_TOKEN_LIFETIME": timedelta(minutes=60),
     "TOKEN_OBTAIN_SERIALIZER": "api.serializers.MyTokenObtainPairSerializer",
-}
\ No newline at end of file
+    # Renovação sem carregar o usuário; revogações lidas do cache (api/tokens.py)
+    "TOKEN_REFRESH_SERIALIZER": "api.tokens.StatelessTokenRefreshSerializer",
+}
+
+# A lista de revogação de tokens fica no banco (TokenRevocation) e é lida de
+# um cache próprio (TOKEN_REVOCATION_CACHE), recarregado a cada
+# TOKEN_REVOCATION_SYNC_SECONDS. Ele não divide espaço com baldes de throttle,
+# agendas etc.: no limite de MAX_ENTRIES o cache descarta entradas, e uma
+# revogação descartada deixaria de valer até a recarga. O LocMemCache é por
+# processo: com vários workers (WEB_CONCURRENCY > 1) uma revogação leva até
+# esse intervalo para valer nos outros; use um cache compartilhado
+# (Redis/Memcached) para que valha em todos imediatamente (check api.W002).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'tokens': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'token-revocations',
+        # Entradas vivem no máximo REFRESH_TOKEN_LIFETIME
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+TOKEN_REVOCATION_CACHE = 'tokens'
+TOKEN_REVOCATION_SYNC_SECONDS = 30
+
+# Dados derivados de um usuário (ex.: /api/me/), com chave pela versão do
+# usuário (api/usercache.py); a expiração só limpa entradas de versões antigas
+USER_CACHE_TIMEOUT = 300
+
+# Agenda diária do profissional (/api/professionals/{id}/agenda/): intervalos
+# livres são calculados dentro deste horário; o cache é invalidado a cada
+# alteração nos agendamentos do profissional
+AGENDA_OPENING_HOUR = 8
+AGENDA_CLOSING_HOUR = 20
+AGENDA_CACHE_TIMEOUT = 300
+
+# Feed de eventos de agendamentos (/api/appointments/stream/)
+# O broker padrão é em memória e só entrega eventos gerados no mesmo processo;
+# para vários workers, aponte para um broker local compartilhado com a mesma interface.
+APPOINTMENT_EVENTS_BROKER = 'api.events.InProcessBroker'
+APPOINTMENT_STREAM_HEARTBEAT = 15  # segundos
+
+# Respostas guardadas para requisições com Idempotency-Key
+# (removidas após a expiração por `manage.py purge_idempotency_keys`)
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+# Prazo de uma requisição em processamento: passado esse tempo sem resposta
+# (processo morto no meio), uma repetição com a mesma chave assume a execução.
+# Deve ser maior que o tempo máximo de uma requisição.
+IDEMPOTENCY_KEY_LEASE = timedelta(seconds=60)
+
+# Fila de tarefas em segundo plano (consumida por `manage.py run_worker`)
+# Use 'api.taskqueue.ImmediateBackend' para executar as tarefas no próprio processo.
+TASK_BACKEND = 'api.taskqueue.DatabaseBackend'
+TASK_RETENTION = timedelta(days=7)
+
+# Notificações aos clientes (confirmações e lembretes)
+# Substitutos locais: 'api.notifications.ConsoleTransport' e 'api.notifications.FileTransport'
+NOTIFICATION_TRANSPORT = 'api.notifications.ConsoleTransport'
+NOTIFICATION_FILE_PATH = BASE_DIR / 'notifications.log'
+REMINDER_LEAD_TIME = timedelta(hours=24)
+
+# Varredura de agendamentos reservados que já passaram (`manage.py sweep_appointments`)
+APPOINTMENT_SWEEP_AFTER = timedelta(hours=2)
+APPOINTMENT_SWEEP_POLICY = 'no_show'  # ou 'completed'
+
+# Agendamentos encerrados há mais tempo que isso vão para o histórico
+# (`manage.py archive_appointments`); /api/appointments/history/ consulta as duas tabelas.
+APPOINTMENT_ARCHIVE_AFTER = timedelta(days=180)
+
+# Respostas menores que isso (em bytes) não são comprimidas
+RESPONSE_COMPRESSION_MIN_SIZE = 1024
+# Qualidade do brotli (0-11), usado quando o pacote opcional está instalado
+RESPONSE_BROTLI_QUALITY = 5
+
+# Cadastro em lote de profissionais (POST /api/professionals/bulk/ e `manage.py onboard_professionals`)
+BULK_ONBOARDING_MAX_ROWS = 1000
+PASSWORD_HASH_WORKERS = None  # processos para calcular os hashes; None = número de núcleos